@@ -24,13 +24,31 @@ Alignment modes:
   3. word_timestamps provided → phoneme-only within word boundaries (legacy)
 
 Deploy:
+  python pron_dict.py          # compile pron_dict/ so it ships in the image
   cog login
   cog push r8.im/diaquas/phoneme-align-sofa
 """
 
+import contextlib
+import copy
+import functools
+import hashlib
 import json
+import math
+import multiprocessing
 import os
+import queue
+import resource
 import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+_IMPORT_T0 = time.perf_counter()
 
 # Prevent thread-pool deadlocks in container environments.
 os.environ.setdefault("OMP_NUM_THREADS", "1")
@@ -50,12 +68,33 @@ from einops import repeat  # noqa: E402
 from modules.task.forced_alignment import LitForcedAlignmentTask  # noqa: E402
 from modules.utils.get_melspec import MelSpecExtractor  # noqa: E402
 
+from pron_dict import (  # noqa: E402
+    PronDict,
+    load_cmu_dict,
+    load_sofa_dict,
+    strip_stress as _strip_stress,
+)
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_T0
+
 # ── Paths to bundled assets ─────────────────────────────────────────
 
 SOFA_CKPT_PATH = "/opt/SOFA/tgm_en_v100.ckpt"
 SOFA_DICT_PATH = "/opt/SOFA/tgm_sofa_dict.txt"
 CMU_DICT_PATH = "/opt/cmudict.dict"
 
+# Content-addressed caches live here (override with SOFA_CACHE_DIR).
+CACHE_DIR = os.environ.get("SOFA_CACHE_DIR", "/tmp/sofa-cache")
+
+BACKENDS = ("torch", "onnx")
+PRECISIONS = ("fp32", "int8")
+
+# CPU hosts fork this many inference worker processes ("auto" = one per
+# available core, capped at _CPU_WORKERS_MAX; 0 or 1 = run in-process,
+# the default).  Workers split available memory, so long inputs are
+# planned in shorter chunks than one in-process worker would use.
+CPU_WORKERS = os.environ.get("SOFA_CPU_WORKERS", "0")
+
 # ── SOFA lowercase → uppercase ARPAbet mapping ──────────────────────
 #
 # SOFA's tgm_en_v100 model uses lowercase ARPAbet tokens (plus extras
@@ -82,62 +121,164 @@ SOFA_TO_ARPABET = {
 #
 # Larger chunks give SOFA more context to resolve boundaries that are
 # far apart in the audio. Previous 20 s chunks forced unrelated words
-# next to each other, hurting accuracy.  60 s balances context vs GPU
-# memory (T4 16 GB handles ~70 s safely; A10G much more).
-#
-# Audio shorter than _CHUNK_THRESHOLD_S is aligned in a single pass.
+# next to each other, hurting accuracy.  Chunk length is sized per
+# request from available memory (see the planner constants below);
+# audio that fits in one chunk is aligned in a single pass.
 
-_CHUNK_THRESHOLD_S = 60.0   # single-pass below this; chunk above
-_MAX_CHUNK_S = 60.0          # target maximum chunk length
 _MIN_SILENCE_S = 0.25        # minimum gap to consider as split point
+_VAD_FRAME_S = 0.025         # RMS envelope frame length
+_VAD_HOP_S = 0.010           # RMS envelope frame hop
 _CHUNK_PADDING_S = 0.75      # audio padding on each side of chunk
 
+# Per-line windows run from a line's start to the next line's start,
+# which can span a whole instrumental break.  They are clipped to the
+# silence map and to an expected-duration bound from the phoneme count
+# (generous: held notes and melisma stretch single vowels for seconds).
+_LINE_PADDING_S = 0.5        # audio padding on each side of a line
+_LINE_S_PER_PHONEME = 0.6    # longest expected sung time per phoneme
+_LINE_MIN_WINDOW_S = 2.0     # clipping never leaves less than this
+_LINE_BREAK_GAP_S = 1.0      # a gap this long before the window end is a break
+_LINE_ONSET_S = 1.5          # voice after a break, up to this, is the next line
+
+# ── Memory-budgeted planner constants ────────────────────────────
+#
+# Peak memory is modelled as a forward term linear in audio length
+# (UNet activations, on the inference device) plus a DP-decode term
+# linear in frames × phonemes (numpy, on the host).  The forward
+# coefficient reproduces the observed T4 limit: 16 GB ≈ 70 s single
+# pass.  Batches are padded to their longest window, so a batched
+# forward costs B × T_max frames — the same as one window of B × T_max.
+
+_FORWARD_BYTES_PER_S = 128 * 2**20   # UNet activations per audio-second
+_DECODE_BYTES_PER_CELL = 16          # DP matrices per (frame, phoneme) cell
+_MEMORY_HEADROOM = 0.6               # share of available memory to plan with
+_DENSITY_PEAK_FACTOR = 2.0           # dense verses vs the song's mean rate
+_MIN_CHUNK_S = 20.0                  # shortest chunk the planner will pick
+_MAX_CHUNK_CAP_S = 180.0             # longest chunk, even on large hosts
+
+# Batched windows are padded to a length that depends only on the window
+# (its frames rounded up to a step of about 1/16 of its length), and only
+# windows of equal padded length share a batch: a window's network output
+# never depends on what it happens to be batched with.
+_PAD_MIN_STEP_FRAMES = 32
+
+# Chunk cost model, in forward-frame units: the forward pass is linear in
+# frames, SOFA's DP decode in frames × phonemes.  At this ratio a window
+# of ~50 phonemes spends as long decoding as in the network (CPU).
+# Chunks are planned to roughly equal cost, not equal length, so a dense
+# verse does not become the one chunk every batch waits on.
+_DECODE_COST_PER_CELL = 0.02
+
+# ── Selective re-alignment constants ─────────────────────────────
+#
+# Chunks and lines whose first-pass alignment failed or came back below
+# _REALIGN_CONFIDENCE are re-aligned in smaller windows (line boundaries
+# or internal silences) instead of being kept or spread evenly.  The
+# second pass gets a share of the first pass's wall time.
+
+_REALIGN_CONFIDENCE = 0.4
+_REALIGN_BUDGET_SHARE = 0.25
+_REALIGN_MIN_BUDGET_S = 1.0
+_REALIGN_MIN_SPLIT_S = 2.0   # shortest sub-window a silence split may leave
+
+# ── Latency-budget constants ─────────────────────────────────────
+#
+# With deadline_s, the chosen mode's cost (_estimate_cost, in _chunk_cost
+# units plus a per-song term for mel and silence detection) is turned
+# into seconds with a calibrated rate: timed once after the warm-up,
+# then an exponential moving average over undegraded requests.  Cheaper
+# strategies are added in _DEGRADE_ORDER until the estimate fits.
+
+_SONG_COST_PER_FRAME = 0.05     # whole-song mel + VAD, per network frame
+_COST_RATE_EMA = 0.3            # weight of the latest request's rate
+_DEGRADED_BATCH_FACTOR = 1.5    # batch budget ×1.5 (0.9 of free memory)
+_LARGE_BATCH_SPEEDUP = 0.9      # assumed saving from fewer, larger batches
+_DEGRADE_ORDER = (
+    "no_realign",           # skip the low-confidence second pass
+    "tight_padding",        # halve chunk and line window padding
+    "large_batches",        # fewer forward calls, more memory
+    "no_word_refinement",   # word_timestamps: spread phonemes evenly
+)
+
+_WORD_CACHE_MAX = 50_000     # distinct lyric tokens memoized per predictor
+
+# ── Result cache constants ───────────────────────────────────────
+#
+# Bump _RESULT_CACHE_VERSION whenever alignment output can change for
+# the same inputs, so stale results are never served.
+
+_RESULT_CACHE_VERSION = 5
+_RESULT_CACHE_MAX_BYTES = 256 * 2**20
+_AUDIO_CACHE_MAX_BYTES = 2 * 2**30     # ~40 five-minute songs at 44.1 kHz
+
+# ── Streaming decode constants ───────────────────────────────────
+#
+# Longer inputs are decoded, downmixed and resampled window by window
+# (_stream_audio): only the song mel and the RMS envelope are kept, so
+# memory follows the window length instead of the file length.  Every
+# alignment window is a frame view of the song mel, so nothing else
+# needs the samples.  Streamed audio bypasses the audio cache.
+
+_STREAM_DECODE_MIN_S = 600.0   # stream inputs longer than ten minutes
+_STREAM_WINDOW_S = 30.0        # decoded audio per window
+_RESAMPLE_CONTEXT = 1024       # source samples of context on each side
+
+# An incremental request (previous_result) decodes only the audio around
+# the lines it re-aligns, with the song's stored silence threshold; past
+# this share of the song a whole load is cheaper than seeking.
+
+_INCREMENTAL_MARGIN_S = 2.0      # audio kept around each re-aligned line
+_INCREMENTAL_MAX_SHARE = 0.5
+
+# ── Multi-song batch constants ───────────────────────────────────
+#
+# Songs in flight decode, plan and prepare jobs concurrently while one
+# inference thread packs their windows into shared batches.  The gather
+# wait lets jobs from other songs join a batch before it runs.
+
+_BATCH_SONGS_IN_FLIGHT = 4
+_BATCH_GATHER_S = 0.02
+_BATCH_MANIFEST = "manifest.json"
+
+_CPU_WORKERS_MAX = 16
+
+# Warm-up alignment run in setup, so the first request does not pay for
+# numba JIT of the DP decode, first-call kernel selection or allocator
+# growth.  A few seconds of audio reach every one of those paths.
+_WARMUP_SECONDS = 4.0
+_WARMUP_TRANSCRIPT = "hello world la la la the end"
+_POOL_POLL_S = 1.0          # how often the collector checks worker health
+
+# ── ONNX backend constants ───────────────────────────────────────
+#
+# The network is exported once per checkpoint (in setup, when
+# onnxruntime is installed) and self-checked against the torch path on
+# windows of lengths the export never saw.
+
+_ONNX_OPSET = 17
+_ONNX_EXPORT_FRAMES = 1024        # dummy input length; axes are dynamic
+_ONNX_CHECK_WORDS = "hello world la la la the end".split()
+_ONNX_CHECK_SECONDS = (3.0, 7.5)  # two windows → one padded batch
+
+# Structured-array layouts returned by the silence detector and the
+# silence-based chunk builder.  Rows index like the dicts they replace
+# (row["start"]), and whole columns vectorise (silences["center"]).
+SILENCE_DTYPE = np.dtype([
+    ("start", "f8"), ("end", "f8"), ("center", "f8"), ("duration", "f8"),
+])
+CHUNK_DTYPE = np.dtype([("start", "f8"), ("end", "f8")])
+
 
 # ── Dictionary loaders ──────────────────────────────────────────────
 
 def _load_sofa_dict():
     """Load SOFA dictionary (tab-separated: word<TAB>ph1 ph2 ph3)."""
-    d = {}
-    with open(SOFA_DICT_PATH, encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#") or line.startswith(";;;"):
-                continue
-            parts = line.split("\t", 1)
-            if len(parts) != 2:
-                continue
-            word = parts[0].strip().lower()
-            # Skip variant pronunciations like "close(2)"
-            if "(" in word:
-                continue
-            phonemes = parts[1].strip().split()
-            if phonemes:
-                d[word] = phonemes
-    return d
+    return load_sofa_dict(SOFA_DICT_PATH)
 
 
 def _load_cmu_dict():
-    """Load CMU Pronouncing Dictionary as G2P fallback."""
-    import urllib.request
-
-    if not os.path.exists(CMU_DICT_PATH):
-        urllib.request.urlretrieve(
-            "https://raw.githubusercontent.com/cmusphinx/cmudict/master/cmudict.dict",
-            CMU_DICT_PATH,
-        )
-    cmu = {}
-    with open(CMU_DICT_PATH, encoding="latin-1") as f:
-        for line in f:
-            if line.startswith(";;;"):
-                continue
-            parts = line.strip().split(None, 1)
-            if len(parts) == 2:
-                word = parts[0].lower()
-                if "(" in word:
-                    continue
-                phonemes = parts[1].strip().split()
-                cmu[word] = phonemes
-    return cmu
+    """Load CMU Pronouncing Dictionary as G2P fallback (cog.yaml downloads it)."""
+    return load_cmu_dict(CMU_DICT_PATH)
 
 
 # ── Simple rule-based G2P fallback ──────────────────────────────────
@@ -188,19 +329,589 @@ def _grapheme_to_phoneme(word):
     return phonemes if phonemes else ["ah"]
 
 
-def _strip_stress(phoneme):
-    """Remove stress digits from ARPAbet token: AA1 → AA."""
-    if phoneme and phoneme[-1] in "012":
-        return phoneme[:-1]
-    return phoneme
+# ── Content-addressed disk cache ────────────────────────────────────
+
+def _file_sha256(path, block_size=1 << 20):
+    """Hex SHA-256 of a file's bytes, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class DiskLRUCache:
+    """Size-bounded on-disk cache of files keyed by content hash.
+
+    Entries are plain files named by key.  A hit refreshes the entry's
+    mtime, and eviction removes the least recently used entries until
+    the directory fits max_bytes.  Writes go through a temp file and
+    os.replace, so a crash never leaves a partial entry behind.
+    """
+
+    def __init__(self, root, max_bytes, suffix=""):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key + self.suffix)
+
+    def lookup(self, key):
+        """Path of the cached entry for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def store(self, key, write):
+        """Create the entry for key by calling write(tmp_path), then evict."""
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._evict()
+        return path
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.root, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# ── Streaming ───────────────────────────────────────────────────────
+
+class _DeadlineExceeded(Exception):
+    """Stands in for a window's inference when deadline_s leaves no time."""
+
+
+class _PoolExited(RuntimeError):
+    """A CPU worker died with the window's batch still pending."""
+
+
+class _InOrder:
+    """Release per-section records in index order as they complete.
+
+    Sections finish on the pipeline's worker threads, possibly out of
+    order; each index 0, 1, 2, … must be put exactly once (None for a
+    skipped section).  Records are held back until every earlier index
+    has been put, so the callback sees them in absolute time order.
+
+    A weak section is put as a provisional record and settled later,
+    once the second pass is done with it; the settled record replaces
+    the provisional one and follows it in the stream.
+    """
+
+    def __init__(self, callback):
+        self._callback = callback
+        self._pending = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def put(self, index, record):
+        if self._callback is None:
+            return
+        with self._lock:
+            self._pending[index] = record
+            while self._next in self._pending:
+                record = self._pending.pop(self._next)
+                self._next += 1
+                if record is not None and record["words"]:
+                    self._callback(record)
+
+    def settle(self, record):
+        """Emit the final record for a section put as provisional."""
+        if self._callback is None:
+            return
+        with self._lock:
+            if record["index"] in self._pending:
+                self._pending[record["index"]] = record
+            elif record["words"]:
+                self._callback(record)
+
+
+# ── Batched inference ───────────────────────────────────────────────
+
+class _ReplayForward:
+    """The SOFA model as seen by one _infer_once call on batched outputs.
+
+    forward() returns the window's slice of an already-run batched
+    forward; every other attribute is the model's own.
+    """
+
+    def __init__(self, model, outputs):
+        self._model = model
+        self._outputs = outputs
+
+    def forward(self, *_args, **_kwargs):
+        return self._outputs
+
+    __call__ = forward
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+# ── Multi-song batching ─────────────────────────────────────────────
+
+class _SharedBatcher:
+    """One inference thread packing jobs from concurrent songs together.
+
+    Each song's pipeline hands its jobs to run(); the worker thread
+    gathers whatever jobs are queued — from any song — into batches
+    under the predictor's batch budget, one padded window length
+    (_padded_frames) per batch, and runs them with _run_batch.
+    Jobs are served first-in first-out.  Network calls and DP decodes
+    happen on this one thread, or — on a CPU host with a worker pool —
+    each gathered batch is handed to the pool and the thread moves on
+    to gather the next one.  Every song of a batch uses the request's
+    backend.
+    """
+
+    def __init__(self, predictor, backend="torch"):
+        self._predictor = predictor
+        self._backend = backend
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def run(self, jobs):
+        """Submit jobs and yield (job, prediction, error) as they finish.
+
+        Jobs a dying CPU pool dropped are queued again; the worker
+        thread then runs them in-process.
+        """
+        done = queue.Queue()
+        pending = 0
+
+        def finished(item):
+            nonlocal pending
+            if isinstance(item[2], _PoolExited):
+                self._jobs.put((item[0], done))
+                return False
+            pending -= 1
+            return True
+
+        for job in jobs:
+            self._jobs.put((job, done))
+            pending += 1
+            while True:
+                try:
+                    item = done.get_nowait()
+                except queue.Empty:
+                    break
+                if finished(item):
+                    yield item
+        while pending:
+            item = done.get()
+            if finished(item):
+                yield item
+
+    def close(self):
+        """Stop the worker once queued jobs are served."""
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _serve(self):
+        carry = None
+        stop = False
+        while not stop:
+            item = carry if carry is not None else self._jobs.get()
+            carry = None
+            if item is None:
+                return
+
+            batch = [item]
+            longest = item[0]["length"]
+            budget = self._predictor._batch_budget_s()
+            padded = self._predictor._padded_frames
+            while True:
+                try:
+                    item = self._jobs.get(timeout=_BATCH_GATHER_S)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                longest_with = max(longest, item[0]["length"])
+                if (
+                    longest_with * (len(batch) + 1) > budget
+                    or padded(item[0]) != padded(batch[0][0])
+                ):
+                    carry = item
+                    break
+                batch.append(item)
+                longest = longest_with
+
+            jobs = [job for job, _ in batch]
+            pool = self._predictor._pool
+            if pool is not None and pool.submit(
+                jobs, lambda k, result, batch=batch: batch[k][1].put(result),
+                self._backend,
+            ):
+                continue
+
+            served = 0
+            try:
+                for result in self._predictor._run_batch(jobs, self._backend):
+                    batch[served][1].put(result)
+                    served += 1
+            except Exception as e:
+                for job, done in batch[served:]:
+                    done.put((job, None, e))
+
+
+# ── Telemetry ───────────────────────────────────────────────────────
+
+def _reset_peak_rss(pid):
+    """Reset a process's peak RSS (VmHWM); False where not permitted."""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes(pid):
+    """Peak resident set size of a process, or None if unreadable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return None
+
+
+class _Metrics:
+    """Stage timings and memory peaks for one request.
+
+    Stage seconds are summed across threads and pool workers, so while
+    the pipeline overlaps stages their sum can exceed wall time.  Peak
+    RSS is per request where the kernel allows resetting it, otherwise
+    the process lifetime peak ("rss_scope" says which).
+    """
+
+    def __init__(self, device="cpu", worker_pids=()):
+        self.device = device
+        self.worker_pids = list(worker_pids)
+        self.stages = {}
+        self.calls = {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._rss_scope = "request" if _reset_peak_rss(os.getpid()) else "process"
+        for pid in self.worker_pids:
+            _reset_peak_rss(pid)
+        if device == "cuda":
+            torch.cuda.reset_peak_memory_stats()
+
+    def add(self, stage, seconds, calls=1):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    def merge(self, stages, calls):
+        for stage, seconds in stages.items():
+            self.add(stage, seconds, calls.get(stage, 0))
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def snapshot(self):
+        mb = 1 / 2**20
+        with self._lock:
+            stages = {k: round(v, 4) for k, v in sorted(self.stages.items())}
+            calls = dict(sorted(self.calls.items()))
+        out = {
+            "wall_s": round(time.perf_counter() - self._t0, 4),
+            "stages_s": stages,
+            "calls": calls,
+            "peak_rss_mb": round((_peak_rss_bytes(os.getpid()) or 0) * mb, 1),
+            "rss_scope": self._rss_scope,
+        }
+        worker_peaks = [_peak_rss_bytes(pid) for pid in self.worker_pids]
+        worker_peaks = [b for b in worker_peaks if b]
+        if worker_peaks:
+            out["worker_peak_rss_mb"] = round(max(worker_peaks) * mb, 1)
+        if self.device == "cuda":
+            out["peak_device_mb"] = round(torch.cuda.max_memory_allocated() * mb, 1)
+            out["peak_device_reserved_mb"] = round(
+                torch.cuda.max_memory_reserved() * mb, 1,
+            )
+        return out
+
+
+def _timed(stage):
+    """Method decorator adding each call's duration to request metrics."""
+    def decorate(method):
+        @functools.wraps(method)
+        def timed(self, *args, **kwargs):
+            metrics = self._metrics
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                metrics.add(stage, time.perf_counter() - t0)
+        return timed
+    return decorate
+
+
+# ── Per-song state ──────────────────────────────────────────────────
+
+class _SongContext:
+    """State of one song's alignment, passed down its call chain.
+
+    predict() makes one per request and a batch archive one per song,
+    so a song's deadline cuts, degradations and cost rate never leak
+    into songs aligning beside it.  Request telemetry (_Metrics) stays
+    on the predictor: a batch reports one total.
+    """
+
+    def __init__(self, backend="torch", deadline_s=None):
+        # Network variant (_select_backend), fixed for the request.
+        self.backend = backend
+        self.t0 = time.perf_counter()
+        # Latency budget as an absolute perf_counter time, the
+        # degradation strategies chosen for it and the windows it cut.
+        self.deadline = self.t0 + deadline_s if deadline_s else None
+        self.degraded = set()
+        self.degraded_sections = []
+        # Seconds per _estimate_cost unit for the song's mode.
+        self.cost_rate = None
+
+
+# ── CPU worker pool ─────────────────────────────────────────────────
+
+def _pool_worker(predictor, tasks, results):
+    """Worker process loop: run batches from the task queue until None."""
+    torch.set_num_threads(1)
+    predictor._onnx_threads = 1
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, backend, jobs = task
+        # Stage timings for this batch travel back with its last result.
+        predictor._metrics = metrics = _Metrics()
+        for job in jobs:
+            job["mel"] = torch.from_numpy(job["mel"])
+        for k, (_, pred, error) in enumerate(predictor._run_batch(jobs, backend)):
+            if error is not None:
+                # Exceptions from torch/SOFA need not be picklable.
+                error = RuntimeError(f"{type(error).__name__}: {error}")
+            stages = (
+                (metrics.stages, metrics.calls) if k == len(jobs) - 1 else None
+            )
+            results.put((task_id, k, pred, error, stages))
+
+
+class _CPUPool:
+    """Forked CPU worker processes running inference batches.
+
+    Workers are forked from the set-up predictor, so each starts with
+    the model loaded; its weights are moved to shared memory first so
+    workers share one copy.  Batches go on a single task queue that
+    idle workers pull from, so a worker busy with a long window never
+    holds up the others.  A collector thread hands each result back to
+    the submitter's deliver callback.  If a worker dies, the pool shuts
+    down: pending windows fail with _PoolExited (run() re-runs them
+    in-process), later submits are refused and the predictor falls back
+    to in-process inference.
+    """
+
+    def __init__(self, predictor, size):
+        ctx = multiprocessing.get_context("fork")
+        predictor.model.share_memory()
+        self._predictor = predictor
+        self.size = size
+        self.alive = True
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._pending = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._workers = [
+            ctx.Process(
+                target=_pool_worker,
+                args=(predictor, self._tasks, self._results),
+                daemon=True,
+            )
+            for _ in range(size)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    @property
+    def pids(self):
+        return [worker.pid for worker in self._workers]
+
+    def submit(self, jobs, deliver, backend="torch"):
+        """Queue one batch; deliver(k, (job, prediction, error)) per job.
+
+        Returns False, delivering nothing, once the pool has shut down.
+        """
+        with self._lock:
+            if not self.alive:
+                return False
+            task_id = self._next_id
+            self._next_id += 1
+            self._pending[task_id] = (jobs, deliver, set())
+        # Workers get only their own mel window, as a plain array.
+        portable = []
+        for job in jobs:
+            f0, f1 = job["frames"]
+            portable.append({
+                **job,
+                "mel": job["mel"][:, f0:f1].cpu().numpy().copy(),
+                "frames": (0, f1 - f0),
+            })
+        self._tasks.put((task_id, backend, portable))
+        return True
+
+    def run(self, batches, backend="torch"):
+        """Submit batches, yielding (job, prediction, error) in job order.
+
+        Once the pool shuts down, the windows it dropped and every batch
+        after them run in-process instead.
+        """
+        done = queue.Queue()
+        ready = {}
+        submitted = 0
+        emitted = 0
+
+        def drain(block):
+            nonlocal emitted
+            while True:
+                try:
+                    seq, result = done.get(block=block)
+                except queue.Empty:
+                    return
+                job, _, error = result
+                if isinstance(error, _PoolExited):
+                    (result,) = self._predictor._run_batch([job], backend)
+                ready[seq] = result
+                while emitted in ready:
+                    yield ready.pop(emitted)
+                    emitted += 1
+                if block:
+                    return
+
+        for batch in batches:
+            base = submitted
+            submitted += len(batch)
+            if not self.submit(
+                batch,
+                lambda k, result, base=base: done.put((base + k, result)),
+                backend,
+            ):
+                for k, result in enumerate(self._predictor._run_batch(batch, backend)):
+                    done.put((base + k, result))
+            yield from drain(block=False)
+        while emitted < submitted:
+            yield from drain(block=True)
+
+    def _collect(self):
+        while True:
+            try:
+                task_id, k, pred, error, stages = self._results.get(
+                    timeout=_POOL_POLL_S,
+                )
+            except queue.Empty:
+                if all(worker.is_alive() for worker in self._workers):
+                    continue
+                self._fail_pending(_PoolExited("CPU worker process exited"))
+                return
+
+            with self._lock:
+                jobs, deliver, delivered = self._pending[task_id]
+                delivered.add(k)
+                if len(delivered) == len(jobs):
+                    del self._pending[task_id]
+            metrics = self._predictor._metrics
+            if stages is not None and metrics is not None:
+                metrics.merge(*stages)
+            deliver(k, (jobs[k], pred, error))
+
+    def _fail_pending(self, error):
+        print(f"  CPU pool disabled: {error}", file=sys.stderr)
+        with self._lock:
+            self.alive = False
+            pending, self._pending = self._pending, {}
+        # A worker killed inside tasks.get() may hold the queue's read
+        # lock, so the survivors are stopped too; batches left on the
+        # queue must not block interpreter exit.
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+        self._tasks.cancel_join_thread()
+        for jobs, deliver, delivered in pending.values():
+            for k, job in enumerate(jobs):
+                if k not in delivered:
+                    deliver(k, (job, None, error))
 
 
 # ── Predictor ───────────────────────────────────────────────────────
 
 class Predictor(BasePredictor):
     def setup(self):
-        """Load SOFA model, mel extractor, and dictionaries on cold start."""
+        """Load SOFA model, mel extractor, and dictionaries on cold start.
+
+        Per-phase timings are kept in self.cold_start and returned with
+        the first result this process serves.
+        """
         print("phoneme-align-sofa setup: starting", file=sys.stderr)
+        self.cold_start = {"imports": round(_IMPORT_SECONDS, 3)}
+        self._served = False
+        mark = time.perf_counter()
+
+        def phase(name):
+            nonlocal mark
+            now = time.perf_counter()
+            self.cold_start[name] = round(now - mark, 3)
+            mark = now
 
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"phoneme-align-sofa setup: device={self.device}", file=sys.stderr)
@@ -213,6 +924,8 @@ class Predictor(BasePredictor):
             self.model.set_inference_mode("force")
             self.model.eval()
             self.model.to(self.device)
+            # Bound network forward, for batched inference and export.
+            self._network_forward = self.model.forward
             self.melspec_config = self.model.melspec_config
             self.sample_rate = self.melspec_config["sample_rate"]
             self.vocab = self.model.vocab
@@ -224,6 +937,7 @@ class Predictor(BasePredictor):
         except Exception as e:
             print(f"phoneme-align-sofa setup: FAILED loading model: {e}", file=sys.stderr)
             raise
+        phase("checkpoint")
 
         # Initialize mel spectrogram extractor (same one SOFA uses internally).
         try:
@@ -232,8 +946,170 @@ class Predictor(BasePredictor):
         except Exception as e:
             print(f"phoneme-align-sofa setup: FAILED mel extractor: {e}", file=sys.stderr)
             raise
+        phase("mel_extractor")
+
+        # Load dictionaries.  The compiled, memory-mapped dictionary
+        # (pron_dict.py) already merges SOFA + CMU entries; the text
+        # dictionaries are only parsed when it is missing.
+        self.pron_dict = None
+        self.sofa_dict = {}
+        self.cmu_dict = {}
+        try:
+            self.pron_dict = PronDict()
+            print(
+                f"phoneme-align-sofa setup: compiled dictionary mapped "
+                f"({len(self.pron_dict)} entries)",
+                file=sys.stderr,
+            )
+        except Exception as e:
+            print(
+                f"phoneme-align-sofa setup: no compiled dictionary ({e}) — "
+                f"parsing text dictionaries",
+                file=sys.stderr,
+            )
 
-        # Load dictionaries.
+        if self.pron_dict is None:
+            self._load_text_dicts()
+
+        self._init_phoneme_ids()
+        phase("dictionaries")
+
+        # Result cache keyed by inputs + checkpoint identity.
+        ckpt = os.stat(SOFA_CKPT_PATH)
+        self.ckpt_id = f"{SOFA_CKPT_PATH}:{ckpt.st_size}:{int(ckpt.st_mtime)}"
+        try:
+            self.result_cache = DiskLRUCache(
+                os.path.join(CACHE_DIR, "results"),
+                _RESULT_CACHE_MAX_BYTES,
+                suffix=".json",
+            )
+        except OSError as e:
+            print(f"phoneme-align-sofa setup: result cache disabled: {e}", file=sys.stderr)
+            self.result_cache = None
+
+        # Decoded mono audio at self.sample_rate, memory-mapped on a hit.
+        try:
+            self.audio_cache = DiskLRUCache(
+                os.path.join(CACHE_DIR, "audio"),
+                _AUDIO_CACHE_MAX_BYTES,
+                suffix=".npy",
+            )
+        except OSError as e:
+            print(f"phoneme-align-sofa setup: audio cache disabled: {e}", file=sys.stderr)
+            self.audio_cache = None
+
+        # Resample kernels are built once per (source sr, target sr).
+        self._resamplers = {}
+        # Long inputs stream through FFmpeg when torchaudio finds it
+        # (_ffmpeg_usable), else through windowed torchaudio.load.
+        self._ffmpeg_ok = None
+
+        # Shared inference thread, only while a multi-song batch runs.
+        self._batcher = None
+
+        # Network variants besides torch fp32; the ONNX model is exported
+        # and checked below (_onnx_usable).
+        self._onnx_file = self._prepared_model_path(".onnx")
+        self._onnx_ok = None
+        self._onnx_session = None
+        self._onnx_threads = 0    # 0 = onnxruntime default (all cores)
+        self._int8_ok = None
+        self._int8 = None
+        self._int8_lock = threading.Lock()
+        self._pool = None
+        # Per-request telemetry (_Metrics) while a predict call runs.
+        self._metrics = None
+        self._report_metrics = False
+        # _s_per_cost maps each mode to its seconds per _estimate_cost
+        # unit (per-window overhead differs between modes); "full" is
+        # calibrated by the warm-up and stands in for unmeasured modes.
+        # Each song's deadline state lives in its _SongContext.
+        self._s_per_cost = {}
+        phase("caches")
+
+        # Before the pool fork, so workers inherit the compiled state.
+        try:
+            self._warm_up()
+        except Exception as e:
+            print(f"phoneme-align-sofa setup: warm-up failed: {e}", file=sys.stderr)
+        phase("warmup")
+
+        # The ONNX export and its check against torch run here, not on
+        # the first backend="onnx" request; before the pool fork, so
+        # workers find the export in place.
+        self._onnx_usable()
+        phase("onnx")
+
+        # CPU hosts spread inference batches over forked worker
+        # processes, forked last so workers inherit everything above.
+        # The int8 copy is otherwise quantized on the first int8
+        # request; with a pool it is built here, once, before the fork.
+        workers = self._cpu_workers()
+        if workers > 1 and self.device == "cpu":
+            self._int8_usable()
+            phase("int8")
+        if workers > 1:
+            try:
+                self._pool = _CPUPool(self, workers)
+                print(
+                    f"phoneme-align-sofa setup: {workers} CPU workers",
+                    file=sys.stderr,
+                )
+            except (OSError, ValueError, RuntimeError) as e:
+                print(
+                    f"phoneme-align-sofa setup: CPU pool disabled: {e}",
+                    file=sys.stderr,
+                )
+        phase("pool")
+
+        self.cold_start["setup_total"] = round(
+            sum(v for k, v in self.cold_start.items() if k != "imports"), 3,
+        )
+        print(
+            "phoneme-align-sofa setup: complete — "
+            + " ".join(f"{k}={v:.2f}s" for k, v in self.cold_start.items()),
+            file=sys.stderr,
+        )
+
+    def _warm_up(self):
+        """Align a few seconds of synthetic singing end to end.
+
+        Covers mel extraction, the batched forward, SOFA's numba DP
+        decode and interval post-processing, so their one-off compile
+        and allocation costs land in setup instead of the first request.
+        """
+        sr = self.sample_rate
+        t = torch.arange(int(_WARMUP_SECONDS * sr), dtype=torch.float64) / sr
+        # A sung vowel stand-in: vibrato tone with a few harmonics, plus
+        # a little breath noise so silence detection sees a floor.
+        f0 = 220.0 * (1.0 + 0.02 * torch.sin(2 * math.pi * 5.0 * t))
+        phase_rad = 2 * math.pi * torch.cumsum(f0, 0) / sr
+        wave = sum(0.3 / k * torch.sin(k * phase_rad) for k in range(1, 5))
+        generator = torch.Generator().manual_seed(0)
+        wave = wave.float() + 0.01 * torch.randn(len(t), generator=generator)
+
+        t0 = time.perf_counter()
+        self._align_full(self._waveform_audio(wave.unsqueeze(0)), _WARMUP_TRANSCRIPT)
+        warm_s = time.perf_counter() - t0
+
+        # A second, already-warm run calibrates the deadline cost model.
+        # Four seconds of audio are overhead-heavy, so the first rate
+        # errs slow; requests refine it (_calibrate).
+        t0 = time.perf_counter()
+        self._align_full(self._waveform_audio(wave.unsqueeze(0)), _WARMUP_TRANSCRIPT)
+        self._calibrate(
+            "full",
+            self._estimate_cost("full", _WARMUP_SECONDS, _WARMUP_TRANSCRIPT),
+            time.perf_counter() - t0,
+        )
+        print(
+            f"phoneme-align-sofa setup: warm-up alignment {warm_s:.2f}s "
+            f"(calibrated {self._s_per_cost['full'] * 1e6:.1f} µs per cost unit)",
+            file=sys.stderr,
+        )
+
+    def _load_text_dicts(self):
+        """Parse the SOFA and CMU text dictionaries into Python dicts."""
         try:
             self.sofa_dict = _load_sofa_dict()
             print(
@@ -256,11 +1132,11 @@ class Predictor(BasePredictor):
             print(f"phoneme-align-sofa setup: FAILED CMU dict: {e}", file=sys.stderr)
             self.cmu_dict = {}
 
-        print("phoneme-align-sofa setup: complete", file=sys.stderr)
-
     def predict(
         self,
-        audio_file: Path = Input(description="Audio file (.wav, .mp3, etc.)"),
+        audio_file: Path = Input(
+            description="Audio file (.wav, .mp3, etc.)", default=None,
+        ),
         transcript: str = Input(
             description=(
                 "Plain text lyrics/transcript to align. Optional when "
@@ -298,15 +1174,412 @@ class Predictor(BasePredictor):
             ),
             default=False,
         ),
-    ) -> str:
-        """Align transcript to audio, returning word + phoneme timestamps."""
-        # Load and resample audio to SOFA's expected sample rate.
-        waveform, sr = torchaudio.load(str(audio_file))
-        if sr != self.sample_rate:
-            waveform = torchaudio.functional.resample(waveform, sr, self.sample_rate)
-        if waveform.shape[0] > 1:
-            waveform = waveform.mean(dim=0, keepdim=True)
+        use_cache: bool = Input(
+            description=(
+                "Return a stored result when the same audio, transcript, "
+                "timestamps, mode and model were aligned before, and reuse "
+                "previously decoded audio."
+            ),
+            default=True,
+        ),
+        previous_result: str = Input(
+            description=(
+                "Optional JSON output of an earlier per-line alignment of "
+                "the same audio (its \"lines\" list holds each line's "
+                "window, timestamp span and word count, and \"failed\" "
+                "where alignment fell back to even spacing). Lines whose "
+                "text and span are unchanged in line_timestamps reuse its "
+                "words; edited lines, and lines that failed or were cut by "
+                "the deadline, are re-aligned, and only the audio around "
+                "them is decoded."
+            ),
+            default="",
+        ),
+        stream: bool = Input(
+            description=(
+                "Yield each chunk's or line's words as soon as it is "
+                "aligned, in time order, then a summary record with all "
+                "words. A weak section is marked provisional and followed "
+                "by a record with the same type and index once it is "
+                "re-aligned. Without it, a single result is yielded; either "
+                "way the output is a list of JSON records whose last one "
+                "is the full result."
+            ),
+            default=False,
+        ),
+        backend: str = Input(
+            description=(
+                "Network runtime: PyTorch, or ONNX Runtime on CPU (the "
+                "model is exported at setup, cached next to the "
+                "checkpoint and checked against torch to within one "
+                "frame; falls back to torch if export or check fails)."
+            ),
+            choices=list(BACKENDS),
+            default="torch",
+        ),
+        precision: str = Input(
+            description=(
+                "Network weights: fp32, or int8 dynamic quantization of "
+                "the Linear layers (CPU + torch backend only; convolutions "
+                "stay fp32; quantized on the first int8 request). Falls "
+                "back to fp32 where unsupported. int8 accuracy is "
+                "unvalidated: no comparison against fp32 on real songs "
+                "(scripts/sofa-precision-report.py) has been committed."
+            ),
+            choices=list(PRECISIONS),
+            default="fp32",
+        ),
+        batch_archive: Path = Input(
+            description=(
+                "Optional .zip or .tar(.gz) of audio files with a "
+                "manifest.json of songs: [{\"id\", \"audio\", "
+                "\"transcript\", \"line_timestamps\", "
+                "\"word_timestamps\"}]. Songs are aligned concurrently, "
+                "sharing inference batches; one {\"type\": \"song\", "
+                "\"id\", ...} result is yielded per song in manifest "
+                "order (failures carry \"error\" and do not affect other "
+                "songs), then a batch summary. Other inputs except "
+                "use_cache are ignored."
+            ),
+            default=None,
+        ),
+        deadline_s: float = Input(
+            description=(
+                "Optional latency budget in seconds for a single-song "
+                "request (0 = none). When the estimated alignment time "
+                "exceeds it, cheaper strategies are used, and windows "
+                "the budget cannot cover get evenly spread words marked "
+                "degraded; the result's degraded field lists both. "
+                "Ignored in batch mode."
+            ),
+            default=0.0,
+        ),
+        metrics: bool = Input(
+            description=(
+                "Add a metrics field to the result (summary record in "
+                "batch mode): per-stage seconds, peak RSS and peak GPU "
+                "memory. The same numbers are always logged as a "
+                "'sofa-metrics' JSON line."
+            ),
+            default=False,
+        ),
+    ) -> Iterator[str]:
+        """Align transcript to audio, yielding word + phoneme timestamps."""
+        pool = self._pool if self._pool is not None and self._pool.alive else None
+        self._metrics = _Metrics(self.device, pool.pids if pool else ())
+        self._report_metrics = metrics
+        ctx = _SongContext(deadline_s=(
+            deadline_s if deadline_s and deadline_s > 0 and batch_archive is None
+            else None
+        ))
+        try:
+            with self._metrics.stage("backend_select"):
+                ctx.backend = self._select_backend(backend, precision)
+            if batch_archive is not None:
+                yield from self._predict_batch(batch_archive, use_cache, ctx.backend)
+                return
+            if audio_file is None:
+                yield self._summary({
+                    "words": [],
+                    "error": "No audio_file or batch_archive provided",
+                }, stream)
+                return
+            yield from self._predict_song(
+                ctx, audio_file, transcript, word_timestamps, line_timestamps,
+                per_line_mode, use_cache, previous_result, stream,
+            )
+        finally:
+            self._log_metrics(ctx.backend)
+            self._metrics = None
+
+    def _predict_song(
+        self, ctx, audio_file, transcript, word_timestamps, line_timestamps,
+        per_line_mode, use_cache, previous_result="", stream=False,
+    ):
+        """Align one song (its _SongContext: ctx) through the result
+        cache, yielding JSON records."""
+        audio_hash = None
+        if use_cache or previous_result.strip():
+            with self._stage("hash"):
+                audio_hash = _file_sha256(str(audio_file))
+        cache = self.result_cache if use_cache else None
+        cache_key = None
+        if cache is not None:
+            cache_key = hashlib.sha256(json.dumps([
+                _RESULT_CACHE_VERSION,
+                self.ckpt_id,
+                audio_hash,
+                transcript,
+                word_timestamps,
+                line_timestamps,
+                per_line_mode,
+                previous_result,
+                ctx.backend,
+            ]).encode("utf-8")).hexdigest()
+            cached = cache.lookup(cache_key)
+            if cached is not None:
+                with open(cached, encoding="utf-8") as f:
+                    output = json.load(f)
+                print(f"Result cache hit: {cache_key[:12]}", file=sys.stderr)
+                yield self._summary(
+                    self._with_cache_stats(output, hit=True), stream,
+                )
+                return
 
+        args = (
+            audio_file, transcript, word_timestamps, line_timestamps,
+            per_line_mode, audio_hash, previous_result,
+        )
+        if stream:
+            output = yield from self._stream_uncached(ctx, *args)
+        else:
+            output = self._predict_uncached(ctx, *args)
+
+        result = json.loads(output)
+        result["backend"] = ctx.backend
+        output = json.dumps(result)
+        if cache is None:
+            yield self._summary(result, stream)
+            return
+
+        if "error" not in result and "degraded" not in result:
+            def write(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(output)
+
+            try:
+                cache.store(cache_key, write)
+            except OSError as e:
+                print(f"Result cache store failed: {e}", file=sys.stderr)
+        yield self._summary(self._with_cache_stats(result, hit=False), stream)
+
+    def _with_cache_stats(self, result, hit):
+        """Attach result-cache hit/miss counters to an output dict."""
+        result["cache"] = {"hit": hit, **self.result_cache.stats()}
+        return result
+
+    def _summary(self, result, stream):
+        """Serialise the final result, tagged as a summary when streaming.
+
+        The first result this process serves also carries the setup's
+        cold-start timings.
+        """
+        if not self._served:
+            self._served = True
+            result = {**result, "cold_start": self.cold_start}
+        if self._report_metrics and self._batcher is None:
+            result = {**result, "metrics": self._metrics_snapshot()}
+        if stream:
+            result = {"type": "summary", **result}
+        return json.dumps(result)
+
+    def _metrics_snapshot(self):
+        """Current request's telemetry, or {} outside a predict call."""
+        return self._metrics.snapshot() if self._metrics is not None else {}
+
+    def _log_metrics(self, backend):
+        """Emit the request's telemetry as one machine-parseable log line."""
+        if self._metrics is not None:
+            snapshot = {"backend": backend, **self._metrics.snapshot()}
+            print(f"sofa-metrics {json.dumps(snapshot)}", file=sys.stderr)
+
+    def _stage(self, name):
+        """Context manager timing a block as a metrics stage."""
+        if self._metrics is None:
+            return contextlib.nullcontext()
+        return self._metrics.stage(name)
+
+    def _stream_uncached(self, ctx, *args):
+        """Run _predict_uncached on a worker thread, yielding sections.
+
+        Generator: each chunk or line record is yielded as JSON as soon
+        as the alignment path releases it.  Returns the final output
+        string (via StopIteration) once alignment finishes.
+        """
+        records = queue.Queue()
+        outcome = {}
+
+        def run():
+            try:
+                outcome["output"] = self._predict_uncached(
+                    ctx, *args, on_section=records.put,
+                )
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                records.put(None)
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        while (record := records.get()) is not None:
+            yield json.dumps(record)
+        worker.join()
+
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["output"]
+
+    # ── Multi-song batch ───────────────────────────────────────────
+
+    def _predict_batch(self, archive, use_cache=True, backend="torch"):
+        """Align every song in a batch archive, yielding one record each.
+
+        Up to _BATCH_SONGS_IN_FLIGHT songs run at once on worker threads;
+        their inference jobs all go through one _SharedBatcher, so short
+        songs and lines from different songs fill the same batches.  A
+        song that fails yields an error record and the rest continue.
+        Each song aligns in its own _SongContext.
+        """
+        t0 = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="sofa-batch-") as workdir:
+            try:
+                songs = self._read_batch_archive(str(archive), workdir)
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile,
+                    tarfile.TarError) as e:
+                yield json.dumps({
+                    "type": "summary",
+                    "songs": 0,
+                    "failed": 0,
+                    "error": f"Invalid batch archive: {e}",
+                })
+                return
+
+            print(f"Batch alignment: {len(songs)} songs", file=sys.stderr)
+
+            def align(song):
+                if "error" in song:
+                    return {"words": [], "error": song["error"]}
+                records = list(self._predict_song(
+                    _SongContext(backend),
+                    song["audio_path"],
+                    song["transcript"],
+                    song["word_timestamps"],
+                    song["line_timestamps"],
+                    False,
+                    use_cache,
+                ))
+                return json.loads(records[-1])
+
+            failed = 0
+            self._batcher = _SharedBatcher(self, backend)
+            try:
+                with ThreadPoolExecutor(_BATCH_SONGS_IN_FLIGHT) as pool:
+                    futures = [pool.submit(align, song) for song in songs]
+                    for song, future in zip(songs, futures):
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            result = {
+                                "words": [],
+                                "error": f"{type(e).__name__}: {e}",
+                            }
+                        if "error" in result:
+                            failed += 1
+                            print(
+                                f"  Song {song['id']} failed: {result['error']}",
+                                file=sys.stderr,
+                            )
+                        yield json.dumps({
+                            "type": "song", "id": song["id"], **result,
+                        })
+            finally:
+                self._batcher.close()
+                self._batcher = None
+
+        elapsed = time.perf_counter() - t0
+        print(
+            f"Batch complete: {len(songs) - failed}/{len(songs)} songs "
+            f"in {elapsed:.1f}s",
+            file=sys.stderr,
+        )
+        summary = {
+            "type": "summary",
+            "songs": len(songs),
+            "failed": failed,
+            "seconds": round(elapsed, 2),
+        }
+        if self._report_metrics:
+            summary["metrics"] = self._metrics_snapshot()
+        yield json.dumps(summary)
+
+    @staticmethod
+    def _read_batch_archive(archive_path, workdir):
+        """Read manifest.json from a zip/tar and extract its audio files.
+
+        Only members named by the manifest are read, and each is written
+        under workdir with a generated name, so archive paths never reach
+        the filesystem.  Per-song problems (missing audio) are recorded
+        in the song's "error" instead of failing the batch.
+
+        Returns:
+            List of song dicts: id, audio_path, transcript,
+            line_timestamps and word_timestamps (JSON strings).
+        """
+        if zipfile.is_zipfile(archive_path):
+            archive = zipfile.ZipFile(archive_path)
+            names = set(archive.namelist())
+
+            def read(name):
+                return archive.read(name)
+        else:
+            archive = tarfile.open(archive_path)
+            names = {m.name for m in archive.getmembers() if m.isfile()}
+
+            def read(name):
+                return archive.extractfile(name).read()
+
+        with archive:
+            manifest_name = next(
+                (n for n in names if os.path.basename(n) == _BATCH_MANIFEST),
+                None,
+            )
+            if manifest_name is None:
+                raise ValueError(f"no {_BATCH_MANIFEST} in archive")
+            entries = json.loads(read(manifest_name))
+            if isinstance(entries, dict):
+                entries = entries.get("songs")
+            if not isinstance(entries, list):
+                raise ValueError(f"{_BATCH_MANIFEST} must be a list of songs")
+
+            base = os.path.dirname(manifest_name)
+            songs = []
+            for i, entry in enumerate(entries):
+                if not isinstance(entry, dict) or not entry.get("audio"):
+                    songs.append({"id": str(i), "error": "Manifest entry has no audio"})
+                    continue
+
+                song = {"id": str(entry.get("id", entry["audio"]))}
+                for key in ("transcript", "line_timestamps", "word_timestamps"):
+                    value = entry.get(key) or ""
+                    song[key] = value if isinstance(value, str) else json.dumps(value)
+
+                name = os.path.join(base, entry["audio"]) if base else entry["audio"]
+                if name not in names:
+                    song["error"] = f"Audio not found in archive: {entry['audio']}"
+                    songs.append(song)
+                    continue
+
+                path = os.path.join(
+                    workdir, f"{i:05d}{os.path.splitext(name)[1].lower()}",
+                )
+                with open(path, "wb") as f:
+                    f.write(read(name))
+                song["audio_path"] = path
+                songs.append(song)
+
+        return songs
+
+    def _predict_uncached(
+        self, ctx, audio_file, transcript, word_timestamps, line_timestamps,
+        per_line_mode, audio_hash=None, previous_result="", on_section=None,
+    ):
+        """Decode audio and dispatch to the alignment mode.
+
+        on_section, when given, is called with each chunk's or line's
+        record, in time order, as chunked and per-line alignment finish
+        them.  Single-pass and word-boundary alignment only return the
+        final result.
+        """
         line_times = self._parse_line_timestamps(line_timestamps)
         word_times = self._parse_word_timestamps(word_timestamps)
 
@@ -325,70 +1598,570 @@ class Predictor(BasePredictor):
         # per_line_mode=False only disables this when explicitly overridden.
         use_per_line = line_times and (per_line_mode or not word_times)
 
+        previous = self._parse_previous_result(previous_result, audio_hash)
+        if previous and not use_per_line:
+            print(
+                "previous_result ignored: incremental re-alignment needs "
+                "per-line mode",
+                file=sys.stderr,
+            )
+
+        audio = None
+        if previous and use_per_line:
+            audio = self._load_changed_lines(audio_file, line_times, previous)
+        if audio is None:
+            audio = self._load_audio(audio_file, audio_hash)
+
         if use_per_line:
-            print(f"Per-line SOFA alignment: {len(line_times)} lines", file=sys.stderr)
-            return self._align_by_lines(waveform, line_times)
+            mode = "lines"
         elif word_times:
-            print(f"Word-boundary alignment: {len(word_times)} words", file=sys.stderr)
-            return self._align_with_word_boundaries(waveform, word_times)
+            mode = "words"
         elif transcript.strip():
-            print(f"Full-file SOFA alignment: {len(transcript)} chars", file=sys.stderr)
-            return self._align_full(waveform, transcript, line_times)
+            mode = "full"
         else:
             return json.dumps({
                 "words": [],
                 "error": "No transcript or line_timestamps provided",
             })
 
+        duration_s = audio["samples"] / self.sample_rate
+        cost = self._estimate_cost(
+            mode, duration_s, transcript, line_times, word_times,
+        )
+        estimate_s = None
+        ctx.cost_rate = self._s_per_cost.get(mode, self._s_per_cost.get("full"))
+        if ctx.deadline is not None:
+            estimate_s = self._plan_degradation(
+                ctx, mode, duration_s, transcript, line_times, word_times, cost,
+            )
+
+        t0 = time.perf_counter()
+        if mode == "lines":
+            print(f"Per-line SOFA alignment: {len(line_times)} lines", file=sys.stderr)
+            output = self._align_by_lines(
+                audio, line_times, on_section, previous, audio_hash, ctx,
+            )
+        elif mode == "words" and "no_word_refinement" in ctx.degraded:
+            print(
+                f"Word-boundary alignment: {len(word_times)} words, "
+                f"phonemes spread evenly (deadline)",
+                file=sys.stderr,
+            )
+            output = json.dumps({"words": [
+                {**w, "degraded": True}
+                for wt in word_times
+                for w in self._distribute_words_evenly(
+                    [wt["word"]], wt["start"], wt["end"],
+                )
+            ]})
+        elif mode == "words":
+            print(f"Word-boundary alignment: {len(word_times)} words", file=sys.stderr)
+            output = self._align_with_word_boundaries(audio, word_times, ctx)
+        else:
+            print(f"Full-file SOFA alignment: {len(transcript)} chars", file=sys.stderr)
+            output = self._align_full(
+                audio, transcript, line_times, on_section, ctx,
+            )
+        elapsed_s = time.perf_counter() - t0
+
+        if ctx.degraded or ctx.degraded_sections:
+            result = json.loads(output)
+            result["degraded"] = {
+                "deadline_s": round(ctx.deadline - ctx.t0, 3),
+                "estimate_s": round(estimate_s, 3) if estimate_s else None,
+                "strategies": [d for d in _DEGRADE_ORDER if d in ctx.degraded],
+                "sections": ctx.degraded_sections,
+            }
+            return json.dumps(result)
+        if self._batcher is None:
+            self._calibrate(mode, cost, elapsed_s)
+        return output
+
+    # ── Audio decoding ──────────────────────────────────────────────
+    #
+    # Alignment paths take an audio dict: "samples" (length at
+    # self.sample_rate), "waveform" ((1, samples) tensor, None when
+    # streamed), and the song "mel", "silences" and "silence_threshold"
+    # — computed on first use (_audio_mel, _audio_silences), or up front
+    # by _stream_audio and _load_changed_lines.
+
+    def _load_audio(self, audio_file, audio_hash=None):
+        """Decode audio to an audio dict at self.sample_rate.
+
+        Inputs longer than _STREAM_DECODE_MIN_S are decoded in windows
+        (_stream_audio) and never held whole.  Otherwise, with an
+        audio_hash, the decoded waveform is cached as a float32 .npy
+        file; a hit memory-maps it copy-on-write and wraps it with
+        torch.from_numpy, so no decode, resample or copy happens.
+        """
+        cache = self.audio_cache if audio_hash else None
+        key = f"{audio_hash}-{self.sample_rate}"
+
+        if cache is not None:
+            with self._stage("decode"):
+                path = cache.lookup(key)
+                if path is not None:
+                    mono = np.load(path, mmap_mode="c")
+                    print(f"Audio cache hit: {audio_hash[:12]}", file=sys.stderr)
+                    return self._waveform_audio(torch.from_numpy(mono).unsqueeze(0))
+
+        audio = self._stream_audio(audio_file)
+        if audio is not None:
+            return audio
+
+        with self._stage("decode"):
+            waveform, sr = torchaudio.load(str(audio_file))
+        with self._stage("resample"):
+            # Downmix before resampling — both are linear, and resampling
+            # one channel instead of two halves the work.
+            if waveform.shape[0] > 1:
+                waveform = waveform.mean(dim=0, keepdim=True)
+            if sr != self.sample_rate:
+                waveform = self._resampler(sr)(waveform)
+
+        if cache is not None:
+            mono = waveform.squeeze(0).numpy().astype(np.float32, copy=False)
+
+            def write(path):
+                with open(path, "wb") as f:
+                    np.save(f, mono)
+
+            try:
+                cache.store(key, write)
+            except OSError as e:
+                print(f"Audio cache store failed: {e}", file=sys.stderr)
+
+        return self._waveform_audio(waveform)
+
+    @staticmethod
+    def _waveform_audio(waveform):
+        """Audio dict for a decoded (1, samples) waveform."""
+        return {
+            "samples": waveform.shape[1],
+            "waveform": waveform,
+            "mel": None,
+            "silences": None,
+            "silence_threshold": None,
+        }
+
+    def _audio_mel(self, audio):
+        """Song mel spectrogram of an audio dict, computed once."""
+        if audio["mel"] is None:
+            audio["mel"] = self._song_melspec(audio["waveform"].squeeze(0))
+        return audio["mel"]
+
+    def _audio_silences(self, audio):
+        """Silence map of an audio dict, computed once."""
+        if audio["silences"] is None:
+            audio["silences"], audio["silence_threshold"] = self._detect_silences(
+                audio["waveform"].squeeze(0),
+            )
+        return audio["silences"]
+
+    def _resampler(self, source_sr):
+        """Reusable Resample transform from source_sr to self.sample_rate."""
+        resampler = self._resamplers.get(source_sr)
+        if resampler is None:
+            resampler = torchaudio.transforms.Resample(source_sr, self.sample_rate)
+            self._resamplers[source_sr] = resampler
+        return resampler
+
+    # ── Incremental decode ──────────────────────────────────────────
+
+    def _load_changed_lines(self, audio_file, line_times, previous):
+        """Decode only the audio around lines previous cannot supply.
+
+        Each line without a match in previous gets its full-padding
+        window plus _INCREMENTAL_MARGIN_S decoded (_decode_span); the
+        mel frames and silence gaps of those spans equal the whole
+        song's, since the previous run's silence threshold is reused.
+        Elsewhere the mel is zero and no gaps are listed — reused lines
+        never look there.
+
+        Returns:
+            Audio dict without a waveform, or None when the whole song
+            should be loaded: no stored threshold, no frame count in the
+            header, or more than _INCREMENTAL_MAX_SHARE of it changed.
+        """
+        threshold = previous["silence_threshold"]
+        if threshold is None:
+            return None
+        try:
+            info = torchaudio.info(str(audio_file))
+        except Exception:
+            return None
+        if not info.num_frames:
+            return None
+
+        sr = self.sample_rate
+        source_sr = info.sample_rate
+        total = -(-info.num_frames * sr // source_sr)
+        duration_s = total / sr
+        changed = []
+        for i, line in enumerate(line_times):
+            text = line["text"].strip()
+            span = self._line_span(line_times, i, duration_s)
+            if text and self._line_key(text, span) not in previous["lines"]:
+                start_s, end_s = self._line_window(line_times, i, duration_s)
+                changed.append((start_s - _INCREMENTAL_MARGIN_S, end_s + _INCREMENTAL_MARGIN_S))
+        n_changed = len(changed)
+        if not changed:
+            # Nothing to align; one short span still sets up the mel.
+            changed.append((0.0, 0.0))
+
+        # Spans start on a multiple of the mel hop and of the reduced
+        # output rate, so their frames and resampled samples fall on the
+        # whole song's grid, and keep enough context for both.
+        hop = self.melspec_config["hop_length"]
+        context = hop * (-(-(self.melspec_config["n_fft"] // 2) // hop) + 1)
+        grid = math.lcm(hop, sr // math.gcd(source_sr, sr))
+        spans = []
+        for start_s, end_s in sorted(changed):
+            lo = max(int(start_s * sr) - context, 0) // grid * grid
+            hi = min(int(end_s * sr) + context, total)
+            if spans and lo <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], hi)
+            else:
+                spans.append([lo, hi])
+        decoded = sum(hi - lo for lo, hi in spans)
+        if decoded > _INCREMENTAL_MAX_SHARE * total:
+            return None
+
+        vad_hop = int(_VAD_HOP_S * sr)
+        n_frames = total // hop + 1
+        mel = None
+        gaps = []
+        for lo, hi in spans:
+            mono = self._decode_span(audio_file, source_sr, lo, hi)
+            span_mel = self._song_melspec(mono)
+            if mel is None:
+                # Same memory layout as the extractor's (see
+                # _stream_features), so windows normalise identically.
+                mel = (
+                    span_mel.new_zeros(span_mel.shape[0], n_frames)
+                    if span_mel.stride(-1) == 1
+                    else span_mel.new_zeros(n_frames, span_mel.shape[0]).T
+                )
+            # Frames whose STFT window lies inside the span, or runs past
+            # the song's own edge where both reflect-pad alike.
+            f0 = 0 if lo == 0 else -(-(lo + context) // hop)
+            f1 = n_frames if hi == total else (hi - context) // hop + 1
+            mel[:, f0:f1] = span_mel[:, f0 - lo // hop : f1 - lo // hop]
+
+            env_lo = -(-lo // vad_hop) * vad_hop
+            span_gaps = self._silences_from_envelope(
+                self._rms_envelope(mono[env_lo - lo:]), hi - env_lo, threshold,
+            )
+            for field in ("start", "end", "center"):
+                span_gaps[field] += env_lo / sr
+            gaps.append(span_gaps)
+
+        print(
+            f"Incremental decode: {decoded / sr:.1f}s of {duration_s:.1f}s "
+            f"around {n_changed} changed lines",
+            file=sys.stderr,
+        )
+        return {
+            "samples": total,
+            "waveform": None,
+            "mel": mel,
+            "silences": np.concatenate(gaps),
+            "silence_threshold": threshold,
+        }
+
+    def _decode_span(self, audio_file, source_sr, lo, hi):
+        """Mono samples lo..hi of audio_file at self.sample_rate.
+
+        lo is a multiple of the reduced output rate, so it falls on a
+        source sample; like _resample_windows, the span is resampled
+        with _RESAMPLE_CONTEXT source samples on both sides, trimmed
+        from the output, and matches resampling the whole song.
+        """
+        sr = self.sample_rate
+        g = math.gcd(source_sr, sr)
+        orig, new = source_sr // g, sr // g
+        context = 0 if source_sr == sr else orig * -(-_RESAMPLE_CONTEXT // orig)
+        src_lo = lo // new * orig
+        start = max(src_lo - context, 0)
+        end = -(-hi * orig // new) + context
+        with self._stage("decode"):
+            waveform, _ = torchaudio.load(
+                str(audio_file), frame_offset=start, num_frames=end - start,
+            )
+        with self._stage("resample"):
+            mono = waveform.mean(dim=0)
+            if source_sr != sr:
+                skip = (src_lo - start) * new // orig
+                mono = self._resampler(source_sr)(mono.unsqueeze(0))[0]
+                mono = mono[skip : skip + hi - lo]
+        return mono
+
+    # ── Streaming decode ────────────────────────────────────────────
+
+    def _stream_audio(self, audio_file):
+        """Decode a long input window by window into an audio dict.
+
+        Decoding, downmix, resampling, the song mel and the silence
+        envelope all run one _STREAM_WINDOW_S window at a time, so peak
+        memory is a few windows plus the mel, whatever the file length.
+
+        Returns:
+            Audio dict without a waveform, or None when the header says
+            the input is short enough to load whole.  Inputs of unknown
+            length are streamed.
+        """
+        try:
+            info = torchaudio.info(str(audio_file))
+        except Exception:
+            # Unreadable header — the whole-file load reports the error.
+            return None
+        if info.num_frames and info.num_frames <= _STREAM_DECODE_MIN_S * info.sample_rate:
+            return None
+
+        windows = self._resample_windows(
+            self._decode_windows(audio_file, info.sample_rate), info.sample_rate,
+        )
+        audio = self._stream_features(windows)
+        if audio["samples"] == 0:
+            raise ValueError("No audio decoded")
+        print(
+            f"Streamed decode: {audio['samples'] / self.sample_rate:.1f}s "
+            f"in {_STREAM_WINDOW_S:.0f}s windows "
+            f"({info.num_channels} ch, {info.sample_rate} Hz)",
+            file=sys.stderr,
+        )
+        return audio
+
+    def _ffmpeg_usable(self):
+        """True when torchaudio's FFmpeg StreamReader can be loaded."""
+        if self._ffmpeg_ok is None:
+            try:
+                torchaudio.utils.ffmpeg_utils.get_versions()
+                self._ffmpeg_ok = True
+            except (ImportError, RuntimeError, OSError) as e:
+                print(f"Streaming decode without FFmpeg: {e}", file=sys.stderr)
+                self._ffmpeg_ok = False
+        return self._ffmpeg_ok
+
+    def _decode_windows(self, audio_file, source_sr):
+        """Yield (channels, samples) float tensors at source_sr, in order."""
+        window = int(_STREAM_WINDOW_S * source_sr)
+
+        if self._ffmpeg_usable():
+            from torchaudio.io import StreamReader
+
+            reader = StreamReader(str(audio_file))
+            reader.add_basic_audio_stream(window)
+            chunks = reader.stream()
+            while True:
+                with self._stage("decode"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                # StreamReader chunks are (frames, channels).
+                yield chunk[0].T
+            return
+
+        # Without FFmpeg, torchaudio loads through soundfile, which seeks
+        # natively, so windowed loads stay linear in the file length.
+        offset = 0
+        while True:
+            with self._stage("decode"):
+                waveform, _ = torchaudio.load(
+                    str(audio_file), frame_offset=offset, num_frames=window,
+                )
+            if waveform.shape[1] == 0:
+                return
+            yield waveform
+            offset += waveform.shape[1]
+
+    def _resample_windows(self, windows, source_sr):
+        """Downmix and resample decoded windows to self.sample_rate.
+
+        Each step is resampled with at least _RESAMPLE_CONTEXT samples
+        of source context on both sides, which are trimmed from the
+        output, so the concatenated steps equal resampling the whole
+        song at once.  Steps start on multiples of the reduced source
+        rate, where output samples fall exactly on source samples.
+
+        Yields:
+            1-D float tensors at self.sample_rate.
+        """
+        sr = self.sample_rate
+        if source_sr == sr:
+            for window in windows:
+                with self._stage("resample"):
+                    mono = window.mean(dim=0)
+                yield mono
+            return
+
+        g = math.gcd(source_sr, sr)
+        orig, new = source_sr // g, sr // g
+        context = orig * -(-_RESAMPLE_CONTEXT // orig)
+        step = orig * max(1, round(_STREAM_WINDOW_S * source_sr / orig))
+        resampler = self._resampler(source_sr)
+
+        def resample(buf, buf_start, start, last=False):
+            """Output for source samples start..start + step (or the end)."""
+            lo = max(start - context, 0)
+            span = buf[lo - buf_start:] if last else (
+                buf[lo - buf_start : start + step + context - buf_start]
+            )
+            with self._stage("resample"):
+                out = resampler(span.unsqueeze(0))[0]
+            skip = (start - lo) * new // orig
+            return out[skip:] if last else out[skip : skip + step * new // orig]
+
+        buf = torch.zeros(0)
+        buf_start = 0       # source index of buf[0]
+        done = 0            # source samples resampled so far
+        for window in windows:
+            with self._stage("resample"):
+                buf = torch.cat([buf, window.float().mean(dim=0)])
+            while buf_start + buf.shape[0] >= done + step + context:
+                yield resample(buf, buf_start, done)
+                done += step
+                keep = max(done - context, 0)
+                buf, buf_start = buf[keep - buf_start:], keep
+        if buf_start + buf.shape[0] > done:
+            yield resample(buf, buf_start, done, last=True)
+
+    def _stream_features(self, windows):
+        """Song mel and silence map from consecutive mono windows.
+
+        Mel frames are centred on multiples of hop_length.  Each batch of
+        frames is computed from a span with at least n_fft // 2 samples
+        of context on both sides, so it matches _song_melspec of the
+        whole song, whose reflect padding at the song's edges is kept.
+        The RMS envelope is continued across windows the same way.
+
+        Returns:
+            Audio dict with "mel" and "silences" set and no waveform.
+        """
+        hop = self.melspec_config["hop_length"]
+        context = hop * (-(-(self.melspec_config["n_fft"] // 2) // hop) + 1)
+        vad_frame = int(_VAD_FRAME_S * self.sample_rate)
+        vad_hop = int(_VAD_HOP_S * self.sample_rate)
+
+        mels, energies = [], []
+        buf = torch.zeros(0)
+        buf_start = 0       # sample index of buf[0]
+        mel_next = 0        # next mel frame to compute
+        vad_next = 0        # next envelope frame to compute
+
+        def mel_frames(f1, end):
+            lo = max(mel_next * hop - context, 0)
+            mel = self._song_melspec(buf[lo - buf_start : end - buf_start])
+            first = (mel_next * hop - lo) // hop
+            mels.append(mel[:, first : first + f1 - mel_next])
+
+        for window in windows:
+            buf = torch.cat([buf, window])
+            end = buf_start + buf.shape[0]
+
+            # Frames whose whole STFT window has been decoded.
+            f1 = (end - context) // hop + 1
+            if f1 > mel_next:
+                mel_frames(f1, end)
+                mel_next = f1
+            if end - vad_next * vad_hop >= vad_frame:
+                envelope = self._rms_envelope(buf[vad_next * vad_hop - buf_start:])
+                energies.append(envelope)
+                vad_next += len(envelope)
+
+            keep = max(min(mel_next * hop - context, vad_next * vad_hop), 0)
+            buf, buf_start = buf[keep - buf_start:], keep
+
+        total = buf_start + buf.shape[0]
+        if total // hop + 1 > mel_next:
+            mel_frames(total // hop + 1, total)
+
+        # Keep the extractor's memory layout (time-major for torchaudio's
+        # MelSpectrogram): windows normalise with the same reduction
+        # order as views of a whole-song mel, so results match exactly.
+        if not mels:
+            mel = None
+        elif mels[0].stride(-1) == 1:
+            mel = torch.cat(mels, dim=-1)
+        else:
+            mel = torch.cat([m.T for m in mels]).T
+
+        energies = np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+        threshold = self._silence_threshold(energies)
+        return {
+            "samples": total,
+            "waveform": None,
+            "mel": mel,
+            "silences": self._silences_from_envelope(energies, total, threshold),
+            "silence_threshold": threshold,
+        }
+
     # ── Full-file SOFA alignment (preferred path) ───────────────────
 
-    def _align_full(self, waveform, transcript, line_times=None):
+    def _align_full(
+        self, audio, transcript, line_times=None, on_section=None, ctx=None,
+    ):
         """Full-file SOFA alignment — with automatic chunking for long audio.
 
-        For audio ≤ _CHUNK_THRESHOLD_S: single-pass alignment (original path).
-        For longer audio: VAD-based chunking → per-chunk alignment → stitch.
+        For audio that fits one memory-planned chunk: single-pass alignment
+        (original path).  For longer audio: VAD-based chunking → per-chunk
+        alignment → stitch.
         When line_times are available, word distribution uses known line
         positions instead of the voiced-duration heuristic.
         """
-        mono_cpu = waveform.squeeze(0)
-        wav_length = mono_cpu.shape[0] / self.sample_rate
+        if ctx is None:
+            ctx = _SongContext()
+        wav_length = audio["samples"] / self.sample_rate
 
         words = transcript.strip().split()
         if not words:
             return json.dumps({"words": [], "error": "Empty transcript"})
 
+        # Mel spectrogram of the whole song, computed once; every chunk
+        # takes a frame-index view of it.
+        song_mel = self._audio_mel(audio)
+
+        # Chunk length from available memory and this song's phoneme rate.
+        n_phonemes = sum(len(self._lookup_phonemes_sofa(w)) + 1 for w in words)
+        max_chunk_s = self._max_chunk_s(n_phonemes / max(wav_length, 1e-6))
+
         # Long audio → chunked path.
-        if wav_length > _CHUNK_THRESHOLD_S:
+        if wav_length > max_chunk_s:
             return self._align_full_chunked(
-                waveform, words, wav_length, line_times,
+                audio, words, wav_length, line_times, max_chunk_s, on_section,
+                ctx,
             )
 
         # ── Short audio: single-pass (original behaviour) ─────────
-        mono = mono_cpu.to(self.device)
-
-        ph_seq, word_seq, ph_idx_to_word_idx = self._build_phoneme_sequence(words)
+        ph_seq, word_seq, ph_idx_to_word_idx = self._vocab_sequence(words)
 
-        if len(ph_seq) < 2:
+        if not word_seq:
             return json.dumps({"words": [], "error": "No valid phonemes found"})
 
-        ph_seq, ph_idx_to_word_idx = self._filter_vocab(ph_seq, ph_idx_to_word_idx)
-
-        melspec = self._prepare_melspec(mono)
-
         print(
             f"Audio: {wav_length:.1f}s | {len(words)} words | "
             f"{len(ph_seq)} phoneme tokens (incl. SP)",
             file=sys.stderr,
         )
 
-        with torch.inference_mode():
-            (
-                ph_seq_pred, ph_intervals_pred,
-                word_seq_pred, word_intervals_pred,
-                confidence, _, _,
-            ) = self.model._infer_once(
-                melspec, wav_length, ph_seq, word_seq, ph_idx_to_word_idx,
-            )
+        # One whole-song job through the batch runner, so that during a
+        # multi-song batch short songs share forward passes too.
+        job = {
+            "index": 0,
+            **self._mel_window(song_mel, 0, audio["samples"]),
+            "length": wav_length,
+            "ph_seq": ph_seq,
+            "word_seq": word_seq,
+            "ph_idx_to_word_idx": ph_idx_to_word_idx,
+        }
+        ((_, pred, error),) = self._run_jobs([job], ctx)
+        if error is not None:
+            raise error
+        (
+            ph_seq_pred, ph_intervals_pred,
+            word_seq_pred, word_intervals_pred,
+            confidence, _, _,
+        ) = pred
 
         results = self._sofa_to_json(
             word_seq_pred, word_intervals_pred, ph_seq_pred, ph_intervals_pred
@@ -403,323 +2176,1409 @@ class Predictor(BasePredictor):
 
     # ── VAD-based chunked alignment ────────────────────────────────
 
-    def _align_full_chunked(self, waveform, words, wav_length, line_times=None):
-        """Chunked SOFA alignment for audio exceeding _CHUNK_THRESHOLD_S.
+    def _align_full_chunked(
+        self, audio, words, wav_length, line_times=None,
+        max_chunk_s=_MIN_CHUNK_S, on_section=None, ctx=None,
+    ):
+        """Chunked SOFA alignment for audio longer than one planned chunk.
 
         Pipeline:
           1. Detect silence regions via RMS energy envelope
           2. Build chunks:
              a. Line-aware (preferred): group consecutive LRCLIB lines
-                into ≤ _MAX_CHUNK_S spans, splitting only at line
+                into ≤ max_chunk_s spans, splitting only at line
                 boundaries.  Words come directly from line texts —
                 no fabricated word positions.
              b. Silence-based (fallback): split at silence centres,
                 distribute words proportionally by voiced duration.
-          3. Run SOFA independently on each chunk
+          3. Run the SOFA network over padded batches of chunks, then
+             DP-decode each chunk on its own slice of the output
           4. Offset timestamps to absolute time and stitch results
-        """
-        mono_cpu = waveform.squeeze(0)
 
-        silences = self._detect_silences(mono_cpu)
+        Each finished chunk is also passed to on_section, in chunk order,
+        as {"type": "chunk", "index", "start", "end", "words"}.
+        """
+        if ctx is None:
+            ctx = _SongContext()
+        song_mel = self._audio_mel(audio)
+        silences = self._audio_silences(audio)
 
+        max_cells = self._max_chunk_cells()
         if line_times:
             line_chunks = self._build_line_aware_chunks(
-                line_times, wav_length, silences,
+                line_times, wav_length, silences, max_chunk_s, max_cells,
             )
             chunks = [{"start": c["start"], "end": c["end"]} for c in line_chunks]
             word_groups = [c["words"] for c in line_chunks]
+            line_parts = [c["lines"] for c in line_chunks]
             dist_mode = "line-aware"
         else:
-            chunks = self._build_chunks(wav_length, silences)
+            n_phonemes = sum(len(self._lookup_phonemes_sofa(w)) + 1 for w in words)
+            chunks = self._build_chunks(
+                wav_length, silences, max_chunk_s, n_phonemes, max_cells,
+            )
             word_groups = self._distribute_words_to_chunks(words, chunks, silences)
+            line_parts = None
             dist_mode = "voiced-duration (no line timestamps)"
 
         total_words = sum(len(g) for g in word_groups)
         print(
             f"Chunked alignment: {wav_length:.1f}s → {len(chunks)} chunks "
+            f"(≤ {max_chunk_s:.0f}s) "
             f"({len(silences)} silence gaps detected), {total_words} words, "
             f"distribution={dist_mode}",
             file=sys.stderr,
         )
 
-        all_results = []
+        sections = _InOrder(on_section)
+
+        # One inference job per chunk.  Jobs are prepared on a background
+        # thread while earlier batches infer, and all chunks run through
+        # padded batches so the UNet forward is shared between them.
+        def prepare(spec):
+            job = prepare_chunk(*spec)
+            if job is None:
+                sections.put(spec[0], None)
+            return job
 
-        for i, (chunk, chunk_words) in enumerate(zip(chunks, word_groups)):
+        def prepare_chunk(i, spec):
+            chunk, chunk_words = spec
             if not chunk_words:
                 print(
                     f"  Chunk {i + 1}/{len(chunks)}: skipped (no words)",
                     file=sys.stderr,
                 )
+                return None
+
+            # Extract segment with padding so edge words aren't clipped.
+            padding_s = _CHUNK_PADDING_S * self._padding_scale(ctx)
+            seg_start = max(0.0, chunk["start"] - padding_s)
+            seg_end = min(wav_length, chunk["end"] + padding_s)
+            start_sample = int(seg_start * self.sample_rate)
+            end_sample = min(
+                int(seg_end * self.sample_rate), audio["samples"],
+            )
+
+            if end_sample <= start_sample + self.sample_rate // 10:
+                return None
+
+            ph_seq, word_seq, ph_idx_to_word_idx = (
+                self._vocab_sequence(chunk_words)
+            )
+            if not word_seq:
+                return None
+
+            return {
+                "index": i,
+                "start": chunk["start"],
+                "end": chunk["end"],
+                "words": chunk_words,
+                **self._mel_window(song_mel, start_sample, end_sample),
+                "ph_seq": ph_seq,
+                "word_seq": word_seq,
+                "ph_idx_to_word_idx": ph_idx_to_word_idx,
+            }
+
+        chunk_results = {}
+        weak = {}
+        first_pass_cost = 0.0
+
+        def convert(job, pred, error):
+            nonlocal first_pass_cost
+            i = job["index"]
+            if isinstance(error, _DeadlineExceeded):
+                chunk_results[i] = self._deadline_words("chunk", job, job["words"], ctx)
+                sections.put(i, self._section("chunk", job, chunk_results[i]))
+                return
+            first_pass_cost += self._job_cost(job)
+            if error is not None:
+                print(
+                    f"  Chunk {i + 1}/{len(chunks)} failed: {error}",
+                    file=sys.stderr,
+                )
+                chunk_results[i] = self._distribute_words_evenly(
+                    job["words"], job["start"], job["end"],
+                )
+                confidence = None
+            else:
+                chunk_results[i], confidence = self._pred_words(job, pred)
+                print(
+                    f"  Chunk {i + 1}/{len(chunks)}: {len(job['words'])} words, "
+                    f"{job['end'] - job['start']:.1f}s "
+                    f"(padded {job['length']:.1f}s), "
+                    f"confidence={confidence:.3f}",
+                    file=sys.stderr,
+                )
+
+            # Weak chunks stream as provisional until the second pass
+            # settles them.
+            weak_chunk = confidence is None or confidence < _REALIGN_CONFIDENCE
+            if weak_chunk:
+                weak[i] = {
+                    "job": job,
+                    "confidence": confidence,
+                    "parts": line_parts[i] if line_parts else None,
+                    "padding_s": _CHUNK_PADDING_S * self._padding_scale(ctx),
+                }
+            sections.put(i, self._section("chunk", job, chunk_results[i], weak_chunk))
+
+        timings = self._run_pipeline(
+            enumerate(zip(chunks, word_groups)), prepare, convert, ctx,
+        )
+
+        realigned = self._realign_weak(
+            weak, song_mel, silences, wav_length,
+            timings["wall"], first_pass_cost, ctx,
+        )
+        chunk_results.update((i, words) for i, (words, _) in realigned.items())
+        for i, section in sorted(weak.items()):
+            sections.settle(self._section("chunk", section["job"], chunk_results[i]))
+
+        all_results = []
+        for i in sorted(chunk_results):
+            all_results.extend(chunk_results[i])
+
+        print(
+            f"Chunked alignment complete: {len(all_results)} words total",
+            file=sys.stderr,
+        )
+
+        return json.dumps({"words": all_results})
+
+    # ── Confidence-driven re-alignment ────────────────────────────
+
+    @_timed("realign")
+    def _realign_weak(
+        self, weak, song_mel, silences, wav_length, first_pass_s, first_pass_cost,
+        ctx,
+    ):
+        """Second pass: re-align weak chunks or lines in smaller windows.
+
+        Each weak section (failed, or confidence below
+        _REALIGN_CONFIDENCE) is split at its "parts": line boundaries
+        or first-pass word gaps, or else (None) at internal silences
+        with words spread by voiced duration.  Sections are taken weakest first
+        while their sub-windows' estimated time — the first pass's
+        seconds per unit of _chunk_cost — fits the budget, and the
+        admitted sub-windows run as one batched job stream that stops
+        at the budget's deadline.
+
+        A section's first-pass words are replaced when all its
+        sub-windows aligned with a higher word-weighted confidence; a
+        section whose first pass failed takes whatever sub-windows
+        aligned, if any, with the rest spread evenly as before.
+
+        Args:
+            weak: {index: {"job", "confidence" (None on failure),
+                "parts" (None or [(start, end, words)]), "padding_s"
+                (sub-window padding)}}.
+            first_pass_s, first_pass_cost: wall seconds and summed
+                _job_cost of the first pass.
+
+        Returns:
+            {index: (word dicts, complete)} for the sections whose words
+            changed; complete is False when some sub-window's words were
+            spread evenly.
+        """
+        if not weak or "no_realign" in ctx.degraded:
+            return {}
+        budget_s = max(_REALIGN_MIN_BUDGET_S, _REALIGN_BUDGET_SHARE * first_pass_s)
+        if ctx.deadline is not None:
+            budget_s = min(budget_s, ctx.deadline - time.perf_counter())
+            if budget_s <= 0:
+                return {}
+        s_per_cost = first_pass_s / max(first_pass_cost, 1e-9)
+
+        plans = []
+        planned_s = 0.0
+        for i, section in sorted(
+            weak.items(),
+            key=lambda item: item[1]["confidence"] if item[1]["confidence"] is not None else -1.0,
+        ):
+            job = section["job"]
+            parts = section["parts"]
+            if parts is None:
+                parts = self._split_at_silences(job, silences)
+            if len(parts) < 2:
                 continue
+            jobs = [
+                sub for k, part in enumerate(parts)
+                if (sub := self._sub_job(
+                    song_mel, (i, k), *part, job, wav_length, section["padding_s"],
+                ))
+            ]
+            estimate_s = s_per_cost * sum(self._job_cost(sub) for sub in jobs)
+            if planned_s + estimate_s > budget_s:
+                continue
+            planned_s += estimate_s
+            plans.append((i, parts, jobs))
+
+        deadline = time.perf_counter() + budget_s
+
+        def admitted():
+            for _, _, jobs in plans:
+                for sub in jobs:
+                    if time.perf_counter() > deadline:
+                        return
+                    yield sub
+
+        aligned = {}
+        for sub, pred, error in self._run_jobs(admitted(), ctx):
+            if error is None:
+                aligned[sub["index"]] = self._pred_words(sub, pred)
+
+        replaced = {}
+        for i, parts, _ in plans:
+            words, weighted, complete, any_aligned = [], 0.0, True, False
+            for k, (start, end, part_words) in enumerate(parts):
+                if (i, k) in aligned:
+                    part_result, confidence = aligned[(i, k)]
+                    words.extend(part_result)
+                    weighted += confidence * len(part_words)
+                    any_aligned = True
+                else:
+                    complete = False
+                    words.extend(self._distribute_words_evenly(part_words, start, end))
+            confidence = weighted / max(sum(len(p[2]) for p in parts), 1)
+            before = weak[i]["confidence"]
+            if (before is None and any_aligned) or (complete and confidence > before):
+                replaced[i] = (words, complete)
+            print(
+                f"  Re-aligned section {i + 1} in {len(parts)} windows: "
+                f"confidence {'failed' if before is None else f'{before:.3f}'} → "
+                f"{confidence:.3f}{'' if complete else ' (partial)'}, "
+                f"{'kept' if i in replaced else 'discarded'}",
+                file=sys.stderr,
+            )
+
+        print(
+            f"  Second pass: {len(plans)}/{len(weak)} weak sections re-aligned, "
+            f"{len(replaced)} improved (budget {budget_s:.1f}s)",
+            file=sys.stderr,
+        )
+        return replaced
+
+    def _split_at_silences(self, job, silences):
+        """Split a section's window and words at its internal silences.
+
+        Returns:
+            [(start, end, words)] sub-windows with at least one word,
+            each ≥ _REALIGN_MIN_SPLIT_S; fewer than two when the section
+            cannot be split.
+        """
+        start, end = job["start"], job["end"]
+        centers = silences["center"]
+        bounds = [start]
+        for center in centers[(centers > start) & (centers < end)].tolist():
+            if (
+                center - bounds[-1] >= _REALIGN_MIN_SPLIT_S
+                and end - center >= _REALIGN_MIN_SPLIT_S
+            ):
+                bounds.append(center)
+        bounds.append(end)
+        if len(bounds) < 3:
+            return []
+        spans = [{"start": a, "end": b} for a, b in zip(bounds, bounds[1:])]
+        groups = self._distribute_words_to_chunks(job["words"], spans, silences)
+        return [
+            (span["start"], span["end"], group)
+            for span, group in zip(spans, groups) if group
+        ]
+
+    def _split_at_word_gaps(self, job, words, silences):
+        """Split a line's window at internal silences no aligned word spans.
+
+        Tokens go to the sub-window holding their first-pass word, so
+        no word position is guessed.  Returns [] (no split) unless the
+        first pass placed every token.
+        """
+        tokens = job["word_seq"]
+        if len(words) != len(tokens):
+            return []
+        start, end = job["start"], job["end"]
+        centers = silences["center"]
+        bounds = [start]
+        for center in centers[(centers > start) & (centers < end)].tolist():
+            if any(w["start"] < center < w["end"] for w in words):
+                continue
+            if (
+                center - bounds[-1] >= _REALIGN_MIN_SPLIT_S
+                and end - center >= _REALIGN_MIN_SPLIT_S
+            ):
+                bounds.append(center)
+        bounds.append(end)
+        if len(bounds) < 3:
+            return []
+        groups = [[] for _ in bounds[1:]]
+        for token, w in zip(tokens, words):
+            middle = (w["start"] + w["end"]) / 2
+            groups[int(np.searchsorted(bounds[1:-1], middle, side="right"))].append(token)
+        parts = [(a, b, group) for a, b, group in zip(bounds, bounds[1:], groups) if group]
+        return parts if len(parts) >= 2 else []
+
+    def _sub_job(
+        self, song_mel, index, start, end, words, parent, wav_length, padding_s,
+    ):
+        """Inference job for one sub-window of a weak section, or None."""
+        seg_start = max(0.0, start - padding_s, parent["offset"])
+        seg_end = min(wav_length, end + padding_s, parent["offset"] + parent["length"])
+        start_sample = int(seg_start * self.sample_rate)
+        end_sample = int(seg_end * self.sample_rate)
+        if end_sample <= start_sample + self.sample_rate // 10:
+            return None
+
+        ph_seq, word_seq, ph_idx_to_word_idx = self._vocab_sequence(words)
+        if not word_seq:
+            return None
+        return {
+            "index": index,
+            "start": start,
+            "end": end,
+            "words": words,
+            **self._mel_window(song_mel, start_sample, end_sample),
+            "ph_seq": ph_seq,
+            "word_seq": word_seq,
+            "ph_idx_to_word_idx": ph_idx_to_word_idx,
+        }
+
+    def _job_cost(self, job):
+        """_chunk_cost of an inference job's (already padded) window."""
+        return self._chunk_cost(job["length"], len(job["ph_seq"]), 0.0)[2]
+
+    def _pred_words(self, job, pred):
+        """Word dicts in absolute time, and confidence, for a prediction."""
+        (
+            ph_seq_pred, ph_intervals_pred,
+            word_seq_pred, word_intervals_pred,
+            confidence, _, _,
+        ) = pred
+
+        # Offset intervals to absolute time.
+        if len(ph_intervals_pred) > 0:
+            ph_intervals_pred = ph_intervals_pred + job["offset"]
+        if len(word_intervals_pred) > 0:
+            word_intervals_pred = word_intervals_pred + job["offset"]
+
+        words = self._sofa_to_json(
+            word_seq_pred, word_intervals_pred, ph_seq_pred, ph_intervals_pred,
+        )
+        return words, float(confidence)
+
+    # ── Pipelined execution ────────────────────────────────────────
+
+    @staticmethod
+    def _section(kind, job, words, provisional=False):
+        """Streamed record for one aligned chunk or line."""
+        record = {
+            "type": kind,
+            "index": job["index"],
+            "start": round(job["start"], 4),
+            "end": round(job["end"], 4),
+            "words": words,
+        }
+        if provisional:
+            record["provisional"] = True
+        return record
+
+    def _run_pipeline(self, specs, prepare, convert, ctx):
+        """Run prepare → infer → convert as an overlapping pipeline.
+
+        A background thread calls ``prepare(spec)`` for each spec
+        (phoneme lookup, vocab filtering, window slicing) while the
+        calling thread runs batched inference on jobs already prepared,
+        and a third thread hands finished results to
+        ``convert(job, prediction, error)``.  ``prepare`` may return None
+        to skip a spec.  Stages communicate through unbounded queues —
+        prepared jobs are small (mel windows are views) — so no stage can
+        deadlock another.
+
+        Returns:
+            Dict of per-stage busy seconds plus wall time.
+        """
+        prepared = queue.Queue()
+        finished = queue.Queue()
+        timings = {"prepare": 0.0, "infer": 0.0, "convert": 0.0, "wall": 0.0}
+        failures = []
+
+        def producer():
+            try:
+                for spec in specs:
+                    t0 = time.perf_counter()
+                    job = prepare(spec)
+                    timings["prepare"] += time.perf_counter() - t0
+                    if job is not None:
+                        prepared.put(job)
+            except BaseException as e:
+                failures.append(e)
+            finally:
+                prepared.put(None)
+
+        def consumer():
+            while True:
+                item = finished.get()
+                if item is None:
+                    return
+                t0 = time.perf_counter()
+                try:
+                    convert(*item)
+                except BaseException as e:
+                    failures.append(e)
+                timings["convert"] += time.perf_counter() - t0
+
+        waited = 0.0
+        # Estimated seconds of jobs handed to inference and not back yet.
+        backlog = {}
+
+        def prepared_jobs():
+            nonlocal waited
+            while True:
+                t0 = time.perf_counter()
+                job = prepared.get()
+                waited += time.perf_counter() - t0
+                if job is None:
+                    return
+                if ctx.deadline is not None:
+                    # Jobs that would finish past the deadline skip
+                    # inference; convert gets _DeadlineExceeded instead.
+                    estimate_s = (ctx.cost_rate or 0.0) * self._job_cost(job)
+                    finish = time.perf_counter() + sum(backlog.values()) + estimate_s
+                    if finish > ctx.deadline:
+                        finished.put((job, None, _DeadlineExceeded()))
+                        continue
+                    backlog[id(job)] = estimate_s
+                yield job
+
+        wall0 = time.perf_counter()
+        threads = [
+            threading.Thread(target=producer, daemon=True),
+            threading.Thread(target=consumer, daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            for item in self._run_jobs(prepared_jobs(), ctx):
+                backlog.pop(id(item[0]), None)
+                finished.put(item)
+        finally:
+            finished.put(None)
+            for t in threads:
+                t.join()
+
+        timings["wall"] = time.perf_counter() - wall0
+        timings["infer"] = max(0.0, timings["wall"] - waited)
+
+        if failures:
+            raise failures[0]
+
+        busy = timings["prepare"] + timings["infer"] + timings["convert"]
+        print(
+            f"  Pipeline: prepare={timings['prepare']:.2f}s "
+            f"infer={timings['infer']:.2f}s convert={timings['convert']:.2f}s "
+            f"wall={timings['wall']:.2f}s "
+            f"(overlap ×{busy / max(timings['wall'], 1e-9):.2f})",
+            file=sys.stderr,
+        )
+        if self._metrics is not None:
+            for name, seconds in timings.items():
+                self._metrics.add(f"pipeline_{name}", seconds)
+        return timings
+
+    # ── Batched inference ──────────────────────────────────────────
+
+    def _run_jobs(self, jobs, ctx=None):
+        """Run inference jobs in padded batches, yielding per-job results.
+
+        Each job is a dict carrying its mel window (see _mel_window),
+        ``length`` in seconds, and the SOFA phoneme sequence.  ``jobs``
+        may be any iterable — batches are formed lazily as jobs arrive.
+        Consecutive jobs are grouped under the device's batch budget,
+        the network runs once per batch, and SOFA's DP decode then runs
+        per job on its own slice of the network output.
+
+        During a multi-song batch the jobs go to the shared batcher
+        instead, which packs them with other songs' jobs.  On a CPU host
+        with a worker pool, batches run in the worker processes.
+
+        Yields:
+            (job, prediction, error) in job order.  ``prediction`` is the
+            _infer_once result tuple, or None when ``error`` is set.
+        """
+        if self._batcher is not None:
+            yield from self._batcher.run(jobs)
+            return
+
+        if ctx is None:
+            ctx = _SongContext()
+        batches = self._plan_batches(
+            jobs, self._batch_budget_s(ctx), self._padded_frames,
+        )
+        if self._pool is not None and self._pool.alive:
+            yield from self._pool.run(batches, ctx.backend)
+            return
+
+        for batch in batches:
+            yield from self._run_batch(batch, ctx.backend)
+
+    def _run_batch(self, batch, backend="torch"):
+        """Run one padded batch, yielding (job, prediction, error) each."""
+        melspecs = []
+        outputs = None
+        try:
+            melspecs = [
+                self._prepare_melspec(
+                    job["mel"][:, job["frames"][0] : job["frames"][1]],
+                )
+                for job in batch
+            ]
+            outputs = self._forward_batch(melspecs, backend)
+        except Exception as e:
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
+            if len(batch) == 1 or len(melspecs) < len(batch):
+                for job in batch:
+                    yield job, None, e
+                return
+            # Batch too large for the device — retry windows singly.
+            print(
+                f"  Batch of {len(batch)} failed: {e} — retrying singly",
+                file=sys.stderr,
+            )
+
+        for k, (job, melspec) in enumerate(zip(batch, melspecs)):
+            try:
+                job_outputs = (
+                    outputs[k] if outputs is not None
+                    else self._forward_batch([melspec], backend)[0]
+                )
+                yield job, self._infer_job(job, melspec, job_outputs), None
+            except Exception as e:
+                yield job, None, e
+
+        del melspecs, outputs
+
+    # ── Memory-budgeted planning ───────────────────────────────────
+
+    def _available_memory(self):
+        """Bytes currently available to alignment: (device, host).
+
+        On CUDA, blocks held by the caching allocator but not in use are
+        counted as available — they are reused without a cache release.
+        On CPU the two figures are the same pool.
+        """
+        host = None
+        try:
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        host = int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+        if host is None:
+            host = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+        if self.device == "cuda":
+            free, _ = torch.cuda.mem_get_info()
+            cached = torch.cuda.memory_reserved() - torch.cuda.memory_allocated()
+            return free + cached, host
+        return host, host
+
+    def _frames_per_s(self):
+        """Network frames per audio-second (after mel upsampling)."""
+        cfg = self.melspec_config
+        return self.sample_rate * cfg["scale_factor"] / cfg["hop_length"]
+
+    def _memory_shares(self):
+        """Batches that can be in flight at once (one per CPU worker)."""
+        if self._pool is not None and self._pool.alive:
+            return self._pool.size
+        return 1
+
+    def _cpu_workers(self):
+        """CPU worker process count from SOFA_CPU_WORKERS (0 on CUDA)."""
+        if self.device != "cpu":
+            return 0
+        if CPU_WORKERS.strip().lower() == "auto":
+            try:
+                cores = len(os.sched_getaffinity(0))
+            except AttributeError:
+                cores = os.cpu_count() or 1
+            return min(cores, _CPU_WORKERS_MAX)
+        try:
+            return max(0, int(CPU_WORKERS))
+        except ValueError:
+            return 0
+
+    def _batch_budget_s(self, ctx=None):
+        """Padded audio-seconds that fit in one batched forward pass."""
+        device_bytes, _ = self._available_memory()
+        device_bytes /= self._memory_shares()
+        budget = device_bytes * _MEMORY_HEADROOM / _FORWARD_BYTES_PER_S
+        if ctx is not None and "large_batches" in ctx.degraded:
+            budget *= _DEGRADED_BATCH_FACTOR
+        return max(_MIN_CHUNK_S + 2 * _CHUNK_PADDING_S, budget)
+
+    @_timed("planning")
+    def _max_chunk_s(self, phonemes_per_s):
+        """Longest chunk whose forward and DP decode fit available memory.
+
+        The forward limit is linear in window length.  The decode limit
+        is quadratic — frames and phonemes both grow with the window —
+        so it is solved for the song's mean phoneme rate scaled by
+        _DENSITY_PEAK_FACTOR to leave room for dense verses.  Chunk
+        padding is subtracted so the padded window is what fits.  With a
+        CPU worker pool, memory is split between the workers.
+        """
+        device_bytes, host_bytes = self._available_memory()
+        shares = self._memory_shares()
+        device_bytes /= shares
+        host_bytes /= shares
+
+        forward_s = device_bytes * _MEMORY_HEADROOM / _FORWARD_BYTES_PER_S
+        cell_rate = (
+            self._frames_per_s()
+            * max(phonemes_per_s, 1.0) * _DENSITY_PEAK_FACTOR
+        )
+        decode_s = np.sqrt(
+            host_bytes * _MEMORY_HEADROOM / (_DECODE_BYTES_PER_CELL * cell_rate)
+        )
+
+        max_s = min(forward_s, decode_s) - 2 * _CHUNK_PADDING_S
+        return float(np.clip(max_s, _MIN_CHUNK_S, _MAX_CHUNK_CAP_S))
+
+    def _max_chunk_cells(self):
+        """Most (frame, phoneme) DP cells one chunk may decode in memory."""
+        _, host_bytes = self._available_memory()
+        host_bytes /= self._memory_shares()
+        return host_bytes * _MEMORY_HEADROOM / _DECODE_BYTES_PER_CELL
+
+    def _chunk_cost(self, seconds, n_phonemes, padding_s=_CHUNK_PADDING_S):
+        """Estimated (frames, cells) and cost of aligning one padded chunk."""
+        frames = (seconds + 2 * padding_s) * self._frames_per_s()
+        cells = frames * n_phonemes
+        return frames, cells, frames + _DECODE_COST_PER_CELL * cells
+
+    @staticmethod
+    def _partition_by_cost(n_items, group_cost, fits):
+        """Split items 0..n_items-1 into contiguous groups of even cost.
+
+        group_cost(i, j) is the cost of items i..j-1 as one group and
+        fits(i, j) its hard limits (span, memory); both only grow as a
+        group is extended.  The group count is what filling each group
+        up to the limits gives — what a span-only greedy planner
+        produces — and within that count the largest group cost is
+        minimised: a greedy pass under a cost cap is optimal for
+        contiguous groups, so the cap is found by bisection.
+
+        Returns:
+            List of (i, j) index ranges, in order.
+        """
+        def greedy(cap):
+            groups, i = [], 0
+            while i < n_items:
+                j = i + 1
+                while (
+                    j < n_items and fits(i, j + 1) and group_cost(i, j + 1) <= cap
+                ):
+                    j += 1
+                groups.append((i, j))
+                i = j
+            return groups
+
+        if n_items == 0:
+            return []
+        best = greedy(float("inf"))
+        target = len(best)
+        lo = max(group_cost(i, i + 1) for i in range(n_items))
+        hi = max(group_cost(i, j) for i, j in best)
+        while hi - lo > 1e-3 * hi:
+            cap = (lo + hi) / 2
+            groups = greedy(cap)
+            if len(groups) <= target:
+                best, hi = groups, cap
+            else:
+                lo = cap
+        return best
+
+    # ── Latency budget ─────────────────────────────────────────────
+
+    def _estimate_cost(
+        self, mode, duration_s, transcript, line_times=None, word_times=None,
+        padding_scale=1.0,
+    ):
+        """Up-front cost of aligning a song in one mode (_chunk_cost units).
+
+        Mirrors what the mode will run: one window per line (capped at
+        its expected duration), per word, or per planned chunk, plus a
+        whole-song term for mel and silence detection.
+        """
+        def phonemes(words):
+            return sum(len(self._lookup_phonemes_sofa(w)) + 1 for w in words)
+
+        cost = duration_s * self._frames_per_s() * _SONG_COST_PER_FRAME
+        if mode == "lines":
+            padding_s = _LINE_PADDING_S * padding_scale
+            for i, line in enumerate(line_times):
+                n = phonemes(line["text"].split())
+                start, end = self._line_window(line_times, i, duration_s, padding_s)
+                seconds = min(
+                    end - start,
+                    max(_LINE_MIN_WINDOW_S, n * _LINE_S_PER_PHONEME) + 2 * padding_s,
+                )
+                cost += self._chunk_cost(seconds, n, 0.0)[2]
+        elif mode == "words":
+            for wt in word_times:
+                cost += self._chunk_cost(
+                    max(0.0, wt["end"] - wt["start"]), phonemes([wt["word"]]) + 1, 0.0,
+                )[2]
+        else:
+            n = phonemes(transcript.split())
+            max_s = self._max_chunk_s(n / max(duration_s, 1e-6))
+            if duration_s <= max_s:
+                cost += self._chunk_cost(duration_s, n, 0.0)[2]
+            else:
+                chunks = math.ceil(duration_s / max_s)
+                cost += chunks * self._chunk_cost(
+                    duration_s / chunks, n / chunks,
+                    _CHUNK_PADDING_S * padding_scale,
+                )[2]
+        return cost
+
+    def _plan_degradation(
+        self, ctx, mode, duration_s, transcript, line_times, word_times, cost,
+    ):
+        """Pick cheaper strategies until the estimate fits the deadline.
+
+        Strategies are added to ctx.degraded in _DEGRADE_ORDER (those
+        that cannot help this mode are skipped) until the estimated time
+        fits what is left of the budget.  Windows that still do not fit
+        are cut by _run_pipeline as the deadline approaches.
+
+        Returns:
+            The final estimate in seconds, or None when uncalibrated.
+        """
+        rate = ctx.cost_rate
+        if rate is None:
+            return None
+        remaining_s = ctx.deadline - time.perf_counter()
+        base_s = rate * cost
+        estimate_s = base_s * (1 + _REALIGN_BUDGET_SHARE)
+        initial_s = estimate_s
+
+        for strategy in _DEGRADE_ORDER:
+            if estimate_s <= remaining_s:
+                break
+            if strategy == "no_realign" and mode != "words":
+                estimate_s = base_s
+            elif strategy == "tight_padding" and mode != "words":
+                base_s = rate * self._estimate_cost(
+                    mode, duration_s, transcript, line_times, word_times,
+                    padding_scale=0.5,
+                )
+                estimate_s = base_s
+            elif strategy == "large_batches":
+                estimate_s *= _LARGE_BATCH_SPEEDUP
+            elif strategy == "no_word_refinement" and mode == "words":
+                estimate_s = rate * self._estimate_cost(
+                    "words", duration_s, transcript, word_times=[],
+                )
+            else:
+                continue
+            ctx.degraded.add(strategy)
+
+        print(
+            f"Deadline: {remaining_s:.2f}s left, estimate {initial_s:.2f}s"
+            + (
+                f" → {estimate_s:.2f}s with "
+                + ", ".join(d for d in _DEGRADE_ORDER if d in ctx.degraded)
+                if ctx.degraded else ""
+            ),
+            file=sys.stderr,
+        )
+        return estimate_s
+
+    def _calibrate(self, mode, cost, seconds):
+        """Fold one measured alignment into the mode's seconds-per-cost rate."""
+        rate = seconds / max(cost, 1e-9)
+        previous = self._s_per_cost.get(mode)
+        if previous is not None:
+            rate = previous + _COST_RATE_EMA * (rate - previous)
+        self._s_per_cost[mode] = rate
+
+    @staticmethod
+    def _padding_scale(ctx):
+        """Window padding multiplier for a song."""
+        return 0.5 if "tight_padding" in ctx.degraded else 1.0
+
+    def _deadline_words(self, kind, job, words, ctx):
+        """Evenly spread words for a window the deadline cut, marked degraded."""
+        ctx.degraded_sections.append({
+            "type": kind,
+            "index": job["index"],
+            "start": round(job["start"], 4),
+            "end": round(job["end"], 4),
+        })
+        return [
+            {**w, "degraded": True}
+            for w in self._distribute_words_evenly(words, job["start"], job["end"])
+        ]
+
+    @staticmethod
+    def _plan_batches(jobs, budget_s, key=None):
+        """Group consecutive jobs so B × longest window stays ≤ budget_s.
+
+        Generator: each batch is yielded as soon as the next job would
+        overflow it — or, with a key function, has a different key — so
+        inference can start before all jobs exist.  A single job longer
+        than the budget still gets its own batch — the chunk planner
+        already bounds individual window length.
+        """
+        current = []
+        longest = 0.0
+        current_key = None
+
+        for job in jobs:
+            longest_with = max(longest, job["length"])
+            job_key = key(job) if key is not None else None
+            if current and (
+                longest_with * (len(current) + 1) > budget_s
+                or job_key != current_key
+            ):
+                yield current
+                current = []
+                longest_with = job["length"]
+            current.append(job)
+            longest = longest_with
+            current_key = job_key
+
+        if current:
+            yield current
+
+    @_timed("forward")
+    def _forward_batch(self, melspecs, backend="torch"):
+        """Run the SOFA network once over a padded batch of windows.
+
+        Args:
+            melspecs: list of (1, n_mels, T_i) tensors from _prepare_melspec.
+            backend: network variant from _select_backend.
+
+        Returns:
+            List of per-window network outputs, each cropped back to its
+            own T_i so the decode never sees padding frames.
+        """
+        lengths = [m.shape[-1] for m in melspecs]
+        # Planned batches share one padded length (_padded_frames), so
+        # every window is padded exactly as it would be on its own.
+        t_max = max(self._pad_length(t) for t in lengths)
+        # Pad with each window's own minimum (its silence level) rather
+        # than zero, which is mid-loudness after normalisation.
+        padded = torch.cat([
+            torch.nn.functional.pad(
+                m, (0, t_max - m.shape[-1]), value=float(m.min()),
+            )
+            for m in melspecs
+        ])
+
+        if backend == "onnx":
+            outputs = self._onnx_forward(padded.transpose(1, 2))
+        elif backend == "torch-int8":
+            with torch.inference_mode():
+                outputs = self._int8_network()(padded.transpose(1, 2))
+        else:
+            with torch.inference_mode():
+                outputs = self._network_forward(padded.transpose(1, 2))
+
+        return [
+            tuple(o[b : b + 1, :t] for o in outputs)
+            for b, t in enumerate(lengths)
+        ]
+
+    @staticmethod
+    def _pad_length(frames):
+        """Padded network length of a window of ``frames`` frames."""
+        step = max(_PAD_MIN_STEP_FRAMES, 2 ** int(math.log2(max(frames, 16) / 16)))
+        return -(-frames // step) * step
+
+    def _padded_frames(self, job):
+        """Padded network length of a job's window (its batching key)."""
+        f0, f1 = job["frames"]
+        return self._pad_length((f1 - f0) * self.melspec_config["scale_factor"])
+
+    @_timed("dp_decode")
+    def _infer_job(self, job, melspec, outputs=None):
+        """Run SOFA's _infer_once for one job, reusing batched outputs.
+
+        _infer_once calls ``self.forward`` before its DP decode.  The
+        batched outputs are handed in through a _ReplayForward view of
+        the model, so the decode and interval post-processing stay
+        SOFA's own code path and the shared model is never modified.
+        """
+        model = self.model if outputs is None else _ReplayForward(self.model, outputs)
+        with torch.inference_mode():
+            return type(self.model)._infer_once(
+                model, melspec, job["length"],
+                job["ph_seq"], job["word_seq"], job["ph_idx_to_word_idx"],
+            )
+
+    # ── Network variants (ONNX Runtime, int8) ──────────────────────
+
+    def _select_backend(self, backend, precision):
+        """Network variant for a request: "torch", "torch-int8" or "onnx"."""
+        if backend == "onnx" and self._onnx_usable():
+            if precision == "int8":
+                print("precision=int8 ignored with the ONNX backend", file=sys.stderr)
+            return "onnx"
+        if precision == "int8" and self._int8_usable():
+            return "torch-int8"
+        return "torch"
+
+    @staticmethod
+    def _prepared_model_path(suffix):
+        """Where a derived model lives: next to the checkpoint if that
+        directory is writable (or already holds it), else the cache.
+        """
+        path = os.path.splitext(SOFA_CKPT_PATH)[0] + suffix
+        if os.path.exists(path) or os.access(os.path.dirname(path), os.W_OK):
+            return path
+        return os.path.join(CACHE_DIR, "models", os.path.basename(path))
+
+    def _int8_usable(self):
+        """Prepare the int8 network once, on first use; True when usable.
+
+        Requests arriving while it is quantized wait for that one build.
+        """
+        with self._int8_lock:
+            if self._int8_ok is None:
+                self._int8_ok = self._prepare_int8()
+            return self._int8_ok
+
+    def _prepare_int8(self):
+        """Check int8 support and quantize the network; True on success."""
+        if self.device != "cpu":
+            print("int8 precision unavailable: quantized kernels are CPU-only", file=sys.stderr)
+            return False
+        if torch.backends.quantized.engine == "none":
+            print("int8 precision unavailable: no quantized engine", file=sys.stderr)
+            return False
+
+        try:
+            self._int8_network()
+        except Exception as e:
+            print(f"int8 precision disabled: {e}", file=sys.stderr)
+            return False
+        return True
+
+    def _int8_network(self):
+        """Dynamically quantized copy of the network, built once.
+
+        quantize_dynamic covers Linear (and recurrent) layers only, so
+        SOFA's convolutions stay fp32.  The copy is quantized from the
+        loaded checkpoint, never read back from a derived file: on the
+        first int8 request, or in setup() before a CPU pool forks so
+        workers inherit it.
+        """
+        if self._int8 is not None:
+            return self._int8
 
-            # Extract segment with padding so edge words aren't clipped.
-            seg_start = max(0.0, chunk["start"] - _CHUNK_PADDING_S)
-            seg_end = min(wav_length, chunk["end"] + _CHUNK_PADDING_S)
-            start_sample = int(seg_start * self.sample_rate)
-            end_sample = min(
-                int(seg_end * self.sample_rate), mono_cpu.shape[0],
-            )
+        t0 = time.perf_counter()
+        model = torch.ao.quantization.quantize_dynamic(
+            copy.deepcopy(self.model).cpu(), {torch.nn.Linear}, dtype=torch.qint8,
+        )
+        model.eval()
+        self._int8 = model
+        print(
+            f"int8 network quantized ({time.perf_counter() - t0:.1f}s)",
+            file=sys.stderr,
+        )
+        return model
 
-            if end_sample <= start_sample + self.sample_rate // 10:
-                continue
+    def _onnx_usable(self):
+        """Export and self-check the ONNX model once; True when usable."""
+        if self._onnx_ok is not None:
+            return self._onnx_ok
 
-            segment = mono_cpu[start_sample:end_sample].to(self.device)
-            seg_length = segment.shape[0] / self.sample_rate
+        self._onnx_ok = False
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            print("ONNX backend unavailable: onnxruntime not installed", file=sys.stderr)
+            return False
 
-            ph_seq, word_seq, ph_idx_to_word_idx = (
-                self._build_phoneme_sequence(chunk_words)
-            )
-            if len(ph_seq) < 2:
-                continue
-            ph_seq, ph_idx_to_word_idx = self._filter_vocab(
-                ph_seq, ph_idx_to_word_idx,
+        try:
+            self._export_onnx()
+            self._check_onnx()
+        except Exception as e:
+            print(f"ONNX backend disabled: {e}", file=sys.stderr)
+            self._onnx_session = None
+            return False
+
+        self._onnx_ok = True
+        return True
+
+    def _export_onnx(self):
+        """Export the network forward to self._onnx_file unless current."""
+        path = self._onnx_file
+        if (
+            os.path.exists(path)
+            and os.path.getmtime(path) >= os.path.getmtime(SOFA_CKPT_PATH)
+        ):
+            return
+
+        network_forward = self._network_forward
+
+        class Network(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, melspec):
+                return network_forward(melspec)
+
+        n_mels = self.melspec_config["n_mels"]
+        dummy = torch.randn(1, _ONNX_EXPORT_FRAMES, n_mels, device=self.device)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        t0 = time.perf_counter()
+        try:
+            torch.onnx.export(
+                Network(self.model),
+                (dummy,),
+                tmp,
+                input_names=["melspec"],
+                output_names=["ph_frame_logits", "ph_edge_logits", "ctc_logits"],
+                dynamic_axes={
+                    "melspec": {0: "batch", 1: "frames"},
+                    "ph_frame_logits": {0: "batch", 1: "frames"},
+                    "ph_edge_logits": {0: "batch", 1: "frames"},
+                    "ctc_logits": {0: "batch", 1: "frames"},
+                },
+                opset_version=_ONNX_OPSET,
             )
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        print(
+            f"ONNX export: {path} ({time.perf_counter() - t0:.1f}s)",
+            file=sys.stderr,
+        )
 
-            try:
-                melspec = self._prepare_melspec(segment)
-
-                with torch.inference_mode():
-                    (
-                        ph_seq_pred, ph_intervals_pred,
-                        word_seq_pred, word_intervals_pred,
-                        confidence, _, _,
-                    ) = self.model._infer_once(
-                        melspec, seg_length,
-                        ph_seq, word_seq, ph_idx_to_word_idx,
-                    )
-
-                # Free GPU memory before next chunk.
-                del segment, melspec
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
-
-                # Offset intervals to absolute time.
-                if len(ph_intervals_pred) > 0:
-                    ph_intervals_pred = ph_intervals_pred + seg_start
-                if len(word_intervals_pred) > 0:
-                    word_intervals_pred = word_intervals_pred + seg_start
-
-                chunk_results = self._sofa_to_json(
-                    word_seq_pred, word_intervals_pred,
-                    ph_seq_pred, ph_intervals_pred,
-                )
-                all_results.extend(chunk_results)
+    def _onnx_forward(self, x):
+        """Network forward through onnxruntime; returns torch tensors."""
+        session = self._onnx_session
+        if session is None or session[0] != os.getpid():
+            import onnxruntime as ort
 
-                print(
-                    f"  Chunk {i + 1}/{len(chunks)}: {len(chunk_words)} words, "
-                    f"{chunk['end'] - chunk['start']:.1f}s "
-                    f"(padded {seg_length:.1f}s), "
-                    f"confidence={confidence:.3f}",
-                    file=sys.stderr,
-                )
+            options = ort.SessionOptions()
+            options.graph_optimization_level = (
+                ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            )
+            options.intra_op_num_threads = self._onnx_threads
+            session = (os.getpid(), ort.InferenceSession(
+                self._onnx_file, options, providers=["CPUExecutionProvider"],
+            ))
+            self._onnx_session = session
+
+        outputs = session[1].run(
+            None, {"melspec": x.float().cpu().numpy()},
+        )
+        return tuple(torch.from_numpy(o) for o in outputs)
 
-            except Exception as e:
-                # Ensure GPU memory is freed even on failure.
-                segment = None
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
+    def _check_onnx(self):
+        """Decode the same windows with both backends; raise on mismatch.
 
-                print(
-                    f"  Chunk {i + 1}/{len(chunks)} failed: {e} — "
-                    f"falling back to even distribution",
-                    file=sys.stderr,
-                )
-                chunk_dur = chunk["end"] - chunk["start"]
-                n = len(chunk_words)
-                for j, w in enumerate(chunk_words):
-                    ws = chunk["start"] + (j / n) * chunk_dur
-                    we = chunk["start"] + ((j + 1) / n) * chunk_dur
-                    phonemes = self._lookup_phonemes_sofa(w)
-                    all_results.append({
-                        "word": w,
-                        "start": round(ws, 4),
-                        "end": round(we, 4),
-                        "phonemes": self._distribute_evenly(
-                            phonemes, ws, we,
-                        ),
-                    })
+        Two synthetic windows of lengths the export never saw run as one
+        padded batch through each backend, then through SOFA's decode.
+        Every word and phoneme boundary must agree within one frame.
+        """
+        ph_seq, word_seq, ph_idx_to_word_idx = (
+            self._vocab_sequence(_ONNX_CHECK_WORDS)
+        )
+        if not word_seq:
+            raise ValueError("no check phonemes in the model vocabulary")
+
+        hop = self.melspec_config["hop_length"]
+        generator = torch.Generator().manual_seed(0)
+        jobs = []
+        for seconds in _ONNX_CHECK_SECONDS:
+            frames = int(seconds * self.sample_rate / hop)
+            mel = torch.randn(
+                self.melspec_config["n_mels"], frames, generator=generator,
+            ).to(self.device)
+            jobs.append({
+                "mel": mel,
+                "frames": (0, frames),
+                "length": frames * hop / self.sample_rate,
+                "ph_seq": ph_seq,
+                "word_seq": word_seq,
+                "ph_idx_to_word_idx": ph_idx_to_word_idx,
+            })
+        melspecs = [self._prepare_melspec(job["mel"]) for job in jobs]
+
+        decoded = {}
+        for backend in BACKENDS:
+            outputs = self._forward_batch(melspecs, backend)
+            decoded[backend] = [
+                self._infer_job(job, melspec, out)
+                for job, melspec, out in zip(jobs, melspecs, outputs)
+            ]
 
+        frame_s = 1.0 / self._frames_per_s()
+        worst = 0.0
+        for ref, got in zip(decoded["torch"], decoded["onnx"]):
+            for i in (1, 3):  # phoneme and word intervals
+                if np.shape(ref[i]) != np.shape(got[i]):
+                    raise ValueError("ONNX decode differs in segment count")
+                if len(ref[i]):
+                    worst = max(worst, float(np.max(np.abs(ref[i] - got[i]))))
+        if worst > frame_s + 1e-6:
+            raise ValueError(
+                f"ONNX boundaries differ by {worst * 1000:.1f} ms "
+                f"(> 1 frame, {frame_s * 1000:.1f} ms)"
+            )
         print(
-            f"Chunked alignment complete: {len(all_results)} words total",
+            f"ONNX check passed: max boundary difference {worst * 1000:.2f} ms",
             file=sys.stderr,
         )
 
-        return json.dumps({"words": all_results})
-
     # ── Silence detection ──────────────────────────────────────────
 
     def _detect_silences(self, waveform_1d):
         """Detect silence regions via RMS energy envelope.
 
-        Uses vectorised frame extraction (torch.unfold) for speed.
-        Returns a list of dicts with start/end/center/duration for each
-        silence gap ≥ _MIN_SILENCE_S.
+        Uses vectorised frame extraction (torch.unfold) for RMS and
+        run-length edges (np.diff) for gap extraction, so cost stays
+        linear in array ops even for hour-long inputs.
+
+        Returns:
+            (silences, threshold): structured array (SILENCE_DTYPE) with
+            start/end/center/duration for each silence gap ≥
+            _MIN_SILENCE_S, in time order, and the _silence_threshold
+            that found them.
+        """
+        energies = self._rms_envelope(waveform_1d)
+        threshold = self._silence_threshold(energies)
+        return (
+            self._silences_from_envelope(energies, waveform_1d.shape[0], threshold),
+            threshold,
+        )
+
+    @_timed("silence")
+    def _rms_envelope(self, waveform_1d):
+        """RMS energy of each _VAD_FRAME_S frame, one per _VAD_HOP_S.
+
+        Frames never straddle the end of waveform_1d, so envelopes of
+        consecutive windows overlapping by frame - hop samples (and
+        starting on a hop boundary) concatenate to the whole-song one.
         """
         sr = self.sample_rate
-        frame_size = int(0.025 * sr)   # 25 ms frames
-        hop = int(0.010 * sr)          # 10 ms hop
+        frame_size = int(_VAD_FRAME_S * sr)
+        hop = int(_VAD_HOP_S * sr)
 
         wav = waveform_1d.float()
         if wav.device.type != "cpu":
             wav = wav.cpu()
+        if wav.shape[0] < frame_size:
+            return np.zeros(0, dtype=np.float32)
 
         # Vectorised RMS: unfold into (n_frames, frame_size), then RMS.
         frames = wav.unfold(0, frame_size, hop)
-        energies = torch.sqrt(torch.mean(frames ** 2, dim=1)).numpy()
+        return torch.sqrt(torch.mean(frames ** 2, dim=1)).numpy()
+
+    @staticmethod
+    def _silence_threshold(energies):
+        """Adaptive silence threshold of a song's _rms_envelope.
 
-        # Adaptive threshold.  The 15th-percentile captures the noise
-        # floor; 3× that catches inter-phrase dips.  Clamped to
-        # [0.5 %, 2 %] of peak energy so it works across dynamics.
+        The 15th-percentile captures the noise floor; 3× that catches
+        inter-phrase dips.  Clamped to [0.5 %, 2 %] of peak energy so it
+        works across dynamics.  None for an empty envelope.
+        """
+        if len(energies) == 0:
+            return None
         noise_floor = float(np.percentile(energies, 15))
-        peak = float(np.max(energies)) if len(energies) else 1.0
-        threshold = np.clip(noise_floor * 3.0, peak * 0.005, peak * 0.02)
+        peak = float(np.max(energies))
+        return float(np.clip(noise_floor * 3.0, peak * 0.005, peak * 0.02))
+
+    @_timed("silence")
+    def _silences_from_envelope(self, energies, n_samples, threshold):
+        """Silence gaps from an _rms_envelope of n_samples of audio.
+
+        threshold comes from _silence_threshold of the whole song's
+        envelope, so envelopes of parts of it find the same gaps.
+        """
+        sr = self.sample_rate
+        hop = int(_VAD_HOP_S * sr)
+
+        if len(energies) == 0:
+            return np.empty(0, dtype=SILENCE_DTYPE)
 
         is_silent = energies < threshold
 
-        silences = []
-        in_silence = False
-        silence_start_frame = 0
-
-        for i in range(len(is_silent)):
-            if is_silent[i] and not in_silence:
-                silence_start_frame = i
-                in_silence = True
-            elif not is_silent[i] and in_silence:
-                start_s = silence_start_frame * hop / sr
-                end_s = i * hop / sr
-                duration = end_s - start_s
-                if duration >= _MIN_SILENCE_S:
-                    silences.append({
-                        "start": start_s,
-                        "end": end_s,
-                        "center": (start_s + end_s) / 2,
-                        "duration": duration,
-                    })
-                in_silence = False
-
-        # Trailing silence.
-        if in_silence:
-            start_s = silence_start_frame * hop / sr
-            end_s = waveform_1d.shape[0] / sr
-            duration = end_s - start_s
-            if duration >= _MIN_SILENCE_S:
-                silences.append({
-                    "start": start_s,
-                    "end": end_s,
-                    "center": (start_s + end_s) / 2,
-                    "duration": duration,
-                })
+        # Run-length edges: +1 where a silent run starts, -1 where it
+        # ends.  Padding with False closes runs at both ends.
+        edges = np.diff(np.concatenate(([0], is_silent.astype(np.int8), [0])))
+        run_start = np.flatnonzero(edges == 1)
+        run_end = np.flatnonzero(edges == -1)
+
+        start_s = run_start * hop / sr
+        end_s = run_end * hop / sr
+        # A run still open at the last frame extends to the end of audio.
+        end_s[run_end == len(is_silent)] = n_samples / sr
 
+        duration = end_s - start_s
+        keep = duration >= _MIN_SILENCE_S
+
+        silences = np.empty(int(keep.sum()), dtype=SILENCE_DTYPE)
+        silences["start"] = start_s[keep]
+        silences["end"] = end_s[keep]
+        silences["center"] = (start_s[keep] + end_s[keep]) / 2
+        silences["duration"] = duration[keep]
         return silences
 
     # ── Chunk construction ─────────────────────────────────────────
 
-    def _build_chunks(self, audio_duration_s, silences):
-        """Split audio into chunks ≤ _MAX_CHUNK_S at silence boundaries.
+    @_timed("planning")
+    def _build_chunks(
+        self, audio_duration_s, silences, max_s, n_phonemes=0, max_cells=None,
+    ):
+        """Split audio into chunks ≤ max_s at silence boundaries.
 
-        Greedy: walk forward from 0, always picking the *latest* silence
-        centre that keeps the chunk within budget.  Falls back to even
-        splitting if no silences are available.
-        """
-        max_s = _MAX_CHUNK_S
+        Silence centres cut the audio into segments (segments longer
+        than max_s are split evenly); consecutive segments are grouped
+        into chunks of roughly equal alignment cost (_partition_by_cost).
+        Phonemes are spread by voiced time, the same way words are
+        distributed afterwards, so chunks over dense stretches come out
+        shorter.  Falls back to even splitting if no silences are
+        available.
+
+        Args:
+            n_phonemes: phonemes in the whole transcript; 0 balances by
+                length alone.
+            max_cells: DP-decode memory bound per chunk (_max_chunk_cells).
 
-        if not silences:
+        Returns:
+            Structured array (CHUNK_DTYPE) of chunk start/end times.
+        """
+        if len(silences) == 0:
             n = max(1, int(np.ceil(audio_duration_s / max_s)))
             step = audio_duration_s / n
-            return [
-                {"start": round(i * step, 4), "end": round((i + 1) * step, 4)}
-                for i in range(n)
-            ]
-
-        split_points = sorted(set(round(s["center"], 4) for s in silences))
-
-        chunks = []
-        chunk_start = 0.0
-
-        while chunk_start < audio_duration_s - 0.1:
-            limit = chunk_start + max_s
-
-            if limit >= audio_duration_s:
-                chunks.append({
-                    "start": round(chunk_start, 4),
-                    "end": round(audio_duration_s, 4),
-                })
-                break
+            return np.array(
+                [(round(i * step, 4), round((i + 1) * step, 4)) for i in range(n)],
+                dtype=CHUNK_DTYPE,
+            )
 
-            # Latest split point within budget.
-            best = None
-            for sp in split_points:
-                if sp <= chunk_start:
-                    continue
-                if sp > limit:
-                    break
-                best = sp
+        # Python's round() (correctly rounded decimal) keeps split points
+        # bit-identical to earlier releases; np.round can differ on ties.
+        split_points = np.unique(
+            [round(c, 4) for c in silences["center"].tolist()]
+        )
+        split_points = split_points[
+            (split_points > 0.0) & (split_points < audio_duration_s - 0.1)
+        ]
+        bounds = [0.0]
+        for point in [*split_points.tolist(), round(audio_duration_s, 4)]:
+            start = bounds[-1]
+            pieces = max(1, int(np.ceil((point - start) / max_s - 1e-9)))
+            step = (point - start) / pieces
+            bounds.extend(round(start + k * step, 4) for k in range(1, pieces))
+            bounds.append(point)
+        bounds = np.array(bounds)
+
+        voiced = bounds - self._silent_time_before(silences, bounds)
+        phonemes_per_voiced_s = n_phonemes / max(float(voiced[-1]), 1e-6)
+
+        def estimate(i, j):
+            seconds = bounds[j] - bounds[i]
+            return self._chunk_cost(
+                seconds, (voiced[j] - voiced[i]) * phonemes_per_voiced_s,
+            )
 
-            if best is not None:
-                chunks.append({
-                    "start": round(chunk_start, 4),
-                    "end": round(best, 4),
-                })
-                chunk_start = best
-            else:
-                # No silence in range — force split at limit.
-                chunks.append({
-                    "start": round(chunk_start, 4),
-                    "end": round(limit, 4),
-                })
-                chunk_start = limit
+        def fits(i, j):
+            _, cells, _ = estimate(i, j)
+            return bounds[j] - bounds[i] <= max_s + 1e-6 and (
+                max_cells is None or cells <= max_cells
+            )
 
-        return chunks if chunks else [{"start": 0.0, "end": audio_duration_s}]
+        groups = self._partition_by_cost(
+            len(bounds) - 1, lambda i, j: estimate(i, j)[2], fits,
+        )
+        return np.array(
+            [(float(bounds[i]), float(bounds[j])) for i, j in groups],
+            dtype=CHUNK_DTYPE,
+        )
 
     # ── Word distribution across chunks ────────────────────────────
 
+    @_timed("planning")
     def _distribute_words_to_chunks(self, words, chunks, silences):
         """Assign words to chunks proportionally by voiced duration.
 
         Chunks with more silence overlap (instrumental breaks, etc.)
         receive proportionally fewer words.  Uses cumulative rounding
         so every word is assigned exactly once.
+
+        Silence overlap comes from a prefix sum of silence durations, so
+        the cost is O((chunks + silences) log silences) rather than
+        O(chunks × silences).
         """
+        chunk_start = np.array([c["start"] for c in chunks], dtype=float)
+        chunk_end = np.array([c["end"] for c in chunks], dtype=float)
+        total = chunk_end - chunk_start
+
         # Voiced duration per chunk = total − silence overlap.
-        voiced_per_chunk = []
-        for chunk in chunks:
-            total = chunk["end"] - chunk["start"]
-            silence_overlap = 0.0
-            for s in silences:
-                ov_start = max(s["start"], chunk["start"])
-                ov_end = min(s["end"], chunk["end"])
-                if ov_end > ov_start:
-                    silence_overlap += ov_end - ov_start
-            voiced_per_chunk.append(max(total - silence_overlap, 0.01))
-
-        total_voiced = sum(voiced_per_chunk)
+        silence_overlap = (
+            self._silent_time_before(silences, chunk_end)
+            - self._silent_time_before(silences, chunk_start)
+        )
+        voiced_per_chunk = np.maximum(total - silence_overlap, 0.01)
+
+        # Sequential cumsum matches the running Python sum it replaces.
+        total_voiced = float(np.cumsum(voiced_per_chunk)[-1])
         if total_voiced <= 0:
-            total_voiced = sum(c["end"] - c["start"] for c in chunks)
+            total_voiced = float(np.cumsum(total)[-1])
 
         # Cumulative proportional assignment avoids rounding drift.
-        groups = []
-        cursor = 0
-        cum_share = 0.0
-
-        for i, voiced in enumerate(voiced_per_chunk):
-            cum_share += voiced / total_voiced
-            if i == len(chunks) - 1:
-                target = len(words)
-            else:
-                target = round(cum_share * len(words))
-            n = max(0, target - cursor)
-            groups.append(list(words[cursor : cursor + n]))
-            cursor += n
+        cum_share = np.cumsum(voiced_per_chunk / total_voiced)
+        targets = np.rint(cum_share * len(words)).astype(np.int64)
+        targets[-1] = len(words)
+        ends = np.maximum.accumulate(targets)
+        starts = np.concatenate(([0], ends[:-1]))
+
+        return [list(words[a:b]) for a, b in zip(starts, ends)]
+
+    @staticmethod
+    def _silent_time_before(silences, times):
+        """Total silence duration in [0, t) for each t in times.
+
+        Silences are disjoint and sorted, so this is a prefix sum of
+        durations up to the last silence starting before t, plus the
+        part of that silence already elapsed.
+        """
+        if len(silences) == 0:
+            return np.zeros_like(times)
+        starts = silences["start"]
+        durations = silences["end"] - starts
+        cum = np.concatenate(([0.0], np.cumsum(durations)))
 
-        return groups
+        k = np.searchsorted(starts, times, side="right")
+        last = np.maximum(k - 1, 0)
+        partial = np.clip(times - starts[last], 0.0, durations[last])
+        return np.where(k > 0, cum[last] + partial, 0.0)
 
     # ── Line-aware chunk construction ──────────────────────────────
 
-    def _build_line_aware_chunks(self, line_times, audio_duration_s, silences):
+    @_timed("planning")
+    def _build_line_aware_chunks(
+        self, line_times, audio_duration_s, silences, max_s, max_cells=None,
+    ):
         """Build chunks aligned to LRCLIB line boundaries.
 
         Groups consecutive lines into chunks where the span from the
-        first line's start to the last line's end stays ≤ _MAX_CHUNK_S.
+        first line's start to the last line's end stays ≤ max_s and the
+        DP decode stays within max_cells, balancing the chunks by
+        alignment cost (_partition_by_cost) — a rap verse gets fewer
+        lines per chunk than a ballad.
         Each chunk carries the complete words for its lines — no
         fabricated word positions, no mid-line splits.
 
@@ -728,7 +3587,8 @@ class Predictor(BasePredictor):
         back to audio_duration_s.
 
         Returns:
-            List of dicts: {"start", "end", "words"} for each chunk.
+            List of dicts: {"start", "end", "words", "lines"} for each
+            chunk; "lines" holds (start, end, words) per line.
         """
         if not line_times:
             return []
@@ -746,47 +3606,51 @@ class Predictor(BasePredictor):
             else:
                 # Last line: use first silence gap after line starts.
                 end_s = audio_duration_s
-                for s in silences:
-                    if s["start"] > start_s + 0.5:
-                        end_s = s["start"]
-                        break
+                k = np.searchsorted(silences["start"], start_s + 0.5, side="right")
+                if k < len(silences):
+                    end_s = float(silences["start"][k])
 
             line_bounds.append({
                 "start": start_s,
                 "end": end_s,
                 "words": words,
+                "phonemes": sum(
+                    len(self._lookup_phonemes_sofa(w)) + 1 for w in words
+                ),
             })
 
         if not line_bounds:
             return []
 
-        # Greedily group lines into chunks ≤ _MAX_CHUNK_S.
+        cum_phonemes = np.cumsum([0] + [lb["phonemes"] for lb in line_bounds])
+
+        def estimate(i, j):
+            return self._chunk_cost(
+                line_bounds[j - 1]["end"] - line_bounds[i]["start"],
+                cum_phonemes[j] - cum_phonemes[i],
+            )
+
+        def fits(i, j):
+            _, cells, _ = estimate(i, j)
+            span = line_bounds[j - 1]["end"] - line_bounds[i]["start"]
+            return span <= max_s and (max_cells is None or cells <= max_cells)
+
         chunks = []
-        group_start = 0
-
-        for i in range(1, len(line_bounds)):
-            span = line_bounds[i]["end"] - line_bounds[group_start]["start"]
-            if span > _MAX_CHUNK_S:
-                # Close current group: lines group_start .. i-1.
-                chunk_words = []
-                for j in range(group_start, i):
-                    chunk_words.extend(line_bounds[j]["words"])
-                chunks.append({
-                    "start": line_bounds[group_start]["start"],
-                    "end": line_bounds[i - 1]["end"],
-                    "words": chunk_words,
-                })
-                group_start = i
-
-        # Final group.
-        chunk_words = []
-        for j in range(group_start, len(line_bounds)):
-            chunk_words.extend(line_bounds[j]["words"])
-        chunks.append({
-            "start": line_bounds[group_start]["start"],
-            "end": line_bounds[-1]["end"],
-            "words": chunk_words,
-        })
+        for i, j in self._partition_by_cost(
+            len(line_bounds), lambda i, j: estimate(i, j)[2], fits,
+        ):
+            chunk_words = []
+            for k in range(i, j):
+                chunk_words.extend(line_bounds[k]["words"])
+            chunks.append({
+                "start": line_bounds[i]["start"],
+                "end": line_bounds[j - 1]["end"],
+                "words": chunk_words,
+                "lines": [
+                    (lb["start"], lb["end"], lb["words"])
+                    for lb in line_bounds[i:j]
+                ],
+            })
 
         line_dist = [len(c["words"]) for c in chunks]
         print(
@@ -799,222 +3663,517 @@ class Predictor(BasePredictor):
 
     # ── Per-line SOFA alignment ─────────────────────────────────────
 
-    def _align_by_lines(self, waveform, line_times):
-        """Per-line SOFA alignment using LRCLIB line windows."""
-        audio_duration_s = waveform.shape[1] / self.sample_rate
-        results = []
-
-        for i, line in enumerate(line_times):
-            text = line["text"].strip()
+    def _align_by_lines(
+        self, audio, line_times, on_section=None, previous=None,
+        audio_hash=None, ctx=None,
+    ):
+        """Per-line SOFA alignment using LRCLIB line windows.
+
+        Each line is its own inference job with its own phoneme sequence
+        and window offset.  Consecutive lines are packed into padded
+        batches by the batch runner, so short lines share one forward
+        pass instead of each paying the per-call overhead.  Finished
+        lines are passed to on_section in line order.
+
+        previous holds the lines of an earlier run by _line_key (see
+        _parse_previous_result); matching lines are spliced in with their
+        earlier words and window, without inference.
+        """
+        if ctx is None:
+            ctx = _SongContext()
+        audio_duration_s = audio["samples"] / self.sample_rate
+        song_mel = self._audio_mel(audio)
+        sections = _InOrder(on_section)
+        spans = [
+            self._line_span(line_times, i, audio_duration_s)
+            for i in range(len(line_times))
+        ]
+        earlier = previous["lines"] if previous else {}
+        reusable = {
+            i: earlier[key] for i, key in enumerate(
+                self._line_key(line["text"].strip(), span)
+                for line, span in zip(line_times, spans)
+            ) if key in earlier
+        }
+
+        # Phoneme sequences up front: their length bounds each window.
+        sequences = [
+            self._vocab_sequence(line["text"].strip().split())
+            for line in line_times
+        ]
+        silences = self._audio_silences(audio)
+        padding_s = _LINE_PADDING_S * self._padding_scale(ctx)
+        raw_windows = [
+            self._line_window(line_times, i, audio_duration_s, padding_s)
+            for i in range(len(line_times))
+        ]
+        windows = [
+            reusable[i]["window"] if i in reusable
+            else self._clip_line_window(window, len(seq[0]), silences, padding_s)
+            for i, (window, seq) in enumerate(zip(raw_windows, sequences))
+        ]
+        raw_s = sum(end - start for start, end in raw_windows)
+        clipped_s = sum(end - start for start, end in windows)
+        if clipped_s < raw_s:
+            print(
+                f"  Line windows: {raw_s:.1f}s → {clipped_s:.1f}s of audio "
+                f"({sum(w != r for w, r in zip(windows, raw_windows))} "
+                f"lines clipped to sung content)",
+                file=sys.stderr,
+            )
+        line_results = {}
+        reused = 0
+
+        def prepare(i):
+            nonlocal reused
+            if i in reusable:
+                reused += 1
+                line_results[i] = reusable[i]["words"]
+                sections.put(i, self._section("line", {
+                    "index": i, "start": windows[i][0], "end": windows[i][1],
+                }, line_results[i]))
+                return None
+
+            job = prepare_line(i)
+            if job is None:
+                sections.put(i, None)
+            return job
+
+        def prepare_line(i):
+            text = line_times[i]["text"].strip()
             if not text:
-                continue
-
-            line_start_s = line["startMs"] / 1000
-
-            # Line end: next line's start, or +10s, or audio end.
-            if i + 1 < len(line_times):
-                line_end_s = line_times[i + 1]["startMs"] / 1000
-            else:
-                line_end_s = min(line_start_s + 10.0, audio_duration_s)
+                return None
 
-            # Pad window so edge words aren't clipped.
-            PADDING_S = 0.5
-            win_start_s = max(0, line_start_s - PADDING_S)
-            win_end_s = min(audio_duration_s, line_end_s + PADDING_S)
+            win_start_s, win_end_s = windows[i]
 
-            # Extract audio segment.
+            # Extract audio window.
             start_sample = int(win_start_s * self.sample_rate)
-            end_sample = min(int(win_end_s * self.sample_rate), waveform.shape[1])
+            end_sample = min(int(win_end_s * self.sample_rate), audio["samples"])
             if end_sample <= start_sample + self.sample_rate // 10:
-                continue
-            segment = waveform[:, start_sample:end_sample]
+                return None
 
             words = text.split()
             if not words:
-                continue
+                return None
 
-            ph_seq, word_seq, ph_idx_to_word_idx = self._build_phoneme_sequence(words)
-            if len(ph_seq) < 2:
-                continue
+            ph_seq, word_seq, ph_idx_to_word_idx = sequences[i]
+            if not word_seq:
+                return None
 
-            ph_seq, ph_idx_to_word_idx = self._filter_vocab(ph_seq, ph_idx_to_word_idx)
+            return {
+                "index": i,
+                "start": win_start_s,
+                "end": win_end_s,
+                "words": words,
+                "ph_seq": ph_seq,
+                "word_seq": word_seq,
+                "ph_idx_to_word_idx": ph_idx_to_word_idx,
+                **self._mel_window(song_mel, start_sample, end_sample),
+            }
+
+        weak = {}
+        failed = set()
+        first_pass_cost = 0.0
+
+        def convert(job, pred, error):
+            nonlocal first_pass_cost
+            i = job["index"]
+            if isinstance(error, _DeadlineExceeded):
+                line_results[i] = self._deadline_words("line", job, job["words"], ctx)
+                sections.put(i, self._section("line", job, line_results[i]))
+                return
+            first_pass_cost += self._job_cost(job)
+            if error is not None:
+                print(f"  Line {i} alignment failed: {error}", file=sys.stderr)
+                # Fallback: distribute words evenly across the line window.
+                line_results[i] = self._distribute_words_evenly(
+                    job["words"], job["start"], job["end"],
+                )
+                failed.add(i)
+                confidence = None
+            else:
+                line_results[i], confidence = self._pred_words(job, pred)
+
+            # Weak lines stream as provisional until the second pass
+            # settles them.  A line is split where the first pass placed
+            # its words, or — when it failed — at the window's silences.
+            weak_line = confidence is None or confidence < _REALIGN_CONFIDENCE
+            if weak_line:
+                weak[i] = {
+                    "job": job,
+                    "confidence": confidence,
+                    "parts": None if confidence is None else self._split_at_word_gaps(
+                        job, line_results[i], silences,
+                    ),
+                    "padding_s": padding_s,
+                }
+            sections.put(i, self._section("line", job, line_results[i], weak_line))
 
-            mono = segment.squeeze(0).to(self.device)
-            seg_length = mono.shape[0] / self.sample_rate
+        timings = self._run_pipeline(range(len(line_times)), prepare, convert, ctx)
 
-            try:
-                melspec = self._prepare_melspec(mono)
-
-                with torch.inference_mode():
-                    (
-                        ph_seq_pred, ph_intervals_pred,
-                        word_seq_pred, word_intervals_pred,
-                        confidence, _, _,
-                    ) = self.model._infer_once(
-                        melspec, seg_length, ph_seq, word_seq, ph_idx_to_word_idx,
-                    )
-
-                # Offset intervals to absolute time.
-                if len(ph_intervals_pred) > 0:
-                    ph_intervals_pred = ph_intervals_pred + win_start_s
-                if len(word_intervals_pred) > 0:
-                    word_intervals_pred = word_intervals_pred + win_start_s
-
-                # Free GPU memory before next line.
-                del mono, melspec
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
-
-                line_results = self._sofa_to_json(
-                    word_seq_pred, word_intervals_pred,
-                    ph_seq_pred, ph_intervals_pred,
-                )
-                results.extend(line_results)
+        realigned = self._realign_weak(
+            weak, song_mel, silences, audio_duration_s,
+            timings["wall"], first_pass_cost, ctx,
+        )
+        line_results.update((i, words) for i, (words, _) in realigned.items())
+        failed -= {i for i, (_, complete) in realigned.items() if complete}
+        for i, section in sorted(weak.items()):
+            sections.settle(self._section("line", section["job"], line_results[i]))
 
-            except Exception as e:
-                # Ensure GPU memory is freed even on failure.
-                mono = None
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
-                print(
-                    f"  Line {i} alignment failed: {e} — "
-                    f"falling back to even distribution",
-                    file=sys.stderr,
-                )
-                # Fallback: distribute words evenly across the line window.
-                n = len(words)
-                dur = win_end_s - win_start_s
-                for j, w in enumerate(words):
-                    ws = win_start_s + (j / n) * dur
-                    we = win_start_s + ((j + 1) / n) * dur
-                    phonemes = self._lookup_phonemes_sofa(w)
-                    results.append({
-                        "word": w,
-                        "start": round(ws, 4),
-                        "end": round(we, 4),
-                        "phonemes": self._distribute_evenly(phonemes, ws, we),
-                    })
+        results = []
+        lines = []
+        for i, line in enumerate(line_times):
+            words = line_results.get(i, [])
+            results.extend(words)
+            lines.append({
+                "text": line["text"].strip(),
+                "start": round(windows[i][0], 4),
+                "end": round(windows[i][1], 4),
+                "span": [round(spans[i][0], 4), round(spans[i][1], 4)],
+                "words": len(words),
+                **({"failed": True} if i in failed else {}),
+            })
 
         print(f"Aligned {len(results)} words across {len(line_times)} lines", file=sys.stderr)
+        if previous:
+            print(
+                f"  Incremental: reused {reused}/{len(line_times)} lines, "
+                f"re-aligned {len(line_times) - reused}",
+                file=sys.stderr,
+            )
 
-        return json.dumps({"words": results})
+        # The threshold lets an incremental request find this run's
+        # silence gaps from the audio around its edited lines alone.
+        output = {
+            "words": results,
+            "lines": lines,
+            "silence_threshold": audio["silence_threshold"],
+        }
+        if audio_hash:
+            output["audio_sha256"] = audio_hash
+        return json.dumps(output)
+
+    @staticmethod
+    def _line_span(line_times, i, audio_duration_s):
+        """Unpadded (start, end) in seconds of line i's timestamps."""
+        line_start_s = line_times[i]["startMs"] / 1000
+
+        # Line end: next line's start, or +10s, or audio end.
+        if i + 1 < len(line_times):
+            line_end_s = line_times[i + 1]["startMs"] / 1000
+        else:
+            line_end_s = min(line_start_s + 10.0, audio_duration_s)
+        return line_start_s, line_end_s
+
+    @staticmethod
+    def _line_key(text, span):
+        """previous_result key of a line: its text and unpadded span.
+
+        Padding and clipping depend on the deadline and the silence map,
+        so they are left out; same text over the same span on the same
+        audio aligns the same way.
+        """
+        return (text, round(span[0], 4), round(span[1], 4))
+
+    @staticmethod
+    def _line_window(line_times, i, audio_duration_s, padding_s=_LINE_PADDING_S):
+        """Padded (start, end) window in seconds for line i."""
+        line_start_s, line_end_s = Predictor._line_span(
+            line_times, i, audio_duration_s,
+        )
+
+        # Pad window so edge words aren't clipped.
+        win_start_s = max(0, line_start_s - padding_s)
+        win_end_s = min(audio_duration_s, line_end_s + padding_s)
+        return win_start_s, win_end_s
+
+    @staticmethod
+    def _clip_line_window(window, n_phonemes, silences, padding_s=_LINE_PADDING_S):
+        """Trim a line window to the audio the line is likely sung in.
+
+        A silence gap covering the window start moves the start to where
+        the voice comes in; the end is capped at the line's expected
+        duration from there, then pulled back to the start of a silence
+        gap that runs up to it (an instrumental break before the next
+        line).  Edges keep padding_s of context, and the window
+        never drops below _LINE_MIN_WINDOW_S.
+
+        Args:
+            window: (start, end) seconds from _line_window.
+            n_phonemes: length of the line's phoneme sequence (incl. SP).
+            silences: song silence map from _detect_silences.
+        """
+        win_start_s, win_end_s = window
+        min_s = min(_LINE_MIN_WINDOW_S, win_end_s - win_start_s)
+        starts, ends = silences["start"], silences["end"]
+
+        # Leading silence: first gap that ends after the window start.
+        i = int(np.searchsorted(ends, win_start_s, side="right"))
+        if i < len(silences) and starts[i] <= win_start_s:
+            voice_in = float(ends[i]) - padding_s
+            if voice_in + min_s <= win_end_s:
+                win_start_s = max(win_start_s, voice_in)
+
+        win_end_s = min(
+            win_end_s,
+            win_start_s + max(_LINE_MIN_WINDOW_S, n_phonemes * _LINE_S_PER_PHONEME),
+        )
+
+        # Trailing silence: the last gap starting inside the window, if
+        # it runs to the end or is a break followed only by the next
+        # line's onset (LRCLIB starts are often a little late).
+        j = int(np.searchsorted(starts, win_end_s, side="left")) - 1
+        if j >= 0 and (
+            ends[j] >= win_end_s
+            or (
+                silences["duration"][j] >= _LINE_BREAK_GAP_S
+                and ends[j] >= win_end_s - _LINE_ONSET_S
+            )
+        ):
+            win_end_s = min(
+                win_end_s,
+                max(float(starts[j]) + padding_s, win_start_s + min_s),
+            )
+        return win_start_s, win_end_s
+
+    @staticmethod
+    def _parse_previous_result(previous_json, audio_hash=None):
+        """Lines of a prior per-line result, for incremental re-alignment.
+
+        Returns:
+            {"lines": {_line_key: {"words", "window"}}, "silence_threshold"}
+            or None when previous_json is empty, malformed, lacks the
+            per-line "lines" list, or was aligned against different audio.
+        """
+        if not previous_json or not previous_json.strip():
+            return None
+        try:
+            data = json.loads(previous_json)
+        except (json.JSONDecodeError, TypeError):
+            print("previous_result ignored: invalid JSON", file=sys.stderr)
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("lines"), list):
+            print("previous_result ignored: no per-line results", file=sys.stderr)
+            return None
+        previous_audio = data.get("audio_sha256")
+        if previous_audio and audio_hash and previous_audio != audio_hash:
+            print("previous_result ignored: different audio", file=sys.stderr)
+            return None
+
+        # Entries that are not line records hold no words; skip them.
+        lines = [line for line in data["lines"] if isinstance(line, dict)]
+        counts = [line.get("words", 0) for line in lines]
+        words = data.get("words") or []
+        if (
+            not isinstance(words, list)
+            or not all(isinstance(n, int) and n >= 0 for n in counts)
+            or sum(counts) != len(words)
+        ):
+            print("previous_result ignored: line word counts mismatch", file=sys.stderr)
+            return None
+
+        previous = {}
+        pos = 0
+        for line, n in zip(lines, counts):
+            line_words = words[pos : pos + n]
+            pos += n
+            # Lines that failed or were cut by the deadline carry evenly
+            # spread words, not an alignment; align them again, as well as
+            # lines from results that predate spans.
+            span = line.get("span")
+            if line.get("failed") or not all(
+                isinstance(w, dict) and not w.get("degraded") for w in line_words
+            ) or not (
+                isinstance(span, list) and len(span) == 2 and all(
+                    isinstance(t, (int, float))
+                    for t in (*span, line.get("start"), line.get("end"))
+                )
+            ):
+                continue
+            previous[Predictor._line_key(line.get("text", ""), span)] = {
+                "words": line_words,
+                "window": (line.get("start"), line.get("end")),
+            }
+        threshold = data.get("silence_threshold")
+        return {
+            "lines": previous,
+            "silence_threshold": (
+                float(threshold) if isinstance(threshold, (int, float)) else None
+            ),
+        }
 
     # ── Legacy: phoneme alignment within word boundaries ────────────
 
-    def _align_with_word_boundaries(self, waveform, word_times):
-        """Align phonemes within pre-established word boundaries."""
-        results = []
+    def _align_with_word_boundaries(self, audio, word_times, ctx=None):
+        """Align phonemes within pre-established word boundaries.
+
+        Every word becomes its own SP-word-SP inference job.  Words are
+        visited in duration order so each padded batch holds similarly
+        sized windows, the network runs once per batch, and each word's
+        phonemes are decoded from its own slice.  Results are written
+        back in input order.
+        """
+        if ctx is None:
+            ctx = _SongContext()
+        song_mel = self._audio_mel(audio)
+        results = [None] * len(word_times)
 
-        for wt in word_times:
+        def prepare(i):
+            wt = word_times[i]
             word_text = wt["word"]
             word_start_s = wt["start"]
             word_end_s = wt["end"]
 
             start_sample = int(word_start_s * self.sample_rate)
-            end_sample = min(int(word_end_s * self.sample_rate), waveform.shape[1])
+            end_sample = min(int(word_end_s * self.sample_rate), audio["samples"])
 
             if end_sample <= start_sample + self.sample_rate // 20:
                 phonemes = self._lookup_phonemes_sofa(word_text)
-                results.append({
+                results[i] = {
                     "word": word_text,
                     "start": round(word_start_s, 4),
                     "end": round(word_end_s, 4),
                     "phonemes": self._distribute_evenly(
                         phonemes, word_start_s, word_end_s
                     ),
-                })
-                continue
-
-            segment = waveform[:, start_sample:end_sample]
-            mono = segment.squeeze(0).to(self.device)
-            seg_length = mono.shape[0] / self.sample_rate
+                }
+                return None
 
             phonemes_sofa = self._lookup_phonemes_sofa(word_text)
             if not phonemes_sofa:
-                results.append({
+                results[i] = {
                     "word": word_text,
                     "start": round(word_start_s, 4),
                     "end": round(word_end_s, 4),
                     "phonemes": [],
-                })
-                continue
+                }
+                return None
 
             # Build phoneme sequence for just this word (SP word SP).
-            ph_seq = ["SP"] + phonemes_sofa + ["SP"]
-            word_seq = [word_text]
-            ph_idx_to_word_idx = np.array(
-                [-1] + [0] * len(phonemes_sofa) + [-1]
-            )
-            ph_seq, ph_idx_to_word_idx = self._filter_vocab(ph_seq, ph_idx_to_word_idx)
-
-            try:
-                melspec = self._prepare_melspec(mono)
-
-                with torch.inference_mode():
-                    (
-                        ph_seq_pred, ph_intervals_pred,
-                        _, _,
-                        confidence, _, _,
-                    ) = self.model._infer_once(
-                        melspec, seg_length, ph_seq, word_seq, ph_idx_to_word_idx,
-                    )
-
-                # Free GPU memory before next word.
-                del mono, melspec
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
-
-                # Offset to absolute time and build phoneme list.
-                phoneme_timings = []
-                for j in range(len(ph_seq_pred)):
-                    ph = str(ph_seq_pred[j])
-                    if ph == "SP":
-                        continue
-                    arpabet = SOFA_TO_ARPABET.get(ph, ph.upper())
-                    ph_start = float(ph_intervals_pred[j][0]) + word_start_s
-                    ph_end = float(ph_intervals_pred[j][1]) + word_start_s
-                    phoneme_timings.append({
-                        "phoneme": arpabet,
-                        "start": round(ph_start, 4),
-                        "end": round(min(ph_end, word_end_s), 4),
-                    })
-
-                results.append({
-                    "word": word_text,
-                    "start": round(word_start_s, 4),
-                    "end": round(word_end_s, 4),
-                    "phonemes": phoneme_timings,
-                })
-
-            except Exception as e:
-                # Ensure GPU memory is freed even on failure.
-                mono = None
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
-                print(f"Word alignment failed for '{word_text}': {e}", file=sys.stderr)
-                results.append({
+            ph_seq, _, ph_idx_to_word_idx = self._vocab_sequence([word_text])
+
+            return {
+                "index": i,
+                "word": word_text,
+                "start": word_start_s,
+                "end": word_end_s,
+                "phonemes": phonemes_sofa,
+                "ph_seq": ph_seq,
+                "word_seq": [word_text],
+                "ph_idx_to_word_idx": ph_idx_to_word_idx,
+                **self._mel_window(song_mel, start_sample, end_sample),
+            }
+
+        def convert(job, pred, error):
+            word_text = job["word"]
+            word_start_s = job["start"]
+            word_end_s = job["end"]
+
+            if isinstance(error, _DeadlineExceeded):
+                results[job["index"]] = self._deadline_words("word", job, [word_text], ctx)[0]
+                return
+            if error is not None:
+                print(f"Word alignment failed for '{word_text}': {error}", file=sys.stderr)
+                results[job["index"]] = {
                     "word": word_text,
                     "start": round(word_start_s, 4),
                     "end": round(word_end_s, 4),
                     "phonemes": self._distribute_evenly(
-                        phonemes_sofa, word_start_s, word_end_s
+                        job["phonemes"], word_start_s, word_end_s
                     ),
+                }
+                return
+
+            ph_seq_pred, ph_intervals_pred = pred[0], pred[1]
+
+            # Offset to absolute time and build phoneme list.
+            phoneme_timings = []
+            for j in range(len(ph_seq_pred)):
+                ph = str(ph_seq_pred[j])
+                if ph == "SP":
+                    continue
+                arpabet = SOFA_TO_ARPABET.get(ph, ph.upper())
+                # The frame-snapped window may open slightly before
+                # the word; clamp so phonemes stay inside it.
+                ph_start = max(
+                    float(ph_intervals_pred[j][0]) + job["offset"],
+                    word_start_s,
+                )
+                ph_end = float(ph_intervals_pred[j][1]) + job["offset"]
+                phoneme_timings.append({
+                    "phoneme": arpabet,
+                    "start": round(ph_start, 4),
+                    "end": round(min(ph_end, word_end_s), 4),
                 })
 
+            results[job["index"]] = {
+                "word": word_text,
+                "start": round(word_start_s, 4),
+                "end": round(word_end_s, 4),
+                "phonemes": phoneme_timings,
+            }
+
+        # Duration-sorted order keeps padding within each batch minimal.
+        order = sorted(
+            range(len(word_times)),
+            key=lambda i: word_times[i]["end"] - word_times[i]["start"],
+        )
+        self._run_pipeline(order, prepare, convert, ctx)
+
         return json.dumps({"words": results})
 
     # ── Mel spectrogram preparation ─────────────────────────────────
 
-    def _prepare_melspec(self, waveform_1d):
-        """Compute, normalize, and upsample mel spectrogram for SOFA.
+    @_timed("mel")
+    def _song_melspec(self, waveform_1d):
+        """Compute the raw mel spectrogram of a whole song once.
+
+        Every alignment window takes a frame-index view of this tensor
+        (see _mel_window) instead of re-running the STFT on its own
+        waveform slice, so overlapping and per-word windows cost nothing
+        beyond normalisation.
+
+        Args:
+            waveform_1d: 1-D tensor (samples,), on any device.
+
+        Returns:
+            (n_mels, T) tensor on self.device, one frame per hop_length.
+        """
+        with torch.inference_mode():
+            return self.get_melspec(waveform_1d.to(self.device)).detach()
+
+    def _mel_window(self, song_mel, start_sample, end_sample):
+        """Snap a sample range to song_mel frames.
+
+        The window start is rounded down to a frame boundary so that
+        ``offset`` (seconds) maps decoded intervals back to absolute time
+        exactly, and ``length`` (seconds) matches the frame count SOFA
+        crops its outputs to.
+
+        Returns:
+            Dict with "mel", "frames" (f0, f1), "offset" and "length".
+        """
+        hop = self.melspec_config["hop_length"]
+        f0 = start_sample // hop
+        f1 = min(-(-end_sample // hop), song_mel.shape[-1])
+        return {
+            "mel": song_mel,
+            "frames": (f0, f1),
+            "offset": f0 * hop / self.sample_rate,
+            "length": (f1 - f0) * hop / self.sample_rate,
+        }
+
+    @_timed("mel")
+    def _prepare_melspec(self, mel):
+        """Normalize and upsample a raw mel view for SOFA.
 
         Args:
-            waveform_1d: 1-D tensor (samples,) on self.device.
+            mel: (n_mels, T) view of a _song_melspec tensor.
 
         Returns:
             (1, n_mels, T*scale_factor) tensor ready for model.forward().
         """
-        melspec = self.get_melspec(waveform_1d).detach().unsqueeze(0)
+        melspec = mel.unsqueeze(0)
         melspec = (melspec - melspec.mean()) / (melspec.std() + 1e-6)
         melspec = repeat(
             melspec, "B C T -> B C (T N)", N=self.melspec_config["scale_factor"]
@@ -1022,6 +4181,96 @@ class Predictor(BasePredictor):
         return melspec
 
     # ── Phoneme sequence construction ───────────────────────────────
+    #
+    # Phonemes are handled as integer ids into an interned table that
+    # starts with the compiled dictionary's own table, so dictionary hits
+    # need no string conversion.  Each distinct lyric token is resolved
+    # once per predictor (lyrics repeat heavily) and vocab membership is
+    # a boolean lookup per id.
+
+    def _init_phoneme_ids(self):
+        """Build the interned phoneme table and vocab membership mask."""
+        self._ph_lock = threading.Lock()
+        self._ph_table = []
+        self._ph_index = {}
+        self._word_ids = {}
+        self._vocab_mask = np.zeros(0, dtype=bool)
+
+        seed = list(self.pron_dict.phonemes) if self.pron_dict is not None else []
+        seed += ["SP"] + [
+            k for k in self.vocab
+            if isinstance(k, str) and not k.startswith("<")
+        ]
+        self._intern_phonemes(seed)
+        self._sp_id = self._ph_index["SP"]
+
+    def _intern_phonemes(self, phonemes):
+        """Map phoneme strings to ids, adding unseen ones to the table."""
+        with self._ph_lock:
+            new = [ph for ph in dict.fromkeys(phonemes) if ph not in self._ph_index]
+            if new:
+                for ph in new:
+                    self._ph_index[ph] = len(self._ph_table)
+                    self._ph_table.append(ph)
+                self._ph_strings = np.array(self._ph_table, dtype=object)
+                self._vocab_mask = np.array(
+                    [ph in self.vocab for ph in self._ph_table], dtype=bool,
+                )
+            return np.array([self._ph_index[ph] for ph in phonemes], dtype=np.int32)
+
+    def _word_phoneme_ids(self, word):
+        """Memoized word → SOFA phoneme-id array (empty if unpronounceable).
+
+        Keyed by the raw lyric token, so punctuation stripping and the
+        dictionary search happen once per distinct token.
+        """
+        ids = self._word_ids.get(word)
+        if ids is not None:
+            return ids
+
+        clean = word.lower().strip(".,!?;:'\"()-")
+        ids = None
+        if clean and self.pron_dict is not None:
+            # Compiled dictionary ids are table ids (the table is seeded
+            # with the dictionary's phoneme list).
+            hit = self.pron_dict.lookup_ids(clean)
+            if hit is not None and len(hit):
+                ids = np.asarray(hit, dtype=np.int32)
+        if ids is None:
+            ids = self._intern_phonemes(self._lookup_phonemes_text(clean))
+
+        if len(self._word_ids) >= _WORD_CACHE_MAX:
+            self._word_ids.clear()
+        self._word_ids[word] = ids
+        return ids
+
+    def _sequence_ids(self, words):
+        """Assemble SP-delimited phoneme ids and word mapping for words.
+
+        Returns:
+            (ph_ids, word_seq, ph_idx_to_word_idx) with ph_ids and the
+            mapping as int arrays.
+        """
+        word_seq = []
+        pieces = []
+        for word in words:
+            ids = self._word_phoneme_ids(word)
+            if len(ids):
+                word_seq.append(word)
+                pieces.append(ids)
+
+        lengths = np.array([len(p) for p in pieces], dtype=np.int64) + 1
+        sp = np.array([self._sp_id], dtype=np.int32)
+        ph_ids = np.concatenate([sp] + [x for p in pieces for x in (p, sp)])
+
+        # Word k owns its phonemes; the SP closing each word (and the
+        # leading SP) maps to -1.
+        ph_idx_to_word_idx = np.empty(len(ph_ids), dtype=np.int64)
+        ph_idx_to_word_idx[0] = -1
+        ph_idx_to_word_idx[1:] = np.repeat(np.arange(len(pieces)), lengths)
+        ph_idx_to_word_idx[np.cumsum(lengths)] = -1
+
+        return ph_ids, word_seq, ph_idx_to_word_idx
 
     def _build_phoneme_sequence(self, words):
         """Build SOFA phoneme sequence with SP markers and word mapping.
@@ -1033,23 +4282,23 @@ class Predictor(BasePredictor):
         Returns:
             (ph_seq, word_seq, ph_idx_to_word_idx)
         """
-        ph_seq = ["SP"]
-        word_seq = []
-        ph_idx_to_word_idx = [-1]  # SP → no word
+        ph_ids, word_seq, ph_idx_to_word_idx = self._sequence_ids(words)
+        return self._ph_strings[ph_ids].tolist(), word_seq, ph_idx_to_word_idx
 
-        for word in words:
-            phonemes = self._lookup_phonemes_sofa(word)
-            if not phonemes:
-                continue
-            word_seq.append(word)
-            word_idx = len(word_seq) - 1
-            for ph in phonemes:
-                ph_seq.append(ph)
-                ph_idx_to_word_idx.append(word_idx)
-            ph_seq.append("SP")
-            ph_idx_to_word_idx.append(-1)
+    def _vocab_sequence(self, words):
+        """_build_phoneme_sequence followed by _filter_vocab, in id space.
 
-        return ph_seq, word_seq, np.array(ph_idx_to_word_idx)
+        Returns:
+            (ph_seq, word_seq, ph_idx_to_word_idx); word_seq is empty when
+            no word has phonemes.
+        """
+        ph_ids, word_seq, ph_idx_to_word_idx = self._sequence_ids(words)
+        keep = self._vocab_mask[ph_ids]
+        if not keep.all():
+            self._report_skipped(ph_ids[~keep])
+            ph_ids = ph_ids[keep]
+            ph_idx_to_word_idx = ph_idx_to_word_idx[keep]
+        return self._ph_strings[ph_ids].tolist(), word_seq, ph_idx_to_word_idx
 
     def _lookup_phonemes_sofa(self, word):
         """Look up SOFA-format (lowercase) phonemes for a word.
@@ -1058,8 +4307,14 @@ class Predictor(BasePredictor):
           1. SOFA dictionary (tgm_sofa_dict.txt)
           2. CMU dictionary → convert to lowercase, strip stress
           3. Rule-based G2P fallback
+
+        Steps 1 and 2 are a single search of the compiled dictionary
+        when it is available.  Results are memoized per token.
         """
-        clean = word.lower().strip(".,!?;:'\"()-")
+        return self._ph_strings[self._word_phoneme_ids(word)].tolist()
+
+    def _lookup_phonemes_text(self, clean):
+        """Text-dictionary and G2P lookup for a cleaned lowercase word."""
         if not clean:
             return []
 
@@ -1076,27 +4331,25 @@ class Predictor(BasePredictor):
 
     def _filter_vocab(self, ph_seq, ph_idx_to_word_idx):
         """Remove phonemes not in the SOFA model's vocabulary."""
-        filtered_ph = []
-        filtered_idx = []
-        skipped = set()
-
-        for ph, idx in zip(ph_seq, ph_idx_to_word_idx):
-            if ph in self.vocab:
-                filtered_ph.append(ph)
-                filtered_idx.append(idx)
-            else:
-                skipped.add(ph)
-
-        if skipped:
-            print(
-                f"Filtered {len(skipped)} unknown phonemes from vocab: {skipped}",
-                file=sys.stderr,
-            )
+        ph_ids = self._intern_phonemes(ph_seq)
+        keep = self._vocab_mask[ph_ids]
+        if not keep.all():
+            self._report_skipped(ph_ids[~keep])
+        return (
+            self._ph_strings[ph_ids[keep]].tolist(),
+            np.asarray(ph_idx_to_word_idx)[keep],
+        )
 
-        return filtered_ph, np.array(filtered_idx)
+    def _report_skipped(self, skipped_ids):
+        skipped = set(self._ph_strings[np.unique(skipped_ids)].tolist())
+        print(
+            f"Filtered {len(skipped)} unknown phonemes from vocab: {skipped}",
+            file=sys.stderr,
+        )
 
     # ── SOFA output → JSON conversion ───────────────────────────────
 
+    @_timed("convert")
     def _sofa_to_json(self, word_seq, word_intervals, ph_seq, ph_intervals):
         """Convert SOFA's parallel arrays to our word+phoneme JSON format.
 
@@ -1166,6 +4419,23 @@ class Predictor(BasePredictor):
             })
         return result
 
+    def _distribute_words_evenly(self, words, start_s, end_s):
+        """Evenly distribute words (and their phonemes) across a window."""
+        results = []
+        n = len(words)
+        dur = end_s - start_s
+        for j, w in enumerate(words):
+            ws = start_s + (j / n) * dur
+            we = start_s + ((j + 1) / n) * dur
+            phonemes = self._lookup_phonemes_sofa(w)
+            results.append({
+                "word": w,
+                "start": round(ws, 4),
+                "end": round(we, 4),
+                "phonemes": self._distribute_evenly(phonemes, ws, we),
+            })
+        return results
+
     @staticmethod
     def _parse_word_timestamps(word_timestamps_json):
         """Parse word timestamps JSON input."""
@@ -0,0 +1,193 @@
+"""
+Compiled pronunciation dictionary for the SOFA predictor.
+
+Merges the SOFA dictionary (tgm_sofa_dict.txt) and the stress-stripped,
+lowercased CMU Pronouncing Dictionary into one compact lookup that the
+predictor memory-maps on cold start instead of parsing ~135k text lines
+into Python dicts:
+
+  pron_dict/phonemes.json   interned phoneme table (id → SOFA token)
+  pron_dict/keys.npy        sorted UTF-8 words, fixed-width bytes
+  pron_dict/offsets.npy     int32 start of each word's ids (len(keys) + 1)
+  pron_dict/ids.npy         uint8 phoneme ids, concatenated
+
+SOFA entries win over CMU entries for the same word, matching the
+predictor's lookup order.  Lookups are a binary search over keys.npy.
+
+Build (run before `cog push` so pron_dict/ ships in the image):
+  python pron_dict.py
+  python pron_dict.py --sofa-dict tgm_sofa_dict.txt --cmu-dict cmudict.dict
+
+Missing source files are downloaded from the same URLs cog.yaml uses.
+"""
+
+import argparse
+import json
+import os
+import urllib.request
+
+import numpy as np
+
+SOFA_DICT_URL = (
+    "https://raw.githubusercontent.com/spicytigermeat/SOFA-Models/main/"
+    "tgm_sofa_dict.txt"
+)
+CMU_DICT_URL = (
+    "https://raw.githubusercontent.com/cmusphinx/cmudict/master/cmudict.dict"
+)
+
+PRON_DICT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pron_dict")
+
+
+# ── Text dictionary parsers ─────────────────────────────────────────
+
+def load_sofa_dict(path):
+    """Load SOFA dictionary (tab-separated: word<TAB>ph1 ph2 ph3)."""
+    d = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or line.startswith(";;;"):
+                continue
+            parts = line.split("\t", 1)
+            if len(parts) != 2:
+                continue
+            word = parts[0].strip().lower()
+            # Skip variant pronunciations like "close(2)"
+            if "(" in word:
+                continue
+            phonemes = parts[1].strip().split()
+            if phonemes:
+                d[word] = phonemes
+    return d
+
+
+def load_cmu_dict(path):
+    """Load CMU Pronouncing Dictionary (raw ARPAbet with stress digits)."""
+    cmu = {}
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            if line.startswith(";;;"):
+                continue
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2:
+                word = parts[0].lower()
+                if "(" in word:
+                    continue
+                phonemes = parts[1].strip().split()
+                cmu[word] = phonemes
+    return cmu
+
+
+def strip_stress(phoneme):
+    """Remove stress digits from ARPAbet token: AA1 → AA."""
+    if phoneme and phoneme[-1] in "012":
+        return phoneme[:-1]
+    return phoneme
+
+
+# ── Compile ─────────────────────────────────────────────────────────
+
+def compile_pron_dict(sofa_dict, cmu_dict, out_dir=PRON_DICT_DIR):
+    """Merge SOFA + CMU entries and write the compiled lookup files.
+
+    CMU phonemes are stress-stripped and lowercased to SOFA's token
+    format; SOFA entries overwrite CMU entries for the same word.
+
+    Returns:
+        Number of words written.
+    """
+    merged = {
+        word: [strip_stress(ph).lower() for ph in phonemes]
+        for word, phonemes in cmu_dict.items()
+    }
+    merged.update(sofa_dict)
+
+    words = sorted(w.encode("utf-8") for w in merged if w)
+    phoneme_table = sorted({ph for phs in merged.values() for ph in phs})
+    if len(phoneme_table) > 255:
+        raise ValueError(f"{len(phoneme_table)} phonemes do not fit uint8 ids")
+    phoneme_id = {ph: i for i, ph in enumerate(phoneme_table)}
+
+    offsets = np.zeros(len(words) + 1, dtype=np.int32)
+    ids = []
+    for i, key in enumerate(words):
+        ids.extend(phoneme_id[ph] for ph in merged[key.decode("utf-8")])
+        offsets[i + 1] = len(ids)
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "keys.npy"), np.array(words, dtype=bytes))
+    np.save(os.path.join(out_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(out_dir, "ids.npy"), np.array(ids, dtype=np.uint8))
+    with open(os.path.join(out_dir, "phonemes.json"), "w", encoding="utf-8") as f:
+        json.dump(phoneme_table, f)
+
+    return len(words)
+
+
+# ── Lookup ──────────────────────────────────────────────────────────
+
+class PronDict:
+    """Read-only, memory-mapped view of a compiled pronunciation dict."""
+
+    def __init__(self, path=PRON_DICT_DIR):
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        with open(os.path.join(path, "phonemes.json"), encoding="utf-8") as f:
+            self.phonemes = json.load(f)
+        self._key_width = self.keys.dtype.itemsize
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup_ids(self, word):
+        """Phoneme ids for an already-cleaned lowercase word, or None."""
+        key = word.encode("utf-8")
+        if len(key) > self._key_width:
+            return None
+        i = int(np.searchsorted(self.keys, key))
+        if i >= len(self.keys) or self.keys[i] != key:
+            return None
+        return self.ids[self.offsets[i] : self.offsets[i + 1]]
+
+    def get(self, word):
+        """SOFA phoneme tokens for an already-cleaned lowercase word, or None."""
+        ids = self.lookup_ids(word)
+        if ids is None:
+            return None
+        return [self.phonemes[i] for i in ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sofa-dict", help="tgm_sofa_dict.txt (downloaded if omitted)")
+    parser.add_argument("--cmu-dict", help="cmudict.dict (downloaded if omitted)")
+    parser.add_argument("--out", default=PRON_DICT_DIR, help="output directory")
+    args = parser.parse_args()
+
+    sources = {}
+    for name, path, url in (
+        ("sofa", args.sofa_dict, SOFA_DICT_URL),
+        ("cmu", args.cmu_dict, CMU_DICT_URL),
+    ):
+        if not path:
+            path = os.path.join(args.out, f".{name}-source.txt")
+            os.makedirs(args.out, exist_ok=True)
+            print(f"Downloading {url}")
+            urllib.request.urlretrieve(url, path)
+        sources[name] = path
+
+    sofa = load_sofa_dict(sources["sofa"])
+    cmu = load_cmu_dict(sources["cmu"])
+    n = compile_pron_dict(sofa, cmu, args.out)
+
+    for name, path in sources.items():
+        if path.startswith(os.path.join(args.out, ".")):
+            os.remove(path)
+
+    print(f"Compiled {n} words ({len(sofa)} SOFA, {len(cmu)} CMU) → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
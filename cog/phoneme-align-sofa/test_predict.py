@@ -0,0 +1,729 @@
+"""
+Tests for the SOFA predictor.
+
+They run against the deterministic stub network from
+scripts/sofa_stub.py (SOFA's forward outputs and _infer_once
+signature), so no checkpoint or /opt/SOFA is needed — only torch,
+torchaudio, numpy and the cog package:
+
+  cd cog/phoneme-align-sofa && python -m pytest test_predict.py
+"""
+
+import importlib
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+torchaudio = pytest.importorskip("torchaudio")
+pytest.importorskip("cog")
+
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+
+os.environ.setdefault("SOFA_CACHE_DIR", tempfile.mkdtemp(prefix="sofa-test-cache-"))
+os.environ.setdefault("SOFA_CPU_WORKERS", "0")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+import sofa_stub  # noqa: E402
+
+
+# ── Fixtures ────────────────────────────────────────────────────────
+
+@pytest.fixture(scope="module")
+def setup():
+    """(predict module, set-up predictor) on the stub network."""
+    return sofa_stub.load_predictor("stub")
+
+
+@pytest.fixture(scope="module")
+def predictor(setup):
+    return setup[1]
+
+
+@pytest.fixture(scope="module")
+def predict(setup):
+    return setup[0]
+
+
+@pytest.fixture(scope="module")
+def song(predictor):
+    return sofa_stub.build_song(40.0, predictor.sample_rate, seed=1)
+
+
+def window_jobs(predictor, song, seconds):
+    """One inference job per line of the song, each `seconds` long."""
+    audio = predictor._waveform_audio(song.waveform)
+    mel = predictor._audio_mel(audio)
+    jobs = []
+    for i, line in enumerate(song.lines):
+        start = line["startMs"] / 1000
+        words = line["text"].split()
+        ph_seq, word_seq, ph_idx_to_word_idx = predictor._vocab_sequence(words)
+        end = start + seconds[i % len(seconds)]
+        jobs.append({
+            "index": i,
+            "start": start,
+            "end": end,
+            "words": words,
+            **predictor._mel_window(
+                mel, int(start * predictor.sample_rate), int(end * predictor.sample_rate),
+            ),
+            "ph_seq": ph_seq,
+            "word_seq": word_seq,
+            "ph_idx_to_word_idx": ph_idx_to_word_idx,
+        })
+    return jobs
+
+
+def assert_same_prediction(a, b):
+    ph_a, ph_iv_a, words_a, word_iv_a, conf_a = a[:5]
+    ph_b, ph_iv_b, words_b, word_iv_b, conf_b = b[:5]
+    assert list(ph_a) == list(ph_b)
+    assert list(words_a) == list(words_b)
+    np.testing.assert_allclose(ph_iv_a, ph_iv_b, atol=1e-6)
+    np.testing.assert_allclose(word_iv_a, word_iv_b, atol=1e-6)
+    assert conf_a == pytest.approx(conf_b, abs=1e-6)
+
+
+# ── Pronunciation dictionary ────────────────────────────────────────
+
+SOFA_DICT_FIXTURE = """\
+; comment lines are skipped
+hello\thh ah l ow
+world\tw er l d
+read\tr iy d
+read(2)\tr eh d
+"""
+
+CMU_DICT_FIXTURE = """\
+;;; CMU fixture
+hello HH EH0 L OW1
+tomato T AH0 M EY1 T OW2
+tomato(2) T AH0 M AA1 T OW2
+night N AY1 T
+read R EH1 D
+"""
+
+
+def text_and_compiled_predictors(predict, vocab, tmp_path):
+    """Two unset-up predictors: text dictionaries vs the compiled one."""
+    (tmp_path / "sofa.txt").write_text(SOFA_DICT_FIXTURE, encoding="utf-8")
+    (tmp_path / "cmu.dict").write_text(CMU_DICT_FIXTURE, encoding="latin-1")
+    sofa = predict.load_sofa_dict(tmp_path / "sofa.txt")
+    cmu = predict.load_cmu_dict(tmp_path / "cmu.dict")
+    pron_dict = importlib.import_module("pron_dict")
+    pron_dict.compile_pron_dict(sofa, cmu, tmp_path / "compiled")
+
+    predictors = []
+    for compiled in (None, pron_dict.PronDict(tmp_path / "compiled")):
+        p = predict.Predictor()
+        p.vocab = vocab
+        p.pron_dict = compiled
+        p.sofa_dict, p.cmu_dict = ({}, {}) if compiled else (sofa, cmu)
+        p._init_phoneme_ids()
+        predictors.append(p)
+    return predictors
+
+
+def test_compiled_dictionary_matches_text_dictionaries(predict, predictor, tmp_path):
+    text, compiled = text_and_compiled_predictors(predict, predictor.vocab, tmp_path)
+    words = ["hello", "Hello,", "world", "read", "tomato", "night", "(night)", "zyxx"]
+    for word in words:
+        assert compiled._lookup_phonemes_sofa(word) == text._lookup_phonemes_sofa(word)
+
+    hits = {
+        word: [compiled.pron_dict.phonemes[i] for i in compiled.pron_dict.lookup_ids(word)]
+        for word in ("hello", "read", "tomato")
+    }
+    # SOFA entries win over CMU; CMU is stress-stripped and lowercased;
+    # variant pronunciations are dropped.
+    assert hits == {
+        "hello": ["hh", "ah", "l", "ow"],
+        "read": ["r", "iy", "d"],
+        "tomato": ["t", "ah", "m", "ey", "t", "ow"],
+    }
+    assert compiled.pron_dict.lookup_ids("zyxx") is None
+
+
+# ── Batched inference ───────────────────────────────────────────────
+
+def test_batched_and_single_decodes_agree(predictor, song):
+    # Window lengths that share a padded length but differ in frames,
+    # so batching pads them.
+    jobs = window_jobs(predictor, song, (3.0, 3.02, 3.05))
+    batches = list(predictor._plan_batches(
+        jobs, predictor._batch_budget_s(), predictor._padded_frames,
+    ))
+    assert max(len(b) for b in batches) > 1
+
+    batched = list(predictor._run_jobs(jobs))
+    for job, pred, error in batched:
+        assert error is None
+        ((_, single, single_error),) = list(predictor._run_jobs([job]))
+        assert single_error is None
+        assert_same_prediction(pred, single)
+
+
+def test_batches_never_mix_padded_lengths(predictor, song):
+    jobs = window_jobs(predictor, song, (1.0, 2.5, 6.0))
+    for batch in predictor._plan_batches(
+        jobs, predictor._batch_budget_s(), predictor._padded_frames,
+    ):
+        assert len({predictor._padded_frames(job) for job in batch}) == 1
+
+
+def test_batched_decode_leaves_model_untouched(predictor, song):
+    forward = predictor.model.forward
+    list(predictor._run_jobs(window_jobs(predictor, song, (3.0,))))
+    assert "forward" not in vars(predictor.model)
+    assert predictor.model.forward == forward
+
+
+# ── ONNX backend ────────────────────────────────────────────────────
+
+def test_onnx_and_torch_agree_on_a_fixed_mel(predictor):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    # setup() exports and checks the model; nothing is left for the
+    # first request to do.
+    assert predictor._onnx_ok is True
+
+    hop = predictor.melspec_config["hop_length"]
+    frames = int(5.0 * predictor.sample_rate / hop)
+    mel = torch.randn(
+        predictor.melspec_config["n_mels"], frames,
+        generator=torch.Generator().manual_seed(7),
+    )
+    ph_seq, word_seq, ph_idx_to_word_idx = predictor._vocab_sequence(
+        "hello world the end".split(),
+    )
+    job = {
+        "mel": mel,
+        "frames": (0, frames),
+        "length": frames * hop / predictor.sample_rate,
+        "ph_seq": ph_seq,
+        "word_seq": word_seq,
+        "ph_idx_to_word_idx": ph_idx_to_word_idx,
+    }
+    melspec = predictor._prepare_melspec(mel)
+
+    outputs, decoded = {}, {}
+    for backend in ("torch", "onnx"):
+        (outputs[backend],) = predictor._forward_batch([melspec], backend)
+        decoded[backend] = predictor._infer_job(job, melspec, outputs[backend])
+
+    for ref, got in zip(outputs["torch"], outputs["onnx"]):
+        np.testing.assert_allclose(got.numpy(), ref.numpy(), rtol=1e-4, atol=1e-4)
+    frame_s = 1.0 / predictor._frames_per_s()
+    ref, got = decoded["torch"], decoded["onnx"]
+    assert list(ref[0]) == list(got[0]) and list(ref[2]) == list(got[2])
+    np.testing.assert_allclose(got[1], ref[1], atol=frame_s + 1e-6)
+    np.testing.assert_allclose(got[3], ref[3], atol=frame_s + 1e-6)
+
+
+# ── int8 precision ──────────────────────────────────────────────────
+
+def test_int8_is_quantized_once_on_first_use_and_never_saved(
+    predict, predictor, song, monkeypatch,
+):
+    if torch.backends.quantized.engine == "none":
+        pytest.skip("no quantized engine")
+    # No pool in these tests, so setup() leaves int8 to the first request.
+    assert predictor._int8 is None
+
+    calls = []
+    quantize = torch.ao.quantization.quantize_dynamic
+
+    def counted(*args, **kwargs):
+        calls.append(1)
+        return quantize(*args, **kwargs)
+
+    monkeypatch.setattr(torch.ao.quantization, "quantize_dynamic", counted)
+    with ThreadPoolExecutor(4) as pool:
+        backends = list(pool.map(
+            lambda _: predictor._select_backend("torch", "int8"), range(4),
+        ))
+    assert backends == ["torch-int8"] * 4
+    assert len(calls) == 1
+
+    ckpt_dir = Path(predict.SOFA_CKPT_PATH).parent
+    cache_dir = Path(predict.CACHE_DIR)
+    assert not list(ckpt_dir.glob("*.int8.pt"))
+    assert not list(cache_dir.rglob("*.int8.pt"))
+
+    jobs = window_jobs(predictor, song, (3.0,))
+    results = list(predictor._run_jobs(jobs, predict._SongContext("torch-int8")))
+    assert [error for _, _, error in results] == [None] * len(jobs)
+
+
+# ── CPU worker pool ─────────────────────────────────────────────────
+
+def test_pool_survives_a_worker_killed_mid_run(predict, predictor, song):
+    jobs = window_jobs(predictor, song, (2.0, 3.0))
+    batches = [[job] for job in jobs]
+    expected = [pred for _, pred, _ in predictor._run_jobs(jobs)]
+
+    pool = predict._CPUPool(predictor, 2)
+    try:
+        def batches_killing_a_worker():
+            for n, batch in enumerate(batches):
+                if n == 2:
+                    os.kill(pool.pids[0], signal.SIGKILL)
+                yield batch
+
+        results = list(pool.run(batches_killing_a_worker()))
+        assert [job["index"] for job, _, _ in results] == [job["index"] for job in jobs]
+        for (_, pred, error), single in zip(results, expected):
+            assert error is None
+            assert_same_prediction(pred, single)
+
+        # The collector notices the dead worker and shuts the pool down.
+        for _ in range(100):
+            if not pool.alive:
+                break
+            time.sleep(0.05)
+        assert not pool.alive
+        assert pool.submit(batches[0], lambda k, result: None) is False
+        assert [error for _, _, error in pool.run(batches)] == [None] * len(jobs)
+    finally:
+        for pid in pool.pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+# ── Chunk planning ──────────────────────────────────────────────────
+
+def test_cost_partition_fits_its_limits_with_the_greedy_group_count(predict):
+    rng = np.random.default_rng(0)
+    costs = rng.uniform(1.0, 10.0, 200)
+    spans = rng.uniform(0.5, 3.0, 200)
+
+    def cost(i, j):
+        return float(costs[i:j].sum())
+
+    def fits(i, j):
+        return spans[i:j].sum() <= 12.0 and cost(i, j) <= 40.0
+
+    groups = predict.Predictor._partition_by_cost(len(costs), cost, fits)
+    assert groups[0][0] == 0 and groups[-1][1] == len(costs)
+    assert all(a[1] == b[0] for a, b in zip(groups, groups[1:]))
+    assert all(fits(i, j) for i, j in groups)
+
+    # Filling each group up to the limits sets the count; balancing
+    # within it never makes the costliest group worse.
+    filled, i = [], 0
+    while i < len(costs):
+        j = i + 1
+        while j < len(costs) and fits(i, j + 1):
+            j += 1
+        filled.append((i, j))
+        i = j
+    assert len(groups) == len(filled)
+    assert max(cost(i, j) for i, j in groups) <= max(cost(i, j) for i, j in filled)
+
+
+@pytest.mark.parametrize("max_s", [6.0, 10.0, 22.0])
+def test_chunk_plans_cover_every_word_once_within_budget(predictor, max_s):
+    song = sofa_stub.build_song(90.0, predictor.sample_rate, seed=3)
+    silences = predictor._audio_silences(predictor._waveform_audio(song.waveform))
+    words = song.transcript.split()
+    n_phonemes = sum(len(predictor._lookup_phonemes_sofa(w)) + 1 for w in words)
+    max_cells = predictor._max_chunk_cells()
+
+    chunks = predictor._build_chunks(
+        song.duration, silences, max_s, n_phonemes, max_cells,
+    )
+    assert chunks["start"][0] == 0.0
+    assert chunks["end"][-1] == pytest.approx(song.duration)
+    np.testing.assert_array_equal(chunks["start"][1:], chunks["end"][:-1])
+    assert np.all(chunks["end"] - chunks["start"] <= max_s + 1e-6)
+    groups = predictor._distribute_words_to_chunks(words, chunks, silences)
+    assert [w for group in groups for w in group] == words
+
+    line_chunks = predictor._build_line_aware_chunks(
+        song.lines, song.duration, silences, max_s, max_cells,
+    )
+    assert [w for chunk in line_chunks for w in chunk["words"]] == words
+    for chunk in line_chunks:
+        if len(chunk["lines"]) > 1:
+            assert chunk["end"] - chunk["start"] <= max_s + 1e-6
+
+
+# ── Streaming decode ────────────────────────────────────────────────
+
+@pytest.mark.parametrize("source_sr", [None, 48000])
+def test_streamed_decode_matches_the_in_memory_load(
+    predict, predictor, song, tmp_path, monkeypatch, source_sr,
+):
+    sr = predictor.sample_rate
+    wave = song.waveform
+    if source_sr is not None:
+        wave = torchaudio.functional.resample(wave, sr, source_sr)
+    path = tmp_path / "song.wav"
+    # Stereo, so the windowed downmix is exercised too.
+    torchaudio.save(str(path), torch.cat([wave, 0.5 * wave]), source_sr or sr)
+
+    whole = predictor._load_audio(path)
+    assert whole["waveform"] is not None
+    # A 40 s file counts as long, decoded in several windows.
+    monkeypatch.setattr(predict, "_STREAM_DECODE_MIN_S", 10.0)
+    monkeypatch.setattr(predict, "_STREAM_WINDOW_S", 7.0)
+    streamed = predictor._load_audio(path)
+    assert streamed["waveform"] is None
+
+    assert streamed["samples"] == whole["samples"]
+    torch.testing.assert_close(
+        streamed["mel"], predictor._audio_mel(whole), atol=1e-4, rtol=1e-4,
+    )
+    gaps = predictor._audio_silences(whole)
+    assert streamed["silence_threshold"] == pytest.approx(whole["silence_threshold"])
+    np.testing.assert_allclose(streamed["silences"]["start"], gaps["start"], atol=1e-6)
+    np.testing.assert_allclose(streamed["silences"]["end"], gaps["end"], atol=1e-6)
+
+
+# ── Line windows ────────────────────────────────────────────────────
+
+def test_clipped_line_windows_stay_off_neighbouring_lines(predict, predictor):
+    song = sofa_stub.build_song(60.0, predictor.sample_rate, seed=2, break_every=3)
+    silences = predictor._audio_silences(predictor._waveform_audio(song.waveform))
+    pad = predict._LINE_PADDING_S
+    sung, pos = [], 0
+    for line in song.lines:
+        n = len(line["text"].split())
+        sung.append((song.words[pos]["start"], song.words[pos + n - 1]["end"]))
+        pos += n
+
+    clipped = 0
+    for i, line in enumerate(song.lines):
+        raw = predictor._line_window(song.lines, i, song.duration)
+        n_phonemes = len(predictor._vocab_sequence(line["text"].split())[0])
+        start, end = predictor._clip_line_window(raw, n_phonemes, silences)
+        assert raw[0] <= start < end <= raw[1]
+        clipped += (start, end) != raw
+        # The line's own singing keeps its padding (to within a VAD hop)...
+        assert start <= max(raw[0], sung[i][0] - pad) + 0.02
+        assert end >= min(raw[1], sung[i][1] + pad) - 0.02
+        # ...and no more than that reaches into the lines beside it.
+        if i > 0:
+            assert start >= sung[i - 1][1] - pad
+        if i + 1 < len(song.lines):
+            assert end <= sung[i + 1][0] + pad
+    assert clipped
+
+
+def test_short_lines_keep_the_minimum_window(predict, predictor):
+    # One short word at 2.0-2.4 s, then a break until the next line.
+    silences = np.array(
+        [(0.0, 1.9, 0.95, 1.9), (2.5, 12.0, 7.25, 9.5)], dtype=predict.SILENCE_DTYPE,
+    )
+    lines = [{"text": "oh", "startMs": 2000}, {"text": "la", "startMs": 12500}]
+    raw = predictor._line_window(lines, 0, 20.0)
+    start, end = predictor._clip_line_window(raw, 3, silences)
+    assert end - start == pytest.approx(predict._LINE_MIN_WINDOW_S)
+    assert start <= 2.0 - predict._LINE_PADDING_S + 0.1
+    assert end >= 2.4 + predict._LINE_PADDING_S
+    assert end < 12.0
+
+
+# ── Streaming ───────────────────────────────────────────────────────
+
+PREDICT_DEFAULTS = dict(
+    audio_file=None, transcript="", word_timestamps="", line_timestamps="",
+    per_line_mode=False, use_cache=False, previous_result="", stream=False,
+    backend="torch", precision="fp32", batch_archive=None, deadline_s=0.0,
+    metrics=False,
+)
+
+
+def run_predict(predictor, **inputs):
+    """predict() with every input given (cog's Input defaults are markers)."""
+    return [json.loads(r) for r in predictor.predict(**{**PREDICT_DEFAULTS, **inputs})]
+
+
+@pytest.fixture(scope="module")
+def song_file(predictor, song, tmp_path_factory):
+    path = tmp_path_factory.mktemp("audio") / "song.wav"
+    torchaudio.save(str(path), song.waveform, predictor.sample_rate)
+    return path
+
+
+@pytest.mark.parametrize("mode", ["chunked", "lines"])
+def test_streamed_sections_reproduce_the_single_result(
+    predict, predictor, song, song_file, mode, monkeypatch,
+):
+    # Chunk sizes follow free memory and the second pass's budget is wall
+    # time; pin both so the two runs plan and re-align the same sections.
+    monkeypatch.setattr(
+        type(predictor), "_available_memory", lambda self: (5 * 2**30, 5 * 2**30),
+    )
+    monkeypatch.setattr(predict, "_REALIGN_MIN_BUDGET_S", 1e6)
+    inputs = (
+        {"line_timestamps": json.dumps(song.lines)} if mode == "lines"
+        else {"transcript": song.transcript}
+    )
+    (single,) = run_predict(predictor, audio_file=song_file, **inputs)
+    records = run_predict(predictor, audio_file=song_file, stream=True, **inputs)
+
+    *streamed, summary = records
+    assert summary["type"] == "summary"
+    assert all(r["type"] in ("chunk", "line") for r in streamed)
+    # First-pass records arrive in time order; each provisional one is
+    # settled by a later record for the same section.
+    first = [r for r in streamed if r["index"] not in
+             {q["index"] for q in streamed[:streamed.index(r)]}]
+    assert len(first) > 1
+    assert [r["index"] for r in first] == sorted(r["index"] for r in first)
+    assert [r["start"] for r in first] == sorted(r["start"] for r in first)
+    for r in first:
+        later = [q for q in streamed if q["index"] == r["index"] and q is not r]
+        assert len(later) == (1 if r.get("provisional") else 0)
+        assert not any(q.get("provisional") for q in later)
+    # The last record per section together holds the single result.
+    final = {r["index"]: r for r in streamed}
+    assert [w for i in sorted(final) for w in final[i]["words"]] == single["words"]
+    assert summary["words"] == single["words"]
+
+
+# ── Deadline ────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("mode", ["lines", "words"])
+def test_a_passed_deadline_degrades_every_word_and_skips_the_cache(
+    predictor, song, song_file, mode,
+):
+    inputs = (
+        {"line_timestamps": json.dumps(song.lines)} if mode == "lines"
+        else {"word_timestamps": json.dumps(song.words)}
+    )
+    (late,) = run_predict(
+        predictor, audio_file=song_file, use_cache=True, deadline_s=1e-6, **inputs,
+    )
+    assert late["degraded"]["deadline_s"] == 0.0
+    assert late["words"] and all(w.get("degraded") for w in late["words"])
+    assert late["cache"]["hit"] is False
+
+    (again,) = run_predict(predictor, audio_file=song_file, use_cache=True, **inputs)
+    assert again["cache"]["hit"] is False
+    assert "degraded" not in again
+    assert not any(w.get("degraded") for w in again["words"])
+
+
+# ── Multi-song batch ────────────────────────────────────────────────
+
+def test_batch_songs_in_different_modes_match_their_solo_runs(
+    predict, predictor, song, song_file, tmp_path, monkeypatch,
+):
+    monkeypatch.setattr(
+        type(predictor), "_available_memory", lambda self: (5 * 2**30, 5 * 2**30),
+    )
+    monkeypatch.setattr(predict, "_REALIGN_MIN_BUDGET_S", 1e6)
+    entries = [
+        {"id": "lines", "audio": "a.wav", "line_timestamps": song.lines},
+        {"id": "full", "audio": "b.wav", "transcript": song.transcript},
+    ]
+    archive = tmp_path / "batch.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("manifest.json", json.dumps(entries))
+        zf.write(song_file, "a.wav")
+        zf.write(song_file, "b.wav")
+
+    *songs, summary = run_predict(predictor, batch_archive=archive)
+    assert summary == {**summary, "songs": 2, "failed": 0}
+    (lines,) = run_predict(
+        predictor, audio_file=song_file, line_timestamps=json.dumps(song.lines),
+    )
+    (full,) = run_predict(predictor, audio_file=song_file, transcript=song.transcript)
+    for record, solo in zip(songs, (lines, full)):
+        assert record["backend"] == solo["backend"] == "torch"
+        assert [w["word"] for w in record["words"]] == [w["word"] for w in solo["words"]]
+        for a, b in zip(record["words"], solo["words"]):
+            assert (a["start"], a["end"]) == pytest.approx((b["start"], b["end"]), abs=1e-4)
+    assert "lines" in songs[0] and "lines" not in songs[1]
+
+
+# ── Incremental re-alignment (previous_result) ──────────────────────
+
+def previous_result(lines, words):
+    return json.dumps({"words": words, "lines": lines})
+
+
+def test_previous_result_skips_non_dict_lines(predict):
+    words = [{"word": "hello", "start": 1.0, "end": 1.4, "phonemes": []}]
+    line = {"text": "hello", "start": 0.5, "end": 2.0, "span": [1.0, 1.5], "words": 1}
+    previous = predict.Predictor._parse_previous_result(previous_result(
+        ["stray", None, 3, line], words,
+    ))
+    assert previous == {
+        "lines": {("hello", 1.0, 1.5): {"words": words, "window": (0.5, 2.0)}},
+        "silence_threshold": None,
+    }
+
+    assert predict.Predictor._parse_previous_result(previous_result(
+        [{**line, "words": "1"}], words,
+    )) is None
+
+
+def test_previous_result_drops_degraded_and_failed_lines(predict):
+    good = {"word": "one", "start": 1.0, "end": 1.4, "phonemes": []}
+    degraded = {"word": "two", "start": 3.0, "end": 3.4, "phonemes": [], "degraded": True}
+    spread = {"word": "three", "start": 5.0, "end": 5.4, "phonemes": []}
+    previous = predict.Predictor._parse_previous_result(previous_result(
+        [
+            {"text": "one", "start": 0.5, "end": 2.0, "span": [1.0, 3.0], "words": 1},
+            {"text": "two", "start": 2.5, "end": 4.0, "span": [3.0, 5.0], "words": 1},
+            {
+                "text": "three", "start": 4.5, "end": 6.0, "span": [5.0, 7.0],
+                "words": 1, "failed": True,
+            },
+        ],
+        [good, degraded, spread],
+    ))
+    assert previous["lines"] == {("one", 1.0, 3.0): {"words": [good], "window": (0.5, 2.0)}}
+
+
+def test_failed_lines_are_marked_and_realigned(predictor, song, monkeypatch):
+    infer_job = predictor._infer_job
+
+    def fail_second_line(job, melspec, outputs):
+        # Second-pass sub-windows are indexed (line, part).
+        if job["index"] in (1, (1, 0), (1, 1)):
+            raise RuntimeError("injected failure")
+        return infer_job(job, melspec, outputs)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(predictor, "_infer_job", fail_second_line)
+        first = predictor._align_by_lines(
+            predictor._waveform_audio(song.waveform), song.lines,
+        )
+    lines = json.loads(first)["lines"]
+    assert lines[1].get("failed") is True
+    assert not any(line.get("failed") for k, line in enumerate(lines) if k != 1)
+
+    previous = predictor._parse_previous_result(first)
+    realigned = []
+    infer_job = predictor._infer_job
+
+    def record(job, melspec, outputs):
+        realigned.append(job["index"])
+        return infer_job(job, melspec, outputs)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(predictor, "_infer_job", record)
+        second = predictor._align_by_lines(
+            predictor._waveform_audio(song.waveform), song.lines, previous=previous,
+        )
+    assert realigned == [1]
+    assert "failed" not in json.loads(second)["lines"][1]
+
+
+@pytest.mark.parametrize("budget", ["default", "none"])
+def test_a_failed_line_is_realigned_in_silence_split_windows(
+    predict, predictor, song, budget, monkeypatch,
+):
+    # The first two sung lines given as one, so its window spans the gap.
+    merged = [
+        {"text": f"{song.lines[0]['text']} {song.lines[1]['text']}",
+         "startMs": song.lines[0]["startMs"]},
+        *song.lines[2:],
+    ]
+    if budget == "none":
+        monkeypatch.setattr(predict, "_REALIGN_MIN_BUDGET_S", 0.0)
+        monkeypatch.setattr(predict, "_REALIGN_BUDGET_SHARE", 0.0)
+    else:
+        monkeypatch.setattr(predict, "_REALIGN_MIN_BUDGET_S", 1e6)
+    infer_job = predictor._infer_job
+    second_pass = []
+
+    def fail_first_line(job, melspec, outputs):
+        if job["index"] == 0:
+            raise RuntimeError("injected failure")
+        if isinstance(job["index"], tuple):
+            second_pass.append(job)
+        return infer_job(job, melspec, outputs)
+
+    monkeypatch.setattr(predictor, "_infer_job", fail_first_line)
+    output = json.loads(predictor._align_by_lines(
+        predictor._waveform_audio(song.waveform), merged,
+    ))
+    line = output["lines"][0]
+    words = output["words"][:line["words"]]
+    spread = predictor._distribute_words_evenly(
+        merged[0]["text"].split(), line["start"], line["end"],
+    )
+
+    if budget == "none":
+        assert not second_pass
+        assert line.get("failed") is True
+        assert words == spread
+        return
+    windows = [job for job in second_pass if job["index"][0] == 0]
+    assert len(windows) >= 2
+    assert all(job["end"] - job["start"] < line["end"] - line["start"] for job in windows)
+    assert "failed" not in line
+    assert [w["word"] for w in words] == merged[0]["text"].split()
+    assert [(w["start"], w["end"]) for w in words] != [(w["start"], w["end"]) for w in spread]
+
+
+def test_incremental_request_decodes_only_the_edited_line(
+    predict, predictor, song, tmp_path, monkeypatch,
+):
+    # A source rate other than the model's, so spans are resampled too.
+    song_file = tmp_path / "song-48k.wav"
+    torchaudio.save(
+        str(song_file),
+        torchaudio.functional.resample(song.waveform, predictor.sample_rate, 48000),
+        48000,
+    )
+    (first,) = run_predict(
+        predictor, audio_file=song_file, line_timestamps=json.dumps(song.lines),
+    )
+    edited = [dict(line) for line in song.lines]
+    edited[3]["text"] = " ".join(reversed(edited[3]["text"].split()))
+
+    decoded = []
+    decode_span = predictor._decode_span
+
+    def record(audio_file, source_sr, lo, hi):
+        decoded.append((lo, hi))
+        return decode_span(audio_file, source_sr, lo, hi)
+
+    monkeypatch.setattr(predictor, "_decode_span", record)
+    (second,) = run_predict(
+        predictor, audio_file=song_file, line_timestamps=json.dumps(edited),
+        previous_result=json.dumps(first),
+    )
+    sr = predictor.sample_rate
+    assert len(decoded) == 1
+    lo, hi = decoded[0]
+    assert hi - lo < song.duration * sr / 2
+    assert lo / sr <= second["lines"][3]["start"] and second["lines"][3]["end"] <= hi / sr
+    for k, (a, b) in enumerate(zip(first["lines"], second["lines"])):
+        if k != 3:
+            assert a == b
+
+    # Inside the decoded span, mel frames and silence gaps are the song's.
+    previous = predictor._parse_previous_result(json.dumps(first))
+    partial = predictor._load_changed_lines(song_file, edited, previous)
+    whole = predictor._load_audio(song_file)
+    whole_mel = predictor._audio_mel(whole)
+    whole_gaps = predictor._audio_silences(whole)
+    hop = predictor.melspec_config["hop_length"]
+    start, end = second["lines"][3]["start"], second["lines"][3]["end"]
+    f0, f1 = int(start * sr) // hop, int(end * sr) // hop
+    assert torch.allclose(partial["mel"][:, f0:f1], whole_mel[:, f0:f1], atol=1e-4)
+
+    def gaps_in(gaps):
+        inside = gaps[(gaps["end"] > start) & (gaps["start"] < end)]
+        return np.stack([inside["start"], inside["end"]])
+
+    np.testing.assert_allclose(gaps_in(partial["silences"]), gaps_in(whole_gaps))
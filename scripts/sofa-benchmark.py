@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+sofa-benchmark.py — Offline performance benchmark for the SOFA alignment modes.
+
+Builds synthetic songs (sung-vowel tones with LRCLIB-style line timestamps,
+word timestamps and instrumental breaks) and drives the predictor's
+alignment paths directly — no cog server, no audio files:
+
+  full      _align_full                  (single pass, chunked when long)
+  chunked   _align_full_chunked          (silence-based chunks of --chunk-s)
+  lines     _align_by_lines              (one window per LRCLIB line)
+  words     _align_with_word_boundaries  (one window per word)
+
+For every mode and song length it reports throughput (audio-seconds per
+wall-second), p50/p95 latency, peak RSS / device memory and mean per-stage
+seconds from the predictor's telemetry, and can write the results as JSON
+and compare them against an earlier run.
+
+--model stub (default) runs sofa_stub's small deterministic network with
+SOFA's forward outputs and _infer_once signature (monotonic Viterbi
+decode), so it needs only torch, torchaudio, numpy and the cog package.
+Its numbers measure the predictor's own pipeline — planning, mel,
+batching, decode plumbing — not SOFA.  --model real loads the checkpoint and needs the
+predictor's environment (run inside the cog image).
+
+Usage:
+    python scripts/sofa-benchmark.py
+    python scripts/sofa-benchmark.py --lengths 60 240 --repeats 5 --json bench.json
+
+    # Compare against a baseline from another commit (exit 1 on regression):
+    python scripts/sofa-benchmark.py --json new.json --compare bench.json --threshold 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from sofa_stub import REPO_ROOT, Song, build_song, load_predictor  # noqa: E402
+
+MODES = ("full", "chunked", "lines", "words")
+
+
+# ── Runs ────────────────────────────────────────────────────────────
+
+@dataclass
+class ModeResult:
+    mode: str
+    song_s: float
+    words: int = 0
+    seconds: list[float] = field(default_factory=list)
+    peak_rss_mb: float = 0.0
+    peak_device_mb: float | None = None
+    stages: dict[str, float] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+
+def align(predict, predictor, mode: str, song: Song, chunk_s: float, backend: str) -> str:
+    # A fresh audio dict per run, so each run computes its own song mel.
+    audio = predictor._waveform_audio(song.waveform)
+    ctx = predict._SongContext(backend)
+    if mode == "full":
+        return predictor._align_full(audio, song.transcript, ctx=ctx)
+    if mode == "chunked":
+        return predictor._align_full_chunked(
+            audio, song.transcript.split(), song.duration,
+            max_chunk_s=chunk_s, ctx=ctx,
+        )
+    if mode == "lines":
+        return predictor._align_by_lines(audio, song.lines, ctx=ctx)
+    return predictor._align_with_word_boundaries(audio, song.words, ctx)
+
+
+def run_mode(
+    predict, predictor, mode: str, song: Song, repeats: int, chunk_s: float,
+    backend: str = "torch",
+) -> ModeResult:
+    result = ModeResult(mode=mode, song_s=song.duration)
+    pool = predictor._pool if predictor._pool is not None and predictor._pool.alive else None
+
+    # Untimed first run: one-off allocations for this window shape.
+    align(predict, predictor, mode, song, chunk_s, backend)
+
+    for _ in range(repeats):
+        predictor._metrics = metrics = predict._Metrics(
+            predictor.device, pool.pids if pool else (),
+        )
+        t0 = time.perf_counter()
+        try:
+            output = json.loads(align(predict, predictor, mode, song, chunk_s, backend))
+        except Exception as e:
+            output = {"words": [], "error": f"{type(e).__name__}: {e}"}
+        result.seconds.append(time.perf_counter() - t0)
+        snapshot = metrics.snapshot()
+        predictor._metrics = None
+
+        if output.get("error"):
+            result.errors.append(output["error"])
+        result.words = len(output.get("words", []))
+        result.peak_rss_mb = max(
+            result.peak_rss_mb,
+            snapshot["peak_rss_mb"], snapshot.get("worker_peak_rss_mb", 0.0),
+        )
+        if "peak_device_mb" in snapshot:
+            result.peak_device_mb = max(result.peak_device_mb or 0.0, snapshot["peak_device_mb"])
+        for stage, seconds in snapshot["stages_s"].items():
+            result.stages[stage] = result.stages.get(stage, 0.0) + seconds / repeats
+
+    return result
+
+
+# ── Reporting ───────────────────────────────────────────────────────
+
+def summarize(result: ModeResult) -> dict:
+    seconds = np.array(result.seconds)
+    return {
+        "mode": result.mode,
+        "song_s": result.song_s,
+        "words": result.words,
+        "runs": len(seconds),
+        "p50_s": round(float(np.percentile(seconds, 50)), 4),
+        "p95_s": round(float(np.percentile(seconds, 95)), 4),
+        "mean_s": round(float(seconds.mean()), 4),
+        "audio_s_per_s": round(result.song_s * len(seconds) / max(seconds.sum(), 1e-9), 2),
+        "peak_rss_mb": result.peak_rss_mb,
+        "peak_device_mb": result.peak_device_mb,
+        "stages_s": {k: round(v, 4) for k, v in sorted(result.stages.items())},
+        "errors": sorted(set(result.errors)),
+    }
+
+
+def print_table(rows: list[dict]) -> None:
+    header = (
+        f"  {'mode':<8} {'song s':>7} {'words':>6} {'p50 s':>8} {'p95 s':>8} "
+        f"{'audio s/s':>10} {'RSS MB':>8} {'dev MB':>8}  top stages"
+    )
+    print()
+    print(header)
+    print("  " + "─" * (len(header) - 2))
+    for row in rows:
+        top = sorted(
+            ((k, v) for k, v in row["stages_s"].items() if not k.startswith("pipeline_")),
+            key=lambda kv: -kv[1],
+        )[:3]
+        device = f"{row['peak_device_mb']:.0f}" if row["peak_device_mb"] is not None else "—"
+        print(
+            f"  {row['mode']:<8} {row['song_s']:>7.0f} {row['words']:>6} "
+            f"{row['p50_s']:>8.3f} {row['p95_s']:>8.3f} {row['audio_s_per_s']:>10.1f} "
+            f"{row['peak_rss_mb']:>8.0f} {device:>8}  "
+            + " ".join(f"{k}={v:.3f}" for k, v in top)
+            + ("  ERROR" if row["errors"] else "")
+        )
+    print()
+
+
+def compare(rows: list[dict], baseline_path: Path, threshold_pct: float) -> int:
+    """Print p50 / throughput / memory deltas; returns the regression count."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    base_rows = {(r["mode"], r["song_s"]): r for r in baseline["results"]}
+    print(f"  vs {baseline_path} ({baseline['meta'].get('commit', '?')[:10]}):")
+    regressions = 0
+    for row in rows:
+        base = base_rows.get((row["mode"], row["song_s"]))
+        if base is None:
+            continue
+        deltas = {
+            "p50": (row["p50_s"] / max(base["p50_s"], 1e-9) - 1) * 100,
+            "p95": (row["p95_s"] / max(base["p95_s"], 1e-9) - 1) * 100,
+            "rss": (row["peak_rss_mb"] / max(base["peak_rss_mb"], 1e-9) - 1) * 100,
+        }
+        worse = [k for k, v in deltas.items() if v > threshold_pct]
+        regressions += bool(worse)
+        print(
+            f"    {row['mode']:<8} {row['song_s']:>5.0f}s  "
+            + " ".join(f"{k} {v:+6.1f}%" for k, v in deltas.items())
+            + (f"  REGRESSION ({', '.join(worse)})" if worse else "")
+        )
+    print()
+    return regressions
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ── Main ────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Offline performance benchmark for the SOFA alignment modes."
+    )
+    parser.add_argument(
+        "--model", choices=("stub", "real"), default="stub",
+        help="Deterministic stub network or the real checkpoint (default: stub)"
+    )
+    parser.add_argument(
+        "--modes", nargs="+", choices=MODES, default=list(MODES),
+        help="Alignment modes to run (default: all)"
+    )
+    parser.add_argument(
+        "--lengths", nargs="+", type=float, default=[60.0, 240.0],
+        help="Synthetic song lengths in seconds (default: 60 240)"
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=3,
+        help="Timed runs per mode and length, after one untimed run (default: 3)"
+    )
+    parser.add_argument(
+        "--chunk-s", type=float, default=20.0,
+        help="Chunk length for the chunked mode (default: 20)"
+    )
+    parser.add_argument(
+        "--backend", default="torch", help="Network backend (default: torch)"
+    )
+    parser.add_argument(
+        "--precision", default="fp32", help="Network precision (default: fp32)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic song seed")
+    parser.add_argument(
+        "--json", type=str, default=None, help="Write results to a JSON file"
+    )
+    parser.add_argument(
+        "--compare", type=str, default=None,
+        help="Earlier --json output to compare against; exits 1 on regressions"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=10.0,
+        help="Regression threshold in percent for --compare (default: 10)"
+    )
+    args = parser.parse_args()
+
+    predict, predictor = load_predictor(args.model)
+    backend = predictor._select_backend(args.backend, args.precision)
+
+    print(
+        f"\n  model={args.model} device={predictor.device} backend={backend} "
+        f"workers={predictor._pool.size if predictor._pool else 1}\n",
+        file=sys.stderr,
+    )
+
+    rows = []
+    for length in args.lengths:
+        song = build_song(length, predictor.sample_rate, seed=args.seed)
+        print(
+            f"  {length:.0f}s song: {len(song.lines)} lines, {len(song.words)} words",
+            file=sys.stderr,
+        )
+        for mode in args.modes:
+            row = summarize(run_mode(
+                predict, predictor, mode, song, args.repeats, args.chunk_s, backend,
+            ))
+            rows.append(row)
+            print(
+                f"  {mode:<8} {length:>5.0f}s: p50 {row['p50_s']:.3f}s, "
+                f"{row['audio_s_per_s']:.1f} audio-s/s",
+                file=sys.stderr,
+            )
+
+    print_table(rows)
+
+    regressions = 0
+    if args.compare:
+        regressions = compare(rows, Path(args.compare), args.threshold)
+
+    if args.json:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "model": args.model,
+                "device": predictor.device,
+                "backend": backend,
+                "cpu_workers": predictor._pool.size if predictor._pool else 1,
+                "torch": torch.__version__,
+                "seed": args.seed,
+                "repeats": args.repeats,
+                "chunk_s": args.chunk_s,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "host": os.uname().nodename,
+            },
+            "results": rows,
+        }
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"  JSON written to: {args.json}")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+sofa-precision-report.py — Latency vs boundary-error report for SOFA network variants.
+
+Runs the SOFA predictor (cog/phoneme-align-sofa/predict.py) on songs that have
+human-corrected .xtiming files, once per network variant (backend + precision),
+and scores every run against the ground truth with compare-xtiming.py's word
+matching, metrics and confidence score.
+
+Needs the predictor's environment (torch, SOFA at /opt/SOFA, checkpoint) — run
+it inside the cog image, e.g. `cog run python scripts/sofa-precision-report.py …`.
+
+Usage:
+    python scripts/sofa-precision-report.py manifest.json
+
+    # With options:
+    python scripts/sofa-precision-report.py manifest.json \\
+        --variants torch:fp32 torch:int8 onnx:fp32 --repeats 3 --json report.json
+
+manifest.json lists the songs (paths relative to the manifest):
+    [{"ground_truth": "song.xtiming", "audio": "song-vocals.wav",
+      "line_timestamps": "song-lines.json"}]
+line_timestamps is optional; without it the transcript is built from the
+ground-truth word labels and the song is aligned full-file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import mean, median
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PREDICTOR_DIR = REPO_ROOT / "cog" / "phoneme-align-sofa"
+
+
+def load_compare_module():
+    """Import compare-xtiming.py (hyphenated filename) as a module."""
+    spec = importlib.util.spec_from_file_location(
+        "compare_xtiming", Path(__file__).resolve().parent / "compare-xtiming.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    # dataclasses resolves annotations through sys.modules.
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+cx = load_compare_module()
+
+
+# ── Data model ───────────────────────────────────────────────────────
+
+@dataclass
+class Song:
+    name: str
+    ground_truth: list  # list[cx.WordTiming]
+    audio: Path
+    transcript: str
+    line_timestamps: str
+
+
+@dataclass
+class VariantResult:
+    variant: str
+    backend_used: set[str] = field(default_factory=set)
+    seconds: list[float] = field(default_factory=list)
+    matched: list = field(default_factory=list)   # list[cx.MatchMetrics]
+    gt_only: int = 0
+    sofa_only: int = 0
+    gt_total: int = 0
+
+
+# ── Inputs ───────────────────────────────────────────────────────────
+
+def load_manifest(path: Path) -> list[Song]:
+    """Read the song manifest and each song's ground-truth words."""
+    entries = json.loads(path.read_text(encoding="utf-8"))
+    base = path.parent
+    songs: list[Song] = []
+
+    for entry in entries:
+        gt_path = base / entry["ground_truth"]
+        gt_words = cx.parse_xtiming(str(gt_path))
+
+        line_timestamps = ""
+        if entry.get("line_timestamps"):
+            lt = entry["line_timestamps"]
+            line_timestamps = (
+                (base / lt).read_text(encoding="utf-8")
+                if isinstance(lt, str) else json.dumps(lt)
+            )
+
+        songs.append(Song(
+            name=gt_path.stem,
+            ground_truth=gt_words,
+            audio=base / entry["audio"],
+            transcript=" ".join(w.label.lower() for w in gt_words),
+            line_timestamps=line_timestamps,
+        ))
+
+    return songs
+
+
+def load_predictor():
+    """Set up the SOFA predictor from cog/phoneme-align-sofa."""
+    sys.path.insert(0, str(PREDICTOR_DIR))
+    import predict  # noqa: E402
+
+    predictor = predict.Predictor()
+    predictor.setup()
+    return predictor
+
+
+# ── Runs ─────────────────────────────────────────────────────────────
+
+def align(predictor, song: Song, backend: str, precision: str) -> dict:
+    """One uncached alignment; returns the predictor's final record."""
+    records = list(predictor.predict(
+        audio_file=song.audio,
+        transcript="" if song.line_timestamps else song.transcript,
+        word_timestamps="",
+        line_timestamps=song.line_timestamps,
+        per_line_mode=False,
+        use_cache=False,
+        previous_result="",
+        stream=False,
+        backend=backend,
+        precision=precision,
+        batch_archive=None,
+        metrics=False,
+        deadline_s=0.0,
+    ))
+    return json.loads(records[-1])
+
+
+def to_word_timings(words: list[dict]) -> list:
+    """Predictor words (seconds) → compare-xtiming WordTimings (ms)."""
+    return [
+        cx.WordTiming(
+            label=w["word"].upper(),
+            start=int(round(w["start"] * 1000)),
+            end=int(round(w["end"] * 1000)),
+        )
+        for w in words
+    ]
+
+
+def run_variant(predictor, songs: list[Song], variant: str, repeats: int) -> VariantResult:
+    backend, precision = variant.split(":")
+    result = VariantResult(variant=variant)
+
+    # Untimed first pass prepares the variant (export / quantization).
+    align(predictor, songs[0], backend, precision)
+
+    for song in songs:
+        output = None
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            output = align(predictor, song, backend, precision)
+            result.seconds.append(time.perf_counter() - t0)
+        result.backend_used.add(output.get("backend", "?"))
+
+        if output.get("error"):
+            print(f"  {variant} {song.name}: {output['error']}", file=sys.stderr)
+
+        pairs = cx.align_words(song.ground_truth, to_word_timings(output.get("words", [])))
+        matched, gt_only, sofa_only = cx.compute_metrics(pairs)
+        result.matched.extend(matched)
+        result.gt_only += len(gt_only)
+        result.sofa_only += len(sofa_only)
+        result.gt_total += len(song.ground_truth)
+        print(
+            f"  {variant:<12} {song.name}: {len(matched)}/{len(song.ground_truth)} matched, "
+            f"score {cx.confidence_score(matched):.1f}, "
+            f"{min(result.seconds[-repeats:]):.2f}s",
+            file=sys.stderr,
+        )
+
+    return result
+
+
+# ── Reporting ────────────────────────────────────────────────────────
+
+def summarize(result: VariantResult, tolerance_ms: int) -> dict:
+    starts = [m.abs_start_ms for m in result.matched]
+    ends = [m.abs_end_ms for m in result.matched]
+    within = sum(1 for m in result.matched if m.abs_start_ms <= tolerance_ms)
+    return {
+        "variant": result.variant,
+        "backend_used": sorted(result.backend_used),
+        "runs": len(result.seconds),
+        "total_seconds": round(sum(result.seconds), 3),
+        "median_seconds": round(median(result.seconds), 3) if result.seconds else None,
+        "matched": len(result.matched),
+        "gt_words": result.gt_total,
+        "gt_only": result.gt_only,
+        "sofa_only": result.sofa_only,
+        "mean_abs_start_ms": round(mean(starts), 1) if starts else None,
+        "median_abs_start_ms": median(starts) if starts else None,
+        "mean_abs_end_ms": round(mean(ends), 1) if ends else None,
+        "median_abs_end_ms": median(ends) if ends else None,
+        f"start_within_{tolerance_ms}ms": cx.pct(within, len(result.matched)),
+        "confidence_score": round(cx.confidence_score(result.matched), 1),
+    }
+
+
+def print_table(rows: list[dict], tolerance_ms: int) -> None:
+    header = (
+        f"  {'variant':<12} {'used':<11} {'median s':>9} {'total s':>8} "
+        f"{'matched':>9} {'|Δstart| ms':>12} {'|Δend| ms':>10} "
+        f"{'≤' + str(tolerance_ms) + 'ms':>8} {'score':>6}"
+    )
+    print()
+    print(header)
+    print("  " + "─" * (len(header) - 2))
+    base = rows[0]
+    for row in rows:
+        print(
+            f"  {row['variant']:<12} {','.join(row['backend_used']):<11} "
+            f"{row['median_seconds']:>9.3f} {row['total_seconds']:>8.2f} "
+            f"{row['matched']:>4}/{row['gt_words']:<4} "
+            f"{row['mean_abs_start_ms'] or 0:>12.1f} {row['mean_abs_end_ms'] or 0:>10.1f} "
+            f"{row[f'start_within_{tolerance_ms}ms']:>8} {row['confidence_score']:>6.1f}"
+        )
+    if len(rows) > 1 and base["total_seconds"]:
+        print()
+        for row in rows[1:]:
+            speedup = base["total_seconds"] / max(row["total_seconds"], 1e-9)
+            print(
+                f"  {row['variant']} vs {base['variant']}: ×{speedup:.2f} speed, "
+                f"score {row['confidence_score'] - base['confidence_score']:+.1f}"
+            )
+    print()
+
+
+# ── Main ─────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Latency vs boundary-error report for SOFA network variants."
+    )
+    parser.add_argument("manifest", help="JSON list of {ground_truth, audio, line_timestamps?}")
+    parser.add_argument(
+        "--variants", nargs="+", default=["torch:fp32", "torch:int8"],
+        help="backend:precision pairs (default: torch:fp32 torch:int8); first is the baseline"
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=1,
+        help="Timed runs per song and variant (default: 1)"
+    )
+    parser.add_argument(
+        "--tolerance", type=int, default=50,
+        help="Start-error tolerance in ms for the within-tolerance column (default: 50)"
+    )
+    parser.add_argument(
+        "--json", type=str, default=None,
+        help="Write the summary rows to a JSON file"
+    )
+    args = parser.parse_args()
+
+    manifest = Path(args.manifest)
+    if not manifest.exists():
+        print(f"ERROR: Manifest not found: {manifest}", file=sys.stderr)
+        sys.exit(1)
+
+    songs = load_manifest(manifest)
+    if not songs:
+        print("ERROR: Manifest lists no songs", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n  {len(songs)} songs, variants: {' '.join(args.variants)}\n", file=sys.stderr)
+
+    predictor = load_predictor()
+    rows = [
+        summarize(run_variant(predictor, songs, variant, args.repeats), args.tolerance)
+        for variant in args.variants
+    ]
+
+    print_table(rows, args.tolerance)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2) + "\n", encoding="utf-8")
+        print(f"  JSON written to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
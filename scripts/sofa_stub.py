@@ -0,0 +1,263 @@
+"""
+sofa_stub.py — A deterministic stand-in for SOFA, and synthetic songs to align.
+
+StubAlignmentTask has SOFA's forward outputs and _infer_once signature
+(monotonic Viterbi decode) on a small fixed-weight network, so the
+predictor can be set up and run with only torch, torchaudio, numpy and
+the cog package — no checkpoint and no /opt/SOFA.  build_song
+synthesizes sung-vowel tones with LRCLIB-style line timestamps, word
+timestamps and instrumental breaks.
+
+Used by cog/phoneme-align-sofa/test_predict.py:
+
+  import sofa_stub
+  predict, predictor = sofa_stub.load_predictor("stub")
+  song = sofa_stub.build_song(40.0, predictor.sample_rate)
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import types
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import torch
+import torchaudio
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PREDICTOR_DIR = REPO_ROOT / "cog" / "phoneme-align-sofa"
+
+LYRIC_WORDS = (
+    "love me tender hold on tonight the river runs cold and the city lights "
+    "shine bright over you never let go dancing in the rain we are young "
+    "forever singing out loud take my hand heart of gold"
+).split()
+
+
+# ── Deterministic stub model ────────────────────────────────────────
+
+STUB_MELSPEC_CONFIG = {
+    "n_mels": 128, "sample_rate": 44100, "win_length": 1024, "hop_length": 512,
+    "n_fft": 2048, "fmin": 40, "fmax": 16000, "clamp": 1e-5, "scale_factor": 4,
+}
+
+STUB_PHONEMES = [
+    "SP", "aa", "ae", "ah", "ao", "aw", "ax", "ay", "b", "ch", "d", "dh", "dr",
+    "dx", "eh", "er", "ey", "f", "g", "hh", "ih", "iy", "jh", "k", "l", "m",
+    "n", "ng", "ow", "oy", "p", "r", "s", "sh", "t", "th", "tr", "uh", "uw",
+    "v", "w", "y", "z", "zh",
+]
+
+
+class StubAlignmentTask(torch.nn.Module):
+    """Stand-in for SOFA's LitForcedAlignmentTask with fixed random weights.
+
+    forward returns (ph_frame_logits, ph_edge_logits, ctc_logits) shaped
+    like SOFA's; _infer_once crops them to the window and runs a
+    monotonic Viterbi over (frames × phonemes), so decode cost scales
+    the way SOFA's DP does.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.melspec_config = dict(STUB_MELSPEC_CONFIG)
+        self.vocab = {"<vocab_size>": len(STUB_PHONEMES)}
+        for i, ph in enumerate(STUB_PHONEMES):
+            self.vocab[ph] = i
+            self.vocab[i] = ph
+        n_mels, n_ph = self.melspec_config["n_mels"], len(STUB_PHONEMES)
+        self.encoder = torch.nn.Sequential(
+            torch.nn.Conv1d(n_mels, 64, 5, padding=2),
+            torch.nn.ReLU(),
+            torch.nn.Conv1d(64, 64, 5, padding=2),
+            torch.nn.ReLU(),
+        )
+        self.head = torch.nn.Linear(64, 2 * n_ph + 1)
+        generator = torch.Generator().manual_seed(0)
+        with torch.no_grad():
+            for p in self.parameters():
+                p.copy_(torch.randn(p.shape, generator=generator) * 0.1)
+
+    @classmethod
+    def load_from_checkpoint(cls, path, strict=False):
+        return cls()
+
+    def set_inference_mode(self, mode):
+        pass
+
+    def forward(self, x):
+        """x: (B, T, n_mels) → frame logits, edge logits, CTC logits."""
+        h = self.encoder(x.transpose(1, 2)).transpose(1, 2)
+        y = self.head(h)
+        n_ph = len(STUB_PHONEMES)
+        return y[:, :, :n_ph], y[:, :, n_ph], y[:, :, n_ph + 1:]
+
+    def _infer_once(
+        self, melspec, wav_length, ph_seq, word_seq=None,
+        ph_idx_to_word_idx=None, return_ctc=False, return_plot=False,
+    ):
+        cfg = self.melspec_config
+        frame_s = cfg["hop_length"] / (cfg["sample_rate"] * cfg["scale_factor"])
+        frame_logits, _, _ = self.forward(melspec.transpose(1, 2))
+        n_frames = int(
+            (wav_length * cfg["scale_factor"] * cfg["sample_rate"] + 0.5)
+            / cfg["hop_length"]
+        )
+        log_probs = torch.log_softmax(frame_logits[0, :n_frames].float(), dim=-1)
+        ids = [self.vocab[ph] for ph in ph_seq]
+        emissions = log_probs[:, ids].cpu().numpy()   # (T, S)
+        n_frames, n_states = emissions.shape
+
+        if n_frames >= n_states:
+            # Each frame either stays on the current phoneme or advances.
+            score = np.full(n_states, -np.inf)
+            score[0] = emissions[0, 0]
+            advanced = np.zeros((n_frames, n_states), dtype=bool)
+            for t in range(1, n_frames):
+                shifted = np.concatenate(([-np.inf], score[:-1]))
+                advanced[t] = shifted > score
+                score = np.maximum(shifted, score) + emissions[t]
+            state, starts = n_states - 1, [0] * n_states
+            for t in range(n_frames - 1, 0, -1):
+                if advanced[t, state]:
+                    starts[state] = t
+                    state -= 1
+            confidence = float(np.exp(score[-1] / n_frames))
+        else:
+            starts = [k * n_frames // n_states for k in range(n_states)]
+            confidence = 0.0
+        bounds = np.array(starts + [n_frames]) * frame_s
+
+        ph_seq_pred, ph_intervals, words, word_intervals = [], [], [], []
+        last_word = -1
+        for k, ph in enumerate(ph_seq):
+            if ph == "SP":
+                continue
+            interval = [bounds[k], bounds[k + 1]]
+            ph_seq_pred.append(ph)
+            ph_intervals.append(interval)
+            w = ph_idx_to_word_idx[k]
+            if w == last_word:
+                word_intervals[-1][1] = interval[1]
+            else:
+                words.append(word_seq[w])
+                word_intervals.append(list(interval))
+                last_word = w
+
+        return (
+            np.array(ph_seq_pred), np.array(ph_intervals).reshape(-1, 2),
+            np.array(words), np.array(word_intervals).reshape(-1, 2),
+            confidence, None, None,
+        )
+
+
+class StubMelSpecExtractor:
+    """Log-mel extractor with SOFA's MelSpecExtractor call signature."""
+
+    def __init__(
+        self, n_mels, sample_rate, win_length, hop_length, n_fft, fmin, fmax,
+        clamp, scale_factor=None, device=None,
+    ):
+        self.transform = torchaudio.transforms.MelSpectrogram(
+            sample_rate=sample_rate, n_fft=n_fft, win_length=win_length,
+            hop_length=hop_length, f_min=fmin, f_max=fmax, n_mels=n_mels,
+        )
+        self.clamp = clamp
+
+    def __call__(self, waveform):
+        self.transform = self.transform.to(waveform.device)
+        return torch.log(torch.clamp(self.transform(waveform), min=self.clamp))
+
+
+def install_stub_sofa():
+    """Make the stub importable under SOFA's module paths."""
+    stubs = {
+        "modules": {},
+        "modules.task": {},
+        "modules.task.forced_alignment": {"LitForcedAlignmentTask": StubAlignmentTask},
+        "modules.utils": {},
+        "modules.utils.get_melspec": {"MelSpecExtractor": StubMelSpecExtractor},
+    }
+    for name, attrs in stubs.items():
+        module = types.ModuleType(name)
+        module.__path__ = []
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+
+
+def load_predictor(model: str):
+    """Import and set up the predictor with the real or stub network."""
+    if model == "stub":
+        install_stub_sofa()
+    sys.path.insert(0, str(PREDICTOR_DIR))
+    import predict  # noqa: E402
+
+    if model == "stub":
+        # setup() stats the checkpoint for cache keys; the stub ignores it.
+        ckpt = Path(tempfile.mkdtemp(prefix="sofa-stub-")) / "stub.ckpt"
+        ckpt.write_bytes(b"stub")
+        predict.SOFA_CKPT_PATH = str(ckpt)
+
+    predictor = predict.Predictor()
+    predictor.setup()
+    return predict, predictor
+
+
+# ── Synthetic songs ─────────────────────────────────────────────────
+
+@dataclass
+class Song:
+    duration: float
+    waveform: torch.Tensor          # (1, samples) at the predictor's rate
+    transcript: str
+    lines: list[dict]               # [{"text", "startMs"}]
+    words: list[dict]               # [{"word", "start", "end"}]
+
+
+def build_song(
+    duration: float, sample_rate: int, seed: int = 0, line_s: float = 4.0,
+    gap_s: float = 1.5, break_every: int = 8, break_s: float = 12.0,
+) -> Song:
+    """Synthesize a song: sung lines, short gaps and instrumental breaks.
+
+    Each word is a vibrato tone with a few harmonics on its own pitch;
+    gaps hold a low noise floor and every break_every lines an
+    instrumental break of broadband noise fills break_s seconds.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    audio = 0.005 * rng.standard_normal(n)
+    lines, words = [], []
+
+    t = 1.0
+    while t + line_s < duration:
+        if lines and len(lines) % break_every == 0:
+            end = min(duration, t + break_s)
+            a, b = int(t * sample_rate), int(end * sample_rate)
+            audio[a:b] += 0.08 * rng.standard_normal(b - a)
+            t = end + gap_s
+            continue
+
+        n_words = int(rng.integers(4, 9))
+        text = [LYRIC_WORDS[int(i)] for i in rng.integers(0, len(LYRIC_WORDS), n_words)]
+        lines.append({"text": " ".join(text), "startMs": int(round(t * 1000))})
+        word_s = line_s / n_words
+        for k, word in enumerate(text):
+            start = t + k * word_s
+            end = start + 0.85 * word_s
+            a, b = int(start * sample_rate), int(end * sample_rate)
+            tt = np.arange(b - a) / sample_rate
+            f0 = rng.uniform(160.0, 440.0) * (1.0 + 0.02 * np.sin(2 * np.pi * 5.0 * tt))
+            phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+            tone = sum(0.3 / h * np.sin(h * phase) for h in range(1, 5))
+            envelope = np.minimum(1.0, np.minimum(tt, tt[::-1]) / 0.02)
+            audio[a:b] += tone * envelope
+            words.append({"word": word, "start": round(start, 3), "end": round(end, 3)})
+        t += line_s + gap_s
+
+    waveform = torch.from_numpy(audio.astype(np.float32)).unsqueeze(0)
+    transcript = " ".join(line["text"] for line in lines)
+    return Song(duration, waveform, transcript, lines, words)
@@ -7,7 +7,8 @@
 /*  trained on singing voice data — better accuracy on held notes,    */
 /*  melisma, and diphthongs vs speech-trained models.                 */
 /*                                                                    */
-/*  Features: line-aware chunking for long audio.                     */
+/*  Features: line-aware chunking for long audio, streamed partial    */
+/*  results while long songs are still aligning.                      */
 /* ------------------------------------------------------------------ */
 
 import { createClient } from "@/lib/supabase/client";
@@ -37,6 +38,8 @@ export interface PhonemeAlignWord {
   end: number;
   /** Per-phoneme timestamps within this word */
   phonemes: PhonemeTimestamp[];
+  /** Set when the deadline forced an evenly spread (unaligned) timing */
+  degraded?: boolean;
 }
 
 /** A line timestamp from LRCLIB synced lyrics for per-line alignment */
@@ -52,6 +55,12 @@ interface PhonemeAlignResponse {
   predictionId: string;
   status: PredictionStatus;
   words?: PhonemeAlignWord[];
+  /** Words aligned so far while a streaming prediction is running */
+  partialWords?: PhonemeAlignWord[];
+  /** Records streamed so far; grows when sections arrive or are re-aligned */
+  partialRecords?: number;
+  /** Per-line result to send back after lyric edits (line-anchored runs) */
+  previousResult?: string;
   error?: string;
 }
 
@@ -94,6 +103,14 @@ async function callPhonemeAlignFunction(
  * @param transcript      - Plain lyrics text to align
  * @param onStatusUpdate  - Called with status messages during processing
  * @param wordTimestamps  - Word-level timestamps from force-align (for precision)
+ * @param lineTimestamps  - LRCLIB line timestamps (for per-line alignment)
+ * @param onPartialWords  - When given, the model streams results and this is
+ *                          called with the words aligned so far whenever they change
+ * @param deadlineS       - Optional latency budget in seconds; past it the model
+ *                          degrades (words flagged `degraded`) instead of running long
+ * @param previousResult  - previousResult of an earlier line-anchored run on the
+ *                          same vocals; only edited lines are re-aligned
+ * @param onPreviousResult - Called with this run's previousResult, when it has one
  * @returns Array of words with per-phoneme timestamps
  */
 /** Status callback includes the Replicate prediction phase */
@@ -108,6 +125,10 @@ export async function phonemeAlignLyrics(
   onStatusUpdate?: PhonemeAlignStatusCallback,
   wordTimestamps?: ForceAlignWord[],
   lineTimestamps?: LineTimestamp[],
+  onPartialWords?: (words: PhonemeAlignWord[]) => void,
+  deadlineS?: number,
+  previousResult?: string,
+  onPreviousResult?: (previousResult: string) => void,
 ): Promise<PhonemeAlignWord[]> {
   // Step 1: Start the alignment job.
   // When line timestamps are available, pass them so the SOFA chunker
@@ -124,6 +145,15 @@ export async function phonemeAlignLyrics(
     vocalsUrl,
     transcript,
   };
+  if (onPartialWords) {
+    body.stream = true;
+  }
+  if (deadlineS && deadlineS > 0) {
+    body.deadlineS = deadlineS;
+  }
+  if (previousResult) {
+    body.previousResult = previousResult;
+  }
   if (lineTimestamps && lineTimestamps.length > 0) {
     body.lineTimestamps = JSON.stringify(lineTimestamps);
   } else if (wordTimestamps && wordTimestamps.length > 0) {
@@ -141,6 +171,7 @@ export async function phonemeAlignLyrics(
   // Step 2: Poll for completion
   onStatusUpdate?.("Waiting for GPU...", "queued");
   let attempts = 0;
+  let partialRecords = 0;
 
   while (attempts < MAX_POLL_ATTEMPTS) {
     await sleep(POLL_INTERVAL_MS);
@@ -152,6 +183,9 @@ export async function phonemeAlignLyrics(
     });
 
     if (result.status === "succeeded" && result.words) {
+      if (result.previousResult) {
+        onPreviousResult?.(result.previousResult);
+      }
       return result.words;
     }
 
@@ -163,6 +197,16 @@ export async function phonemeAlignLyrics(
       throw new Error("Phoneme alignment was canceled");
     }
 
+    if (onPartialWords && result.partialWords) {
+      // Re-aligned sections replace words without adding any, so track
+      // streamed records rather than the word count.
+      const records = result.partialRecords ?? result.partialWords.length;
+      if (records > partialRecords) {
+        partialRecords = records;
+        onPartialWords(result.partialWords);
+      }
+    }
+
     const elapsed = Math.round((attempts * POLL_INTERVAL_MS) / 1000);
     if (result.status === "starting") {
       onStatusUpdate?.(`Waiting for GPU... (${elapsed}s)`, "queued");
@@ -408,14 +408,26 @@ export async function runPipeline(
         update("lyrics", "active", "Pass 2: SOFA phoneme alignment\u2026", "queued", 45);
         appendLog("lyrics", "Pass 2: SOFA phoneme alignment within line windows");
 
+        // Streamed sections move the bar from 75 toward 95 as words land
+        let alignedShare = 0;
         const phonemeWords = await runUnifiedAlign(
           stems.vocals,
           lyrics!,
           sofaLines,
           (msg, phase) => {
-            const sp = phase === "queued" ? 50 : 75;
+            const sp = phase === "queued" ? 50 : 75 + Math.round(20 * alignedShare);
             update("lyrics", "active", msg, phase, sp);
           },
+          (aligned, total) => {
+            alignedShare = total > 0 ? Math.min(aligned / total, 1) : 0;
+            update(
+              "lyrics",
+              "active",
+              `Pass 2: ${aligned}/${total} words aligned\u2026`,
+              "running",
+              75 + Math.round(20 * alignedShare),
+            );
+          },
         );
 
         if (phonemeWords && phonemeWords.length > 0) {
@@ -782,6 +794,8 @@ async function runForceAlign(
  * Run unified CTC alignment: word + phoneme boundaries in one call.
  * When line timestamps are available, uses per-line CTC alignment.
  * Falls back to full-file CTC.
+ * When onAlignedProgress is given, the model streams its sections and the
+ * callback gets the number of words aligned so far out of the transcript's.
  * Returns null if alignment fails.
  */
 async function runUnifiedAlign(
@@ -789,11 +803,13 @@ async function runUnifiedAlign(
   lyrics: LyricsData,
   lineTimestamps: LineTimestamp[] | undefined,
   onStatusUpdate: (msg: string, phase?: "queued" | "running") => void,
+  onAlignedProgress?: (aligned: number, total: number) => void,
 ): Promise<PhonemeAlignedWord[] | null> {
   if (!vocalsUrl) return null;
 
   try {
     const transcript = normalizeTranscript(lyrics.plainText);
+    const totalWords = transcript.split(/\s+/).filter(Boolean).length;
 
     onStatusUpdate("Running CTC forced alignment on vocals...");
 
@@ -803,6 +819,9 @@ async function runUnifiedAlign(
       onStatusUpdate,
       undefined,
       lineTimestamps,
+      onAlignedProgress
+        ? (words) => onAlignedProgress(words.length, totalWords)
+        : undefined,
     );
 
     if (!phonemeWords || phonemeWords.length === 0) return null;
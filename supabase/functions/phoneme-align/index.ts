@@ -5,7 +5,9 @@
 //
 // Actions:
 //   start  — Submit vocals URL + transcript + word timestamps, create prediction
+//            (optionally a previousResult for incremental re-alignment)
 //   status — Poll prediction status, return phoneme timestamps when complete
+//            (and partial words while a streaming prediction is running)
 //
 // Required secrets:
 //   REPLICATE_API_TOKEN — Your Replicate API token
@@ -79,6 +81,9 @@ Deno.serve(async (req: Request) => {
         corsHeaders,
         body.wordTimestamps,
         body.lineTimestamps,
+        body.stream === true,
+        body.previousResult,
+        typeof body.deadlineS === "number" ? body.deadlineS : undefined,
       );
     } else if (body.action === "status" && body.predictionId) {
       return await handleStatus(body.predictionId, replicateToken, corsHeaders);
@@ -105,11 +110,26 @@ async function handleStart(
   corsHeaders: Record<string, string>,
   wordTimestamps?: string,
   lineTimestamps?: string,
+  stream = false,
+  previousResult?: string,
+  deadlineS?: number,
 ): Promise<Response> {
   const input: Record<string, unknown> = {
     audio_file: vocalsUrl,
     transcript,
   };
+  if (stream) {
+    input.stream = true;
+  }
+  if (previousResult) {
+    // Earlier per-line result for the same audio — only edited lines
+    // are re-aligned.
+    input.previous_result = previousResult;
+  }
+  if (deadlineS && deadlineS > 0) {
+    // Latency budget — the model degrades gracefully to meet it.
+    input.deadline_s = deadlineS;
+  }
   if (lineTimestamps) {
     input.line_timestamps = lineTimestamps;
   } else if (wordTimestamps) {
@@ -148,9 +168,24 @@ async function handleStart(
   );
 }
 
+/**
+ * Parse one model output record (JSON string or already-parsed object).
+ */
+function parseRecord(record: unknown): Record<string, unknown> {
+  return (typeof record === "string" ? JSON.parse(record) : record) as Record<
+    string,
+    unknown
+  >;
+}
+
 /**
  * Check the status of a phoneme alignment prediction.
  * Returns phoneme timestamps when the prediction has succeeded.
+ *
+ * The model yields a list of JSON records: one final result, or — when
+ * started with stream — per-chunk/line records followed by a summary.
+ * Provisional records are replaced by later ones for the same section.
+ * The last record always carries every word.
  */
 async function handleStatus(
   predictionId: string,
@@ -175,13 +210,41 @@ async function handleStatus(
     status: prediction.status,
   };
 
+  const records: unknown[] = Array.isArray(prediction.output)
+    ? prediction.output
+    : prediction.output
+      ? [prediction.output]
+      : [];
+
+  if (prediction.status === "processing" && records.length > 0) {
+    // Streamed chunk/line records so far, in time order.  A provisional
+    // section is later settled by a record with the same type and index,
+    // which takes its place.
+    const sections = new Map<string, Record<string, unknown>>();
+    for (const record of records.map(parseRecord)) {
+      if (record.type !== "summary") {
+        sections.set(`${record.type}:${record.index}`, record);
+      }
+    }
+    result.partialWords = [...sections.values()].flatMap(
+      (record) => (record.words as unknown[]) ?? [],
+    );
+    result.partialRecords = records.length;
+  }
+
   if (prediction.status === "succeeded") {
-    if (prediction.output) {
-      const output =
-        typeof prediction.output === "string"
-          ? JSON.parse(prediction.output)
-          : prediction.output;
+    if (records.length > 0) {
+      const output = parseRecord(records[records.length - 1]);
       result.words = output.words ?? output;
+      if (output.lines) {
+        // Per-line metadata; send it back as previousResult after edits.
+        result.previousResult = JSON.stringify({
+          words: output.words,
+          lines: output.lines,
+          silence_threshold: output.silence_threshold,
+          audio_sha256: output.audio_sha256,
+        });
+      }
     } else {
       result.status = "failed";
       result.error = "Model succeeded but returned no output";